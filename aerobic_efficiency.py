@@ -0,0 +1,230 @@
+"""
+Aerobic efficiency (AE) time series over all base runs.
+
+AE is mean pace / mean HR over the cleaned samples of a period (see
+clean_base_runs). Every series here is derived from a small per-run summary
+table of sums and counts, so pooled means over any set of runs are exact and
+adding a run only appends one row to the summary.
+"""
+
+import pandas as pd
+from data_handling import load_runs, add_elapsed_time, clean_base_runs
+
+SUMMARY_COLUMNS = ["date", "pace_sum", "pace_count", "hr_sum", "hr_count"]
+
+
+def summarize_base_runs(runs):
+    """
+    Reduces base runs to per-run pace/HR sums and counts.
+
+    All runs are cleaned and concatenated, then reduced with a single groupby.
+
+    Parameters
+    ----------
+    runs: dict
+        Dictionary of runs as returned by load_runs.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per run date with columns SUMMARY_COLUMNS.
+    """
+
+    frames = []
+    for date_str, df in runs.items():
+        df = add_elapsed_time(df)
+        df = clean_base_runs(df)
+        frames.append(
+            df[["pace", "hr"]].assign(date=pd.to_datetime(date_str, format="%Y%m%d"))
+        )
+
+    if not frames:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+
+    samples = pd.concat(frames)
+    samples[["pace", "hr"]] = samples[["pace", "hr"]].astype(float)
+    grouped = samples.groupby("date")
+    summary = pd.DataFrame(
+        {
+            "pace_sum": grouped["pace"].sum(),
+            "pace_count": grouped["pace"].count(),
+            "hr_sum": grouped["hr"].sum(),
+            "hr_count": grouped["hr"].count(),
+        }
+    ).reset_index()
+
+    return summary[SUMMARY_COLUMNS]
+
+
+def build_ae_summary(start_date=None, end_date=None, type="base"):
+    """
+    Loads all runs of the given type and summarizes them for AE.
+    """
+
+    runs = load_runs(start_date=start_date, end_date=end_date, type=type)
+
+    return summarize_base_runs(runs)
+
+
+def summarize_from_store(summaries, start_date=None, end_date=None, type="base"):
+    """
+    Same summary as build_ae_summary, read from pre-aggregated run summaries.
+
+    Parameters
+    ----------
+    summaries: RunSummaries
+        Up-to-date summaries of a RunStore (see run_summaries.py).
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per run date with columns SUMMARY_COLUMNS.
+    """
+
+    # Skipping the 5 min warm-up lines up with the 60 s buckets, the pace
+    # filters of clean_base_runs are in the clean_* accumulators
+    runs = summaries.aggregate(
+        channels=["pace", "hr"],
+        start_date=start_date,
+        end_date=end_date,
+        type=type,
+        start=5 * 60,
+    )
+    summary = pd.DataFrame(
+        {
+            "date": pd.to_datetime(runs["date"], format="%Y%m%d"),
+            "pace_sum": runs["clean_pace_sum"],
+            "pace_count": runs["clean_pace_count"],
+            "hr_sum": runs["clean_hr_sum"],
+            "hr_count": runs["clean_hr_count"],
+        }
+    )
+
+    return summary.groupby("date", as_index=False)[SUMMARY_COLUMNS[1:]].sum()
+
+
+def update_ae_summary(summary, date_str, df):
+    """
+    Adds a single new run to an existing summary without reloading others.
+
+    Parameters
+    ----------
+    summary: pd.DataFrame
+        Summary as returned by summarize_base_runs.
+    date_str: str
+        Date of the run in 'yyyymmdd' format.
+    df: pd.DataFrame
+        The new run as loaded by load_runs.
+
+    Returns
+    -------
+    pd.DataFrame
+        Updated summary, sorted by date. Runs on the same date are pooled.
+    """
+
+    new_row = summarize_base_runs({date_str: df})
+    summary = pd.concat([summary, new_row], ignore_index=True)
+
+    if summary["date"].duplicated().any():
+        summary = summary.groupby("date", as_index=False)[SUMMARY_COLUMNS[1:]].sum()
+
+    return summary.sort_values("date", ignore_index=True)
+
+
+def _ae(sums):
+    """
+    AE from pooled sums/counts, NaN where there is no data.
+    """
+
+    pace_mean = sums["pace_sum"] / sums["pace_count"].where(sums["pace_count"] > 0)
+    hr_mean = sums["hr_sum"] / sums["hr_count"].where(sums["hr_count"] > 0)
+
+    return pace_mean / hr_mean
+
+
+def per_run_ae(summary):
+    """
+    AE of every run.
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns 'date' and 'ae'.
+    """
+
+    return pd.DataFrame({"date": summary["date"], "ae": _ae(summary)})
+
+
+def rolling_ae(summary, days=7):
+    """
+    Trailing AE over a window of calendar days, evaluated every day.
+
+    Parameters
+    ----------
+    summary: pd.DataFrame
+        Summary as returned by summarize_base_runs.
+    days: int
+        Window length in days (e.g. 7 or 28), including the current day.
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns 'date' and 'ae'. Days with no runs in the window are NaN.
+    """
+
+    if summary.empty:
+        return pd.DataFrame(columns=["date", "ae"])
+
+    daily = summary.groupby("date")[SUMMARY_COLUMNS[1:]].sum()
+    full_range = pd.date_range(daily.index.min(), daily.index.max(), freq="D")
+    daily = daily.reindex(full_range, fill_value=0)
+
+    window_sums = daily.rolling(window=days, min_periods=1).sum()
+
+    return pd.DataFrame({"date": full_range, "ae": _ae(window_sums).values})
+
+
+def weekly_ae(summary):
+    """
+    AE per ISO week, keyed by (year, week) so seasons spanning new year work.
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns 'year', 'week', 'week_start' (Monday) and 'ae'.
+    """
+
+    if summary.empty:
+        return pd.DataFrame(columns=["year", "week", "week_start", "ae"])
+
+    iso = summary["date"].dt.isocalendar()
+    weekly = (
+        summary.assign(year=iso["year"], week=iso["week"])
+        .groupby(["year", "week"], as_index=False)[SUMMARY_COLUMNS[1:]]
+        .sum()
+    )
+    weekly["week_start"] = pd.to_datetime(
+        weekly["year"].astype(str) + weekly["week"].astype(str).str.zfill(2) + "1",
+        format="%G%V%u",
+    )
+    weekly["ae"] = _ae(weekly)
+
+    return weekly[["year", "week", "week_start", "ae"]]
+
+
+def compute_ae_series(summary):
+    """
+    All AE series from a single summary.
+
+    Returns
+    -------
+    dict
+        Keys 'run', 'rolling_7d', 'rolling_28d' and 'weekly'.
+    """
+
+    return {
+        "run": per_run_ae(summary),
+        "rolling_7d": rolling_ae(summary, days=7),
+        "rolling_28d": rolling_ae(summary, days=28),
+        "weekly": weekly_ae(summary),
+    }
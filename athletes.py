@@ -0,0 +1,76 @@
+"""
+Athlete-partitioned data layout and per-athlete physiological configuration.
+
+Each athlete has a folder data/<athlete>/ holding their run CSVs (as written
+by process_fit.py --output data/<athlete>) and an optional athlete.json that
+overrides any of the DEFAULT_CONFIG values, e.g.
+
+    {"max_hr": 188, "rest_hr": 52, "hr_zones": {"z2": [135, 150], ...}}
+"""
+
+import os
+import json
+
+DATA_ROOT = "data"
+CONFIG_NAME = "athlete.json"
+
+DEFAULT_CONFIG = {
+    "max_hr": 196,
+    "rest_hr": 48,
+    "hr_zones": {
+        "z2": [141, 158],
+        "z3": [159, 168],
+        "z4": [169, 175],
+        "z5": [176, 196],
+    },
+}
+
+
+def athlete_folder(athlete, root=DATA_ROOT):
+    """
+    Folder holding an athlete's run CSVs.
+    """
+
+    return os.path.join(root, athlete)
+
+
+def list_athletes(root=DATA_ROOT):
+    """
+    Names of all athlete folders under root.
+    """
+
+    return sorted(
+        name
+        for name in os.listdir(root)
+        if os.path.isdir(os.path.join(root, name)) and not name.startswith(".")
+    )
+
+
+def load_athlete_config(athlete, root=DATA_ROOT):
+    """
+    Physiological configuration of an athlete.
+
+    Parameters
+    ----------
+    athlete: str
+        Athlete name (folder under root).
+    root: str
+        Root data folder.
+
+    Returns
+    -------
+    dict
+        DEFAULT_CONFIG updated with the athlete's athlete.json, if present.
+    """
+
+    config = dict(DEFAULT_CONFIG)
+    config["hr_zones"] = dict(DEFAULT_CONFIG["hr_zones"])
+
+    path = os.path.join(athlete_folder(athlete, root), CONFIG_NAME)
+    if os.path.exists(path):
+        with open(path) as f:
+            overrides = json.load(f)
+        config["hr_zones"].update(overrides.pop("hr_zones", {}))
+        config.update(overrides)
+
+    return config
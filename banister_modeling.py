@@ -1,53 +1,73 @@
+import os
 import math
+import argparse
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime
 
+from athletes import DEFAULT_CONFIG, athlete_folder, load_athlete_config
 from data_handling import load_runs
+from plotting import show_or_save
+from banister_state import rebuild_state, save_state
+from rollup import daily_rollup
+from run_metrics import compute_load
+
+parser = argparse.ArgumentParser(description="Banister model of the summer runs")
+parser.add_argument(
+    "--athlete",
+    default=None,
+    help="Model one athlete: reads data/<athlete>/ with their max/rest HR and "
+    "writes to <output>/<athlete>/ (default: ./data and the current folder)",
+)
+parser.add_argument(
+    "--output", default="output", help="Output root for --athlete (default: ./output)"
+)
+args = parser.parse_args()
+if args.athlete:
+    config = load_athlete_config(args.athlete)
+    folder = athlete_folder(args.athlete)
+    out = os.path.join(args.output, args.athlete)
+    os.makedirs(out, exist_ok=True)
+else:
+    config, folder, out = DEFAULT_CONFIG, "data", "."
 
 run_types = ["z2", "vo2", "sprint", "threshold", "trail"]
 all_runs = {}
 for run_type in run_types:
-    runs = load_runs(start_date="20250602", end_date="20250817", type=run_type)
+    runs = load_runs(
+        start_date="20250602", end_date="20250817", type=run_type, folder=folder
+    )
     all_runs[run_type] = runs
 
-max_hr = 196
-rest_hr = 48
-trimp = {}
-all_dates = []
-
+rows = []
 for run_type, runs_dict in all_runs.items():
-    trimp[run_type] = pd.DataFrame(columns=["date", "trimp"])
     for date_str, df in runs_dict.items():
-        day = datetime.strptime(date_str, "%Y%m%d")
-        all_dates.append(day)
-        df["time_diff"] = df["timestamp"].diff()
-        df["duration"] = df["time_diff"].dt.total_seconds() / 60
-        df["duration"] = df["duration"].fillna(0)
-        duration_df = df.groupby("hr")["duration"].sum().reset_index()
-
-        load = 0
-        for i, row in duration_df.iterrows():
-            hr_reserve = (row["hr"] - rest_hr) / (max_hr - rest_hr)
-            exponent = hr_reserve * 1.67
-            load += row["duration"] * hr_reserve * 0.64 * math.exp(exponent)
-
-        trimp[run_type] = pd.concat(
-            [trimp[run_type], pd.DataFrame({"date": [day], "trimp": [load]})],
-            ignore_index=True,
+        if "time_diff" not in df:
+            df["time_diff"] = df["timestamp"].diff().dt.total_seconds()
+        rows.append(
+            {
+                "date": datetime.strptime(date_str, "%Y%m%d"),
+                "type": run_type,
+                "trimp": compute_load(df, config["max_hr"], config["rest_hr"]),
+            }
         )
+run_trimp = pd.DataFrame(rows, columns=["date", "type", "trimp"])
 
-# Add in TRIMP for no run days
-min_date = min(all_dates)
-max_date = max(all_dates)
-date_range = pd.date_range(start=min_date, end=max_date, freq="D")
-no_run_dates = [date for date in date_range if date not in all_dates]
-trimp["none"] = pd.DataFrame({"date": no_run_dates, "trimp": [0] * len(no_run_dates)})
+# Daily TRIMP, with zero TRIMP on no run days
+trimp_df = daily_rollup(run_trimp, {"trimp": ("trimp", "sum")})
+date_range = pd.date_range(
+    start=trimp_df["date"].min(), end=trimp_df["date"].max(), freq="D"
+)
+trimp_df = (
+    trimp_df.set_index("date")
+    .reindex(date_range, fill_value=0)
+    .rename_axis("date")
+    .reset_index()
+)
 
-# Compute performance using Banister Model
-trimp_df = pd.concat(list(trimp.values()))
-trimp_df = trimp_df.sort_values(by="date")
+trimp = {run_type: group for run_type, group in run_trimp.groupby("type", sort=False)}
+trimp["none"] = trimp_df[~trimp_df["date"].isin(run_trimp["date"])]
 
 
 def compute_fitness_and_fatigue(fitness_tau=42, fatigue_tau=7):
@@ -122,9 +142,16 @@ for ax in axes:
     ax.tick_params(axis="x", rotation=45)
 
 plt.tight_layout()
-plt.show()
+show_or_save(fig, os.path.join(out, "banister.png"))
 
 load_df = pd.DataFrame(
     {"Date": trimp_df["date"], "Chronic Load": fitness, "Acute Load": fatigue}
 )
-load_df.to_csv("load.csv", index=False)
+load_df.to_csv(os.path.join(out, "load.csv"), index=False)
+
+# Persist the model state so daily loads can be added with banister_state.py
+runs = [
+    f"{date:%Y%m%d}_{run_type}" for date, run_type in run_trimp[["date", "type"]].values
+]
+state = rebuild_state(trimp_df.set_index("date")["trimp"], runs)
+save_state(state, os.path.join(out, "banister_state.json"))
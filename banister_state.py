@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+"""
+Persistent Banister model state with constant-time daily updates.
+
+The state holds the model parameters, the last date with a load, the
+fitness/fatigue accumulators on that date (including that day's TRIMP) and
+the names of the runs already counted, so a run is never added twice. A new
+day's load decays the accumulators across the gap and adds the TRIMP, so a
+daily dashboard never has to replay the whole history. A full rebuild is only
+needed when the parameters or historical runs change.
+
+Loads are reported as in banister_modeling.py: fitness and fatigue on a day
+count the TRIMP of all previous days.
+"""
+
+import os
+import json
+import math
+import argparse
+import pandas as pd
+
+DEFAULT_PARAMS = {
+    "fitness_tau": 42,
+    "fatigue_tau": 7,
+    "k1": 1.0,
+    "k2": 2.0,
+    "initial_performance": 0,
+}
+
+
+def new_state(**params):
+    """
+    Empty state with DEFAULT_PARAMS updated by params.
+    """
+
+    unknown = set(params) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown Banister parameters: {', '.join(sorted(unknown))}")
+
+    return {
+        "params": {**DEFAULT_PARAMS, **params},
+        "last_date": None,
+        "fitness": 0.0,
+        "fatigue": 0.0,
+        "runs": [],
+    }
+
+
+def params_changed(state, **params):
+    """
+    True if the state was built with different parameters (needs a rebuild).
+    """
+
+    return state["params"] != {**DEFAULT_PARAMS, **params}
+
+
+def update_state(state, date, trimp, run=None):
+    """
+    Adds one day's TRIMP to the state in constant time.
+
+    Parameters
+    ----------
+    state: dict
+        State from new_state, load_state or rebuild_state. Updated in place.
+    date: str or datetime
+        Date of the load ('yyyymmdd' or anything pd.Timestamp accepts). Must
+        not be before the state's last date; several loads on the same date
+        add up.
+    trimp: float
+        Training load of the day.
+    run: str, optional
+        Name of the run the load comes from ('yyyymmdd_type'). It is
+        recorded in the state, and a run already in it is rejected.
+
+    Returns
+    -------
+    dict
+        The updated state.
+    """
+
+    day = _day(date)
+    runs = state.setdefault("runs", [])
+    if run is not None and run in runs:
+        raise ValueError(f"Run {run} is already in the state")
+
+    if state["last_date"] is not None:
+        gap = (day - _day(state["last_date"])).days
+        if gap < 0:
+            raise ValueError(
+                f"Load on {day.date()} is before the last date in the state "
+                f"({state['last_date']}), rebuild the state instead"
+            )
+        state["fitness"] *= math.exp(-gap / state["params"]["fitness_tau"])
+        state["fatigue"] *= math.exp(-gap / state["params"]["fatigue_tau"])
+
+    state["fitness"] += trimp
+    state["fatigue"] += trimp
+    state["last_date"] = day.strftime("%Y-%m-%d")
+    if run is not None:
+        runs.append(run)
+
+    return state
+
+
+def rebuild_state(daily_trimp, runs=None, **params):
+    """
+    Builds a state from the full TRIMP history.
+
+    Parameters
+    ----------
+    daily_trimp: pd.Series
+        TRIMP indexed by date. Rest days may be omitted.
+    runs: list, optional
+        Names of the runs in the history, recorded so that adding one of
+        them again is rejected.
+    params:
+        Banister parameters overriding DEFAULT_PARAMS.
+
+    Returns
+    -------
+    dict
+        State after the last date in daily_trimp.
+    """
+
+    state = new_state(**params)
+    for date, trimp in daily_trimp.sort_index().items():
+        update_state(state, date, trimp)
+    state["runs"] = sorted(runs or [])
+
+    return state
+
+
+def current_load(state, date=None):
+    """
+    Fitness, fatigue and performance on a date after the state's last date.
+
+    Parameters
+    ----------
+    state: dict
+        Banister state.
+    date: str or datetime, optional
+        Day to evaluate. Defaults to the day after the last date.
+
+    Returns
+    -------
+    dict
+        Keys 'date', 'fitness', 'fatigue' and 'performance'.
+    """
+
+    if state["last_date"] is None:
+        raise ValueError("State has no loads yet")
+
+    last = _day(state["last_date"])
+    day = _day(date) if date is not None else last + pd.Timedelta(days=1)
+    gap = (day - last).days
+    if gap < 1:
+        raise ValueError(f"Date must be after {state['last_date']}")
+
+    params = state["params"]
+    fitness = state["fitness"] * math.exp(-gap / params["fitness_tau"])
+    fatigue = state["fatigue"] * math.exp(-gap / params["fatigue_tau"])
+
+    return {
+        "date": day.strftime("%Y-%m-%d"),
+        "fitness": fitness,
+        "fatigue": fatigue,
+        "performance": params["initial_performance"]
+        + params["k1"] * fitness
+        - params["k2"] * fatigue,
+    }
+
+
+def save_state(state, path="banister_state.json"):
+    with open(path, "w") as f:
+        json.dump(state, f, indent=2)
+
+
+def load_state(path="banister_state.json"):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _day(date):
+    if isinstance(date, str) and len(date) == 8 and date.isdigit():
+        return pd.to_datetime(date, format="%Y%m%d")
+
+    return pd.Timestamp(date).normalize()
+
+
+def main():
+    """Main CLI function."""
+    parser = argparse.ArgumentParser(
+        description="Add a day's training load to the persisted Banister state",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+            Examples:
+            python banister_state.py --run ./data/20250818_z2.csv
+            python banister_state.py --date 20250818 --trimp 85.3
+            python banister_state.py
+            """,
+    )
+    parser.add_argument(
+        "--state",
+        default="banister_state.json",
+        help="State file written by banister_modeling.py",
+    )
+    parser.add_argument("--run", help="Run CSV to compute the TRIMP from")
+    parser.add_argument("--date", help="Date of the load (yyyymmdd)")
+    parser.add_argument("--trimp", type=float, help="TRIMP of the day")
+    parser.add_argument(
+        "--athlete", help="Athlete whose max/rest HR to use for --run (athletes.py)"
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(args.state):
+        print(f"Error: State file '{args.state}' not found")
+        print("Run banister_modeling.py to build it")
+        return 1
+    state = load_state(args.state)
+
+    if args.run and not os.path.exists(args.run):
+        print(f"Error: File '{args.run}' not found")
+        return 1
+
+    if args.run:
+        from athletes import DEFAULT_CONFIG, load_athlete_config
+        from run_metrics import compute_load
+
+        config = load_athlete_config(args.athlete) if args.athlete else DEFAULT_CONFIG
+        df = pd.read_csv(args.run)
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        if "time_diff" not in df:
+            df["time_diff"] = df["timestamp"].diff().dt.total_seconds()
+        trimp = compute_load(df, config["max_hr"], config["rest_hr"])
+        run = os.path.splitext(os.path.basename(args.run))[0]
+        date = args.date or run.split("_")[0]
+    elif args.trimp is not None:
+        if not args.date:
+            print("Error: --trimp requires --date")
+            return 1
+        trimp, date, run = args.trimp, args.date, None
+    else:
+        trimp, date, run = None, None, None
+
+    if trimp is not None:
+        try:
+            update_state(state, date, trimp, run)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 1
+        save_state(state, args.state)
+        print(f"Added TRIMP {trimp:.1f} on {state['last_date']}")
+
+    try:
+        load = current_load(state)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    print(
+        f"{load['date']}: fitness {load['fitness']:.1f}, "
+        f"fatigue {load['fatigue']:.1f}, performance {load['performance']:.1f}"
+    )
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -1,91 +1,83 @@
 """
 Analysis of zone 2/base runs.
+
+All windows are summarized in one streaming pass over the runs (see
+streaming.py), so memory does not grow with the length of the windows.
 """
 
-from data_handling import load_runs, add_elapsed_time, clean_base_runs
+from streaming import accumulate_windows
+from plotting import draw_cloud
 import pandas as pd
 import matplotlib.pyplot as plt
 from datetime import datetime
 
+# Reference clouds and weekly clouds are histograms on the shared axes
+plot_mode = "hist2d"  # 'hist2d' or 'hexbin' when streaming
+plot_extent = (115, 175, 8, 11.5)
+
+windows = {
+    "baseline": ("2025051", "20250515"),  # Pre heat exposure
+    "winter_peak": ("20250202", "20250208"),  # Pre injury
+}
+
+# With heat exposure, one window per week (Monday to Sunday)
+heat_start, heat_end = "20250602", "20250720"  # end_date="20250629"
+week_starts = pd.date_range(heat_start, heat_end, freq="W-MON")
+for week_start in week_starts:
+    week_end = min(week_start + pd.Timedelta(days=6), pd.Timestamp(heat_end))
+    windows[week_start.strftime("%Y%m%d")] = (
+        week_start.strftime("%Y%m%d"),
+        week_end.strftime("%Y%m%d"),
+    )
 
-# Pre heat exposure
-baseline_runs = load_runs(start_date="2025051", end_date="20250515", type="base")
-
-baseline = []
-for df in baseline_runs.values():
-    df = add_elapsed_time(df)
-    df = clean_base_runs(df)
-
-    baseline.append(df)
-
-baseline_df = pd.concat(baseline)
-baseline_df = baseline_df.sort_values(by="timestamp")
-
-# Pre injury
-winter_peak_runs = load_runs(start_date="20250202", end_date="20250208", type="base")
-
-winter_peak = []
-for df in winter_peak_runs.values():
-    df = add_elapsed_time(df)
-    df = clean_base_runs(df)
-
-    winter_peak.append(df)
-
-winter_peak_df = pd.concat(winter_peak)
-winter_peal_df = winter_peak_df.sort_values(by="timestamp")
-
-# With heat exposure
-base_runs = load_runs(
-    start_date="20250602", end_date="20250720", type="base"
-)  # end_date="20250629"
-
-all_runs = []
-for date_str, df in base_runs.items():
-    df = add_elapsed_time(df)
-    df = clean_base_runs(df)
-
-    all_runs.append(df.copy())
-
-runs_df = pd.concat(all_runs)
-runs_df = runs_df.sort_values(by="timestamp")
+accumulators = accumulate_windows(
+    windows, type="base", mode=plot_mode, extent=plot_extent
+)
+baseline = accumulators.pop("baseline")
+winter_peak = accumulators.pop("winter_peak")
+heat_weeks = {
+    week: accumulator for week, accumulator in accumulators.items() if accumulator.runs
+}
 
 ### Aerobic Efficiency ###
 
-# Group data by week (Monday=0)
-runs_df["week"] = runs_df["timestamp"].dt.isocalendar().week
-weekly_ae = []
-weekly_ae.append(winter_peak_df["pace"].mean() / winter_peak_df["hr"].mean())
-weekly_ae.append(baseline_df["pace"].mean() / baseline_df["hr"].mean())
+heat_weekly_ae = pd.DataFrame(
+    {
+        "week_start": pd.to_datetime(list(heat_weeks), format="%Y%m%d"),
+        "ae": [accumulator.ae for accumulator in heat_weeks.values()],
+    }
+)
 
 colors = ["red", "orange", "yellow", "green", "blue", "indigo", "violet"]
 fig, axes = plt.subplots(ncols=7, sharey=True, figsize=(16, 4), dpi=300)
 
+winter_peak_cloud = winter_peak.cloud()
+baseline_cloud = baseline.cloud()
+
 all_handles = []
 all_labels = []
 
-for i, (week, group) in enumerate(runs_df.groupby("week")):
-    weekly_ae.append(group["pace"].mean() / group["hr"].mean())
-
-    h1 = axes[i].scatter(
-        winter_peak_df["hr"],
-        winter_peak_df["pace"],
+for i, week in enumerate(heat_weeks.values()):
+    h1 = draw_cloud(
+        axes[i],
+        winter_peak_cloud,
         label="Winter Peak (no heat)",
         color="gray",
         marker="s",
         alpha=0.7,
     )
-    h2 = axes[i].scatter(
-        baseline_df["hr"],
-        baseline_df["pace"],
+    h2 = draw_cloud(
+        axes[i],
+        baseline_cloud,
         label="Baseline (no heat)",
         color="lightgray",
         marker="^",
         alpha=0.7,
     )
     axes[i].set_title(f"Week {i + 1}")
-    h3 = axes[i].scatter(
-        group["hr"],
-        group["pace"],
+    h3 = draw_cloud(
+        axes[i],
+        week.cloud(),
         label=f"Week {i + 1} (w/ heat)",
         color=colors[i],
         alpha=0.7,
@@ -118,34 +110,27 @@ exit()
 plt.show()
 
 # Plot weekly avg
-weeks = [
-    datetime(2025, 2, 2),
-    datetime(2025, 5, 11),
-    datetime(2025, 6, 2),
-    datetime(2025, 6, 9),
-    datetime(2025, 6, 16),
-    datetime(2025, 6, 23),
-    datetime(2025, 6, 30),
-    datetime(2025, 7, 7),
-    datetime(2025, 7, 14),
-]
-
 fig, ax1 = plt.subplots(figsize=(6, 3))
 ax1.scatter(
     datetime(2025, 2, 2),
-    winter_peak_df["pace"].mean() / winter_peak_df["hr"].mean(),
+    winter_peak.ae,
     color="gray",
     marker="s",
     label="Winter Peak (before heat)",
 )
 ax1.scatter(
     datetime(2025, 5, 11),
-    baseline_df["pace"].mean() / baseline_df["hr"].mean(),
+    baseline.ae,
     color="lightgray",
     marker="^",
     label="Baseline (before heat)",
 )
-ax1.scatter(weeks[2:], weekly_ae[2:], color="coral", label="Training (with heat)")
+ax1.scatter(
+    heat_weekly_ae["week_start"],
+    heat_weekly_ae["ae"],
+    color="coral",
+    label="Training (with heat)",
+)
 ax1.set_ylabel("AE (pace/HR)")
 
 plt.title("Aerobic Efficiency")
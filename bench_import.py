@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+"""
+Cold-start benchmark of the process_fit CLI.
+
+Each measurement starts a fresh interpreter, so the numbers include module
+imports exactly as a cron job or the ingest daemon's workers pay them:
+
+- `python -X importtime -c "import process_fit"`, reporting the slowest
+  top-level imports;
+- `python process_fit.py --help`, the bare CLI start-up;
+- optionally, a full unfiltered conversion of a .fit file (--fit).
+
+    python bench_import.py --fit ./raw_data/activity.fit
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def import_times(module="process_fit"):
+    """
+    Cumulative import time of every module imported by module.
+
+    Returns
+    -------
+    list
+        (cumulative seconds, nesting level, module name), slowest first.
+    """
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=HERE,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        level = (len(name) - len(name.lstrip())) // 2
+        times.append((int(cumulative) / 1e6, level, name.strip()))
+
+    return sorted(times, reverse=True)
+
+
+def wall_times(command, repeat=5):
+    """
+    Wall-clock seconds of repeated runs of command in fresh processes.
+    """
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=HERE, capture_output=True, check=True)
+        times.append(time.perf_counter() - start)
+
+    return times
+
+
+def _report(label, times):
+    print(
+        f"{label:<28} median {statistics.median(times) * 1000:7.0f} ms  "
+        f"min {min(times) * 1000:7.0f} ms  ({len(times)} runs)"
+    )
+
+
+def main():
+    """Main CLI function."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the cold start of process_fit.py"
+    )
+    parser.add_argument("--fit", help="Optional .fit file to time a full conversion")
+    parser.add_argument(
+        "--decoder",
+        choices=["fitdecode", "native"],
+        default="native",
+        help="Decoder for the --fit conversion (default: native)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Runs per measurement (default: 5)"
+    )
+    parser.add_argument(
+        "--top", type=int, default=10, help="Slowest imports to list (default: 10)"
+    )
+    args = parser.parse_args()
+
+    times = import_times()
+    print(f"import process_fit: {times[0][0] * 1000:.0f} ms")
+    print("Slowest top-level imports:")
+    for cumulative, level, name in [t for t in times if t[1] == 1][: args.top]:
+        print(f"  {cumulative * 1000:7.1f} ms  {name}")
+    print()
+
+    script = os.path.join(HERE, "process_fit.py")
+    _report("process_fit.py --help", wall_times([sys.executable, script, "--help"]))
+
+    if args.fit:
+        with tempfile.TemporaryDirectory() as output:
+            command = [
+                sys.executable,
+                script,
+                os.path.abspath(args.fit),
+                "--decoder",
+                args.decoder,
+                "--output",
+                output,
+            ]
+            _report(f"convert ({args.decoder})", wall_times(command, args.repeat))
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+"""
+Benchmarks of the GPS segment index and the ridge feature-subset search on
+synthetic data, so their timings can be reproduced without private runs.
+
+- gps: writes --runs tracks of --points samples each (random laps around a
+  few shared loops), then times GpsIndex.update from scratch, reports the
+  index size on disk and times find_traversals on a short segment.
+- ridge: builds a --weeks x 15 weekly table with a linear pace signal and
+  times exhaustive_search over every subset at three alphas on one core.
+
+    python bench_indexes.py --runs 2000 --points 5000
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import statistics
+import numpy as np
+import pandas as pd
+
+from gps_store import INDEX_DIR, GpsIndex, find_traversals, save_track
+from ridge_subsets import ALPHAS, FEATURES, exhaustive_search
+
+ORIGIN = (39.99, -105.27)
+LOOPS = 5
+
+
+def synthetic_track(rng, points):
+    """
+    Laps of one of LOOPS circular loops (about 1.6 km around) with GPS noise.
+    """
+
+    loop = rng.integers(LOOPS)
+    center_lat = ORIGIN[0] + 0.01 * loop
+    angle = rng.uniform(0, 2 * np.pi) + np.cumsum(rng.uniform(0.008, 0.012, points))
+    lat = center_lat + 0.0023 * np.sin(angle) + rng.normal(0, 2e-5, points)
+    lon = ORIGIN[1] + 0.003 * np.cos(angle) + rng.normal(0, 2e-5, points)
+
+    return lat, lon
+
+
+def bench_gps(runs, points, repeat, seed=0):
+    rng = np.random.default_rng(seed)
+    with tempfile.TemporaryDirectory() as folder:
+        for i in range(runs):
+            day = pd.Timestamp("20200101") + pd.Timedelta(days=i)
+            path = os.path.join(folder, f"{day:%Y%m%d}_base.npz")
+            save_track(path, *synthetic_track(rng, points))
+
+        start = time.perf_counter()
+        index = GpsIndex(folder)
+        index.update()
+        build = time.perf_counter() - start
+
+        index_dir = os.path.join(folder, INDEX_DIR)
+        size = sum(
+            os.path.getsize(os.path.join(index_dir, f)) for f in os.listdir(index_dir)
+        )
+        print(
+            f"GPS index: {runs} runs, {len(index.cells)} points, "
+            f"built in {build:.2f} s, {size / 1e6:.0f} MB"
+        )
+
+        index = GpsIndex(folder)
+        segment = [
+            (ORIGIN[0] + 0.0023 * np.sin(a), ORIGIN[1] + 0.003 * np.cos(a))
+            for a in [0.0, 0.3, 0.6]
+        ]
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            traversals = find_traversals(index, segment)
+            times.append(time.perf_counter() - start)
+        print(
+            f"Segment match: {len(traversals)} traversals, median "
+            f"{statistics.median(times) * 1000:.0f} ms ({repeat} runs)"
+        )
+
+
+def bench_ridge(weeks, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(weeks, len(FEATURES))), columns=FEATURES)
+    df["pace"] = df.to_numpy() @ rng.normal(0, 0.3, len(FEATURES)) + rng.normal(
+        0, 0.1, weeks
+    )
+
+    start = time.perf_counter()
+    table = exhaustive_search(df, FEATURES, ALPHAS, workers=1)
+    elapsed = time.perf_counter() - start
+    print(
+        f"Ridge subsets: {len(table)} fits ({len(FEATURES)} features, "
+        f"{len(ALPHAS)} alphas, {weeks} weeks) in {elapsed:.2f} s on one core"
+    )
+
+
+def main():
+    """Main CLI function."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the GPS index and the ridge subset search"
+    )
+    parser.add_argument(
+        "--only", choices=["gps", "ridge"], default=None, help="Run one benchmark"
+    )
+    parser.add_argument(
+        "--runs", type=int, default=2000, help="GPS tracks (default: 2000)"
+    )
+    parser.add_argument(
+        "--points", type=int, default=5000, help="Points per track (default: 5000)"
+    )
+    parser.add_argument(
+        "--weeks", type=int, default=30, help="Weeks of the ridge table (default: 30)"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Segment matches timed (default: 5)"
+    )
+    args = parser.parse_args()
+
+    if args.only in [None, "gps"]:
+        bench_gps(args.runs, args.points, args.repeat)
+    if args.only in [None, "ridge"]:
+        bench_ridge(args.weeks)
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
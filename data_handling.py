@@ -3,31 +3,26 @@ Functions or loading and handling running data processed using process_fit.py
 """
 
 import os
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
+CLEANING_FLAGS = ["warmup", "zero_pace", "slow_pace"]
 
-def load_runs(start_date=None, end_date=None, type=None):
+
+def list_runs(start_date=None, end_date=None, type=None, folder="data"):
     """
-    Loads running data from the 'data' folder.
+    Lists the run files in folder matching the filters, without reading them.
 
-    Parameters
-    ----------
-    start_date: str, optional
-        Start date in 'yyyymmdd' format. Only loads runs on or after this date.
-    end_date: str, optional
-        End date in 'yyyymmdd' format. Only loads runs on or before this date.
-    type: str, optional
-        Type of run (e.g., 'base', 'sprint'). Only loads runs with that flag.
+    Parameters are as for load_runs.
 
     Returns
     -------
-    dict
-        Dictionary of runs wehre keys are filenames and values are DataFrames.
+    list
+        (date_str, filepath) of every matching run, in directory order.
     """
 
-    runs = {}
-    folder = "data"
+    files = []
 
     if start_date:
         start_dt = datetime.strptime(start_date, "%Y%m%d")
@@ -35,6 +30,9 @@ def load_runs(start_date=None, end_date=None, type=None):
         end_dt = datetime.strptime(end_date, "%Y%m%d")
 
     for filename in os.listdir(folder):
+        if not filename.endswith(".csv"):
+            continue
+
         parts = filename.split("_")
         date_str = parts[0]
         if type or start_date or end_date:
@@ -49,21 +47,72 @@ def load_runs(start_date=None, end_date=None, type=None):
             if end_date and file_dt > end_dt:
                 continue
 
-        filepath = os.path.join(folder, filename)
-        df = pd.read_csv(filepath)
-        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        files.append((date_str, os.path.join(folder, filename)))
 
-        runs[date_str] = df
+    return files
 
-    return runs
+
+def read_run(filepath):
+    """
+    Reads one run CSV written by process_fit.py.
+    """
+
+    df = pd.read_csv(filepath)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+
+    return df
+
+
+def iter_runs(start_date=None, end_date=None, type=None, folder="data"):
+    """
+    Yields (date_str, DataFrame) one run at a time, so only one run is held
+    in memory. Parameters are as for load_runs.
+    """
+
+    for date_str, filepath in list_runs(start_date, end_date, type, folder):
+        yield date_str, read_run(filepath)
+
+
+def load_runs(start_date=None, end_date=None, type=None, folder="data"):
+    """
+    Loads running data from the 'data' folder.
+
+    Parameters
+    ----------
+    start_date: str, optional
+        Start date in 'yyyymmdd' format. Only loads runs on or after this date.
+    end_date: str, optional
+        End date in 'yyyymmdd' format. Only loads runs on or before this date.
+    type: str, optional
+        Type of run (e.g., 'base', 'sprint'). Only loads runs with that flag.
+    folder: str, optional
+        Folder to load from, e.g. athletes.athlete_folder(name) for one athlete.
+
+    Returns
+    -------
+    dict
+        Dictionary of runs wehre keys are filenames and values are DataFrames.
+    """
+
+    return dict(iter_runs(start_date, end_date, type, folder))
 
 
 def add_elapsed_time(df):
     """
     Adds 'elapsed_time' col to df
+
+    Reuses the 'elapsed_time' seconds stored by process_fit --derived when
+    present instead of recomputing it from the timestamps.
     """
 
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    if "elapsed_time" in df and pd.api.types.is_numeric_dtype(df["elapsed_time"]):
+        df["elapsed_time"] = pd.to_timedelta(df["elapsed_time"], unit="s")
+        return df
+    if "elapsed_time" in df and pd.api.types.is_timedelta64_dtype(df["elapsed_time"]):
+        return df
+
+    if not pd.api.types.is_datetime64_any_dtype(df["timestamp"]):
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
 
     start_time = df["timestamp"].iloc[0]
 
@@ -74,15 +123,74 @@ def add_elapsed_time(df):
     return df
 
 
+def time_diffs(timestamps):
+    """
+    Seconds since the previous sample of every sample, as
+    df["timestamp"].diff().dt.total_seconds().fillna(0): 0 for the first
+    sample and for the gaps before and after a missing (NaT) timestamp.
+
+    Parameters
+    ----------
+    timestamps: array-like
+        Timestamps of one run, naive or tz-aware.
+
+    Returns
+    -------
+    np.ndarray
+        Float seconds, one per sample.
+    """
+
+    timestamps = pd.Series(pd.to_datetime(pd.Series(timestamps)))
+
+    return timestamps.diff().dt.total_seconds().fillna(0).to_numpy(dtype=float)
+
+
 def clean_base_runs(df):
     """
     Performs basic QC/cleaning on base runs data, including
     - Removing first 5 min of data
     - Nan'ing data where pace = 0
+    - Nan'ing data where pace > 11
+
+    Uses the cleaning flags stored by process_fit --derived when present.
     """
 
+    if all(flag in df for flag in CLEANING_FLAGS):
+        df = df[~df["warmup"]]
+        df.loc[df["zero_pace"] | df["slow_pace"], ["pace", "hr"]] = pd.NA
+
+        return df
+
     df = df[df["elapsed_time"] > pd.Timedelta(minutes=5)]
     df.loc[df["pace"] == 0.0, ["pace", "hr"]] = pd.NA
     df.loc[df["pace"] > 11.0, ["pace", "hr"]] = pd.NA
 
     return df
+
+
+def add_derived_channels(df):
+    """
+    Adds the derived channels and cleaning flags the analysis scripts use, so
+    they can be computed once at ingest (process_fit --derived).
+
+    Adds
+    - 'elapsed_time': seconds since the first sample
+    - 'time_diff': seconds since the previous sample (NaN for the first)
+    - 'mile_group': completed miles (floor of distance)
+    - 'elevation_diff': change in elevation since the previous sample (ft)
+    - 'warmup', 'zero_pace', 'slow_pace': clean_base_runs flags for samples in
+      the first 5 min, with pace = 0 and with pace > 11
+    """
+
+    timestamps = pd.to_datetime(df["timestamp"])
+    elapsed_seconds = (timestamps - timestamps.iloc[0]).dt.total_seconds()
+
+    df["elapsed_time"] = elapsed_seconds
+    df["time_diff"] = timestamps.diff().dt.total_seconds()
+    df["mile_group"] = np.floor(df["distance"]).astype(int)
+    df["elevation_diff"] = df["elevation"].diff()
+    df["warmup"] = elapsed_seconds <= 5 * 60
+    df["zero_pace"] = df["pace"] == 0.0
+    df["slow_pace"] = df["pace"] > 11.0
+
+    return df
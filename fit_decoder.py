@@ -0,0 +1,339 @@
+#!/usr/bin/env python
+"""
+Lightweight native decoder for the 'record' messages of running .fit files.
+
+The file is scanned once to find the definition and data messages; the data
+messages of each record definition are then decoded in one go with a NumPy
+structured dtype built from the definition, instead of building Python frame
+and field objects per message as fitdecode does. Only the fields process_fit
+needs are extracted.
+
+Files using features the decoder does not handle (compressed timestamp
+headers, chained files, unexpected field types) raise UnsupportedFitError and
+read_records falls back to fitdecode. Run
+
+    python fit_decoder.py ./raw_data
+
+to check the decoder field by field against fitdecode on a folder of files.
+"""
+
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+RECORD_MESG_NUM = 20
+FIT_EPOCH_S = 631065600  # 1989-12-31 00:00:00 UTC
+
+# fitdecode field name -> (field number, scale, offset), in order of preference
+RECORD_FIELDS = {
+    "timestamp": [(253, 1, 0)],
+    "position_lat": [(0, 1, 0)],
+    "position_long": [(1, 1, 0)],
+    "enhanced_speed": [(73, 1000, 0), (6, 1000, 0)],
+    "heart_rate": [(3, 1, 0)],
+    "distance": [(5, 100, 0)],
+    "enhanced_altitude": [(78, 5, 500), (2, 5, 500)],
+}
+
+# base type number -> (numpy type, invalid value)
+BASE_TYPES = {
+    0x00: ("u1", 0xFF),  # enum
+    0x01: ("i1", 0x7F),
+    0x02: ("u1", 0xFF),
+    0x83: ("i2", 0x7FFF),
+    0x84: ("u2", 0xFFFF),
+    0x85: ("i4", 0x7FFFFFFF),
+    0x86: ("u4", 0xFFFFFFFF),
+    0x0A: ("u1", 0x00),  # uint8z
+    0x8B: ("u2", 0x0000),  # uint16z
+    0x8C: ("u4", 0x00000000),  # uint32z
+}
+
+
+class UnsupportedFitError(Exception):
+    """Raised for files the native decoder does not handle."""
+
+
+def _record_dtype(fields, endian, size):
+    """
+    Structured dtype picking the wanted fields out of one record definition.
+
+    Returns
+    -------
+    tuple
+        (dtype, {name: (scale, offset, invalid)}) for the fields present.
+    """
+
+    positions = {}
+    offset = 0
+    for number, field_size, base_type in fields:
+        positions[number] = (offset, field_size, base_type)
+        offset += field_size
+
+    names, formats, offsets, scaling = [], [], [], {}
+    for name, candidates in RECORD_FIELDS.items():
+        for number, scale, value_offset in candidates:
+            if number not in positions:
+                continue
+            field_offset, field_size, base_type = positions[number]
+            if base_type not in BASE_TYPES:
+                raise UnsupportedFitError(f"Unsupported base type for field {number}")
+            code, invalid = BASE_TYPES[base_type]
+            if np.dtype(code).itemsize != field_size:
+                raise UnsupportedFitError(f"Unexpected size for field {number}")
+
+            names.append(name)
+            formats.append(endian + code)
+            offsets.append(field_offset)
+            scaling[name] = (scale, value_offset, invalid)
+            break
+
+    dtype = np.dtype(
+        {"names": names, "formats": formats, "offsets": offsets, "itemsize": size}
+    )
+
+    return dtype, scaling
+
+
+def read_records_native(fit_file_path):
+    """
+    Decodes the record messages of a .fit file straight from its bytes.
+
+    Returns
+    -------
+    dict
+        Field name (as in fitdecode) -> np.ndarray, for records defining all
+        RECORD_FIELDS. Timestamps are datetime64[s] (UTC, NaT if invalid),
+        other invalid values NaN and values scaled to fitdecode units.
+    """
+
+    with open(fit_file_path, "rb") as f:
+        buf = f.read()
+
+    if len(buf) < 12 or buf[0] not in (12, 14) or buf[8:12] != b".FIT":
+        raise UnsupportedFitError("Not a FIT file")
+    header_size = buf[0]
+    end = header_size + int.from_bytes(buf[4:8], "little")
+    if len(buf) > end + 2:
+        raise UnsupportedFitError("Chained FIT files")
+
+    local_defs = {}  # local message type -> (message size, definition id)
+    record_defs = []  # definition id -> (dtype, scaling) or None
+    record_offsets = {}  # definition id -> offsets of its data messages
+
+    pos = header_size
+    try:
+        while pos < end:
+            header = buf[pos]
+            pos += 1
+            if header & 0x80:
+                raise UnsupportedFitError("Compressed timestamp headers")
+            local = header & 0x0F
+
+            if header & 0x40:
+                big_endian = buf[pos + 1] == 1
+                global_num = int.from_bytes(
+                    buf[pos + 2 : pos + 4], "big" if big_endian else "little"
+                )
+                n_fields = buf[pos + 4]
+                pos += 5
+                fields = [
+                    (buf[p], buf[p + 1], buf[p + 2])
+                    for p in range(pos, pos + 3 * n_fields, 3)
+                ]
+                pos += 3 * n_fields
+                size = sum(field[1] for field in fields)
+
+                if header & 0x20:  # developer fields, skipped
+                    n_dev = buf[pos]
+                    size += sum(buf[pos + 2 + 3 * i] for i in range(n_dev))
+                    pos += 1 + 3 * n_dev
+
+                if global_num == RECORD_MESG_NUM:
+                    endian = ">" if big_endian else "<"
+                    record_defs.append(_record_dtype(fields, endian, size))
+                else:
+                    record_defs.append(None)
+                local_defs[local] = (size, len(record_defs) - 1)
+            else:
+                size, def_id = local_defs[local]
+                if record_defs[def_id] is not None:
+                    record_offsets.setdefault(def_id, []).append(pos)
+                pos += size
+    except (IndexError, KeyError):
+        raise UnsupportedFitError("Truncated or malformed FIT file")
+
+    chunks = []
+    for def_id, offsets in record_offsets.items():
+        dtype, scaling = record_defs[def_id]
+        if len(scaling) < len(RECORD_FIELDS):
+            continue  # definition lacks fields, process_fit skips these records
+
+        raw = b"".join(buf[o : o + dtype.itemsize] for o in offsets)
+        messages = np.frombuffer(raw, dtype=dtype)
+
+        columns = {"_offset": np.asarray(offsets)}
+        for name, (scale, value_offset, invalid) in scaling.items():
+            values = messages[name].astype(float)
+            values[messages[name] == invalid] = np.nan
+            if scale != 1 or value_offset != 0:
+                values = values / scale - value_offset
+            columns[name] = values
+        chunks.append(columns)
+
+    if not chunks:
+        records = {name: np.empty(0) for name in RECORD_FIELDS}
+        records["timestamp"] = np.empty(0, dtype="datetime64[s]")
+        return records
+
+    order = np.argsort(np.concatenate([c["_offset"] for c in chunks]), kind="stable")
+    records = {
+        name: np.concatenate([c[name] for c in chunks])[order] for name in RECORD_FIELDS
+    }
+    # Records with an invalid timestamp are kept with NaT, as fitdecode does
+    seconds = records["timestamp"]
+    valid_time = ~np.isnan(seconds)
+    records["timestamp"] = np.full(len(seconds), np.datetime64("NaT"), "datetime64[s]")
+    records["timestamp"][valid_time] = (
+        seconds[valid_time].astype(np.int64) + FIT_EPOCH_S
+    ).astype("datetime64[s]")
+
+    return records
+
+
+def read_records_fitdecode(fit_file_path):
+    """
+    Reads the record messages with fitdecode, in the same layout as
+    read_records_native.
+    """
+
+    import fitdecode
+
+    columns = {name: [] for name in RECORD_FIELDS}
+    with fitdecode.FitReader(fit_file_path) as fitfile:
+        for frame in fitfile:
+            if frame.frame_type == fitdecode.FIT_FRAME_DATA and frame.name == "record":
+                data = {field.name: field.value for field in frame.fields}
+
+                if not all(key in data for key in RECORD_FIELDS):
+                    continue
+
+                for name in RECORD_FIELDS:
+                    columns[name].append(data[name])
+
+    records = {
+        name: np.array([np.nan if v is None else v for v in values], dtype=float)
+        for name, values in columns.items()
+        if name != "timestamp"
+    }
+    records["timestamp"] = (
+        pd.to_datetime(columns["timestamp"], utc=True)
+        .tz_localize(None)
+        .to_numpy(dtype="datetime64[s]")
+    )
+
+    return records
+
+
+def read_records(fit_file_path, decoder="fitdecode"):
+    """
+    Record fields of a .fit file.
+
+    Parameters
+    ----------
+    fit_file_path: str
+        Path to the .fit file.
+    decoder: str
+        'native' to use the NumPy decoder (falling back to fitdecode for files
+        it does not support) or 'fitdecode'.
+
+    Returns
+    -------
+    dict
+        Field name -> np.ndarray, see read_records_native.
+    """
+
+    if decoder == "native":
+        try:
+            return read_records_native(fit_file_path)
+        except UnsupportedFitError as e:
+            print(f"Native decoder: {e}, falling back to fitdecode")
+
+    return read_records_fitdecode(fit_file_path)
+
+
+def compare_with_fitdecode(fit_file_path):
+    """
+    Field-by-field comparison of the native decoder against fitdecode.
+
+    Returns
+    -------
+    dict
+        Field name -> number of mismatching values ('records' holds the
+        difference in record counts). None if the native decoder does not
+        support the file.
+    """
+
+    try:
+        native = read_records_native(fit_file_path)
+    except UnsupportedFitError:
+        return None
+    reference = read_records_fitdecode(fit_file_path)
+
+    mismatches = {
+        "records": abs(len(native["timestamp"]) - len(reference["timestamp"]))
+    }
+    if mismatches["records"]:
+        return mismatches
+
+    for name in RECORD_FIELDS:
+        a, b = native[name], reference[name]
+        if name == "timestamp":
+            same = (a == b) | (np.isnat(a) & np.isnat(b))
+            mismatches[name] = int(np.sum(~same))
+        else:
+            same = np.isclose(a, b, rtol=0, atol=1e-9) | (np.isnan(a) & np.isnan(b))
+            mismatches[name] = int(np.sum(~same))
+
+    return mismatches
+
+
+def main():
+    """Validate the native decoder against fitdecode on a corpus."""
+    parser = argparse.ArgumentParser(
+        description="Compare the native FIT decoder with fitdecode field by field"
+    )
+    parser.add_argument("paths", nargs="+", help=".fit files or folders of them")
+    args = parser.parse_args()
+
+    files = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, f)
+                for f in sorted(os.listdir(path))
+                if f.lower().endswith(".fit")
+            )
+        else:
+            files.append(path)
+
+    failed = 0
+    for path in files:
+        result = compare_with_fitdecode(path)
+        if result is None:
+            print(f"{path}: unsupported (falls back to fitdecode)")
+        elif any(result.values()):
+            failed += 1
+            bad = ", ".join(f"{k}={v}" for k, v in result.items() if v)
+            print(f"{path}: MISMATCH {bad}")
+        else:
+            print(f"{path}: ok")
+
+    print(f"{len(files)} files, {failed} with mismatches")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    exit(main())
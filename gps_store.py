@@ -0,0 +1,470 @@
+#!/usr/bin/env python
+"""
+Private GPS tracks and a grid spatial index for repeated-segment matching.
+
+process_fit.py --gps DIR keeps each run's positions next to (not in) its CSV,
+one '<yyyymmdd>_<type>.npz' per run with one point per CSV row. Positions are
+quantized to 1e-5 degrees (about 1 m) and delta-encoded, so a track takes a
+few bytes per point.
+
+GpsIndex puts every track point in a grid cell and keeps all points sorted
+by cell, so the points near a location are found with a binary search per
+nearby cell instead of scanning every track. A segment is a list of
+waypoints. A traversal passes within the match radius of every waypoint in
+order, so a hill or loop is matched across all runs without comparing traces
+pairwise.
+
+    index = GpsIndex("gps")
+    index.update()
+    efforts = match_segment(index, [(39.75, -105.22), (39.76, -105.21)], "data")
+"""
+
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+
+SCALE = 1e5  # quantization steps per degree
+CELL = 50  # grid cell size in quantization steps (about 50 m)
+EARTH_RADIUS_M = 6371000.0
+INDEX_DIR = "gps_index"
+INDEX_ARRAYS = ["cells", "run_ids", "samples", "q_lat", "q_lon"]  # sorted by cell
+
+
+def encode_track(lat, lon):
+    """
+    Quantized, delta-encoded positions.
+
+    Returns
+    -------
+    dict
+        Arrays for np.savez: 'n' samples, 'valid' (packed bits of samples with
+        a position), 'start' (first quantized lat/lon) and 'dlat'/'dlon'
+        (deltas between consecutive valid positions).
+    """
+
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    valid = ~(np.isnan(lat) | np.isnan(lon))
+    q_lat = np.round(lat[valid] * SCALE).astype(np.int64)
+    q_lon = np.round(lon[valid] * SCALE).astype(np.int64)
+
+    start = np.array([q_lat[:1].sum(), q_lon[:1].sum()], dtype=np.int32)
+    deltas = [np.diff(q_lat), np.diff(q_lon)]
+    small = all(np.all(np.abs(d) < 2**15) for d in deltas)
+    dtype = np.int16 if small else np.int32
+
+    return {
+        "n": np.array(len(lat)),
+        "valid": np.packbits(valid),
+        "start": start,
+        "dlat": deltas[0].astype(dtype),
+        "dlon": deltas[1].astype(dtype),
+    }
+
+
+def decode_quantized(track):
+    """
+    Quantized positions of the valid samples and their sample indices.
+    """
+
+    valid = np.unpackbits(track["valid"], count=int(track["n"])).astype(bool)
+    idx = np.flatnonzero(valid)
+    if len(idx) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, idx
+    q_lat = np.concatenate([[track["start"][0]], track["dlat"]]).astype(np.int64)
+    q_lon = np.concatenate([[track["start"][1]], track["dlon"]]).astype(np.int64)
+
+    return np.cumsum(q_lat), np.cumsum(q_lon), idx
+
+
+def decode_track(track):
+    """
+    Inverse of encode_track.
+
+    Returns
+    -------
+    tuple
+        (lat, lon) arrays in degrees, NaN for samples without a position.
+    """
+
+    q_lat, q_lon, idx = decode_quantized(track)
+    lat = np.full(int(track["n"]), np.nan)
+    lon = np.full(int(track["n"]), np.nan)
+    lat[idx] = q_lat / SCALE
+    lon[idx] = q_lon / SCALE
+
+    return lat, lon
+
+
+def save_track(path, lat, lon):
+    np.savez_compressed(path, **encode_track(lat, lon))
+
+
+def load_track(path):
+    with np.load(path) as track:
+        return decode_track(track)
+
+
+def _cell_keys(q_lat, q_lon):
+    q_lat, q_lon = q_lat.astype(np.int64), q_lon.astype(np.int64)
+
+    return (q_lat // CELL) * 2**32 + (q_lon // CELL)
+
+
+def _distance_m(lat1, lon1, lat2, lon2):
+    """
+    Equirectangular distance in meters, accurate at segment scales.
+    """
+
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    x = (lon2 - lon1) * np.cos((lat1 + lat2) / 2)
+
+    return EARTH_RADIUS_M * np.hypot(x, lat2 - lat1)
+
+
+class GpsIndex:
+    """
+    Grid index over all track points of a GPS folder.
+
+    Parameters
+    ----------
+    path: str
+        Folder of track files written by process_fit.py --gps. The index is
+        kept in its INDEX_DIR subfolder as one .npy file per array, opened
+        memory-mapped, and runs.json (written last) listing the indexed runs
+        and the number of points.
+    """
+
+    def __init__(self, path="gps"):
+        self.path = path
+        self._index_dir = os.path.join(path, INDEX_DIR)
+        self.runs = []
+        self.cells = np.empty(0, dtype=np.int64)
+        for name in INDEX_ARRAYS[1:]:
+            setattr(self, name, np.empty(0, dtype=np.int32))
+
+        meta_path = os.path.join(self._index_dir, "runs.json")
+        if not os.path.exists(meta_path):
+            return
+        with open(meta_path) as f:
+            meta = json.load(f)
+        arrays = {}
+        for name in INDEX_ARRAYS:
+            array_path = os.path.join(self._index_dir, f"{name}.npy")
+            if not os.path.exists(array_path):
+                return  # interrupted update: rebuilt from the tracks
+            arrays[name] = np.load(array_path, mmap_mode="r")
+            if len(arrays[name]) != meta["points"]:
+                return
+        self.runs = meta["runs"]
+        for name, array in arrays.items():
+            setattr(self, name, array)
+
+    def update(self):
+        """
+        Adds the tracks not yet in the index and saves it.
+
+        The new points are sorted by cell and merged into the existing sorted
+        arrays, which are not re-sorted.
+
+        Returns
+        -------
+        int
+            Number of runs added.
+        """
+
+        indexed = set(self.runs)
+        new_runs = sorted(
+            f[:-4]
+            for f in os.listdir(self.path)
+            if f.endswith(".npz") and f[:-4] not in indexed
+        )
+        if not new_runs:
+            return 0
+
+        parts = {name: [] for name in INDEX_ARRAYS[1:]}
+        runs = list(self.runs)
+        for run in new_runs:
+            with np.load(os.path.join(self.path, f"{run}.npz")) as track:
+                q_lat, q_lon, idx = decode_quantized(track)
+            parts["run_ids"].append(np.full(len(idx), len(runs)))
+            parts["samples"].append(idx)
+            parts["q_lat"].append(q_lat)
+            parts["q_lon"].append(q_lon)
+            runs.append(run)
+
+        new = {
+            name: np.concatenate(arrays).astype(np.int32)
+            for name, arrays in parts.items()
+        }
+        new["cells"] = _cell_keys(new["q_lat"], new["q_lon"])
+        order = np.argsort(new["cells"], kind="stable")
+        # New points go after the existing points of the same cell
+        positions = np.searchsorted(self.cells, new["cells"][order], side="right")
+        merged = {
+            name: np.insert(
+                np.asarray(getattr(self, name)), positions, new[name][order]
+            )
+            for name in INDEX_ARRAYS
+        }
+
+        self._save(runs, merged)
+        self.runs = runs
+        for name, array in merged.items():
+            setattr(self, name, array)
+
+        return len(new_runs)
+
+    def _save(self, runs, arrays):
+        """
+        Writes every array next to its final name and renames it into place,
+        then runs.json. A crash leaves arrays whose lengths do not match
+        runs.json, and the index is rebuilt on the next load.
+        """
+
+        os.makedirs(self._index_dir, exist_ok=True)
+        for name, array in arrays.items():
+            final = os.path.join(self._index_dir, f"{name}.npy")
+            temporary = os.path.join(self._index_dir, f"{name}.tmp.npy")
+            np.save(temporary, array)
+            os.replace(temporary, final)
+
+        meta = {"runs": runs, "points": len(arrays["cells"])}
+        temporary = os.path.join(self._index_dir, "runs.json.tmp")
+        with open(temporary, "w") as f:
+            json.dump(meta, f)
+        os.replace(temporary, os.path.join(self._index_dir, "runs.json"))
+
+    def near(self, lat, lon, radius=25.0):
+        """
+        Track points within radius meters of (lat, lon).
+
+        Returns
+        -------
+        pd.DataFrame
+            Columns 'run', 'sample' (row in the run's CSV) and 'distance' (m).
+        """
+
+        reach_lat = radius / (EARTH_RADIUS_M * np.pi / 180) * SCALE
+        reach_lon = reach_lat / max(np.cos(np.radians(lat)), 1e-6)
+        q_lat, q_lon = lat * SCALE, lon * SCALE
+
+        hits = []
+        for cell_lat in range(
+            int((q_lat - reach_lat) // CELL), int((q_lat + reach_lat) // CELL) + 1
+        ):
+            first = cell_lat * 2**32 + int((q_lon - reach_lon) // CELL)
+            last = cell_lat * 2**32 + int((q_lon + reach_lon) // CELL)
+            lo = np.searchsorted(self.cells, first, side="left")
+            hi = np.searchsorted(self.cells, last, side="right")
+            hits.append(np.arange(lo, hi))
+        hits = np.concatenate(hits)
+
+        distance = _distance_m(
+            lat, lon, self.q_lat[hits] / SCALE, self.q_lon[hits] / SCALE
+        )
+        close = distance <= radius
+        hits = hits[close]
+
+        runs = np.array(self.runs, dtype=object)
+
+        return pd.DataFrame(
+            {
+                "run": runs[self.run_ids[hits]],
+                "sample": self.samples[hits],
+                "distance": distance[close],
+            }
+        )
+
+
+def _passes(near):
+    """
+    Closest sample of each pass (run of consecutive samples) near a waypoint.
+
+    Returns
+    -------
+    dict
+        Run -> sorted samples, one per pass.
+    """
+
+    if near.empty:
+        return {}
+
+    codes, runs = pd.factorize(near["run"])
+    samples = near["sample"].to_numpy()
+    order = np.lexsort((samples, codes))
+    codes, samples = codes[order], samples[order]
+    distances = near["distance"].to_numpy()[order]
+
+    new_pass = np.r_[True, (np.diff(codes) != 0) | (np.diff(samples) > 1)]
+    pass_ids = np.cumsum(new_pass) - 1
+    # The first row of each pass after sorting by distance is its closest
+    by_distance = np.lexsort((distances, pass_ids))
+    first = np.r_[True, np.diff(pass_ids[by_distance]) != 0]
+    closest = by_distance[first]
+
+    breaks = np.flatnonzero(np.diff(codes[closest]) != 0) + 1
+    return {
+        runs[codes[group[0]]]: samples[group]
+        for group in np.split(closest, breaks)
+        if len(group)
+    }
+
+
+def find_traversals(index, waypoints, radius=25.0):
+    """
+    Sample ranges of every run passing all waypoints in order.
+
+    Parameters
+    ----------
+    index: GpsIndex
+        Up-to-date index.
+    waypoints: list
+        (lat, lon) of the segment's start, any intermediate points, and end.
+    radius: float
+        Match radius in meters.
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns 'run', 'start' and 'end' (CSV rows closest to the first and
+        last waypoints). A run traversing the segment several times has one
+        row per traversal.
+    """
+
+    passes_by_run = [_passes(index.near(lat, lon, radius)) for lat, lon in waypoints]
+    candidates = set(passes_by_run[0])
+    for by_run in passes_by_run[1:]:
+        candidates &= set(by_run)
+
+    traversals = []
+    for run in sorted(candidates):
+        passes = [by_run[run] for by_run in passes_by_run]
+        position = -1
+        while True:
+            chain = []
+            for waypoint_passes in passes:
+                after = waypoint_passes[waypoint_passes > position]
+                if len(after) == 0:
+                    break
+                position = after[0]
+                chain.append(position)
+            if len(chain) < len(passes):
+                break
+
+            # Time from the last start pass before the second waypoint, for
+            # runs that pass the start several times before setting off
+            starts = passes[0][(passes[0] >= chain[0]) & (passes[0] < chain[1])]
+            traversals.append(
+                {"run": run, "start": int(starts[-1]), "end": int(chain[-1])}
+            )
+
+    return pd.DataFrame(traversals, columns=["run", "start", "end"])
+
+
+def traversal_efforts(traversals, data_folder="data"):
+    """
+    Time, HR and pace of each traversal from the run CSVs.
+
+    Returns
+    -------
+    pd.DataFrame
+        traversals with 'date', 'time' (s), 'distance' (mi), 'pace' (min/mi)
+        and 'hr' (mean).
+    """
+
+    rows = []
+    for run, group in traversals.groupby("run", sort=False):
+        df = pd.read_csv(os.path.join(data_folder, f"{run}.csv"))
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        for _, traversal in group.iterrows():
+            window = df.iloc[traversal["start"] : traversal["end"] + 1]
+            time = (
+                window["timestamp"].iloc[-1] - window["timestamp"].iloc[0]
+            ).total_seconds()
+            distance = window["distance"].iloc[-1] - window["distance"].iloc[0]
+            rows.append(
+                {
+                    **traversal,
+                    "date": window["timestamp"].iloc[0],
+                    "time": time,
+                    "distance": distance,
+                    "pace": time / 60 / distance if distance > 0 else np.nan,
+                    "hr": window["hr"].astype(float).mean(),
+                }
+            )
+
+    columns = ["run", "start", "end", "date", "time", "distance", "pace", "hr"]
+
+    return pd.DataFrame(rows, columns=columns).sort_values("date", ignore_index=True)
+
+
+def match_segment(index, waypoints, data_folder="data", radius=25.0):
+    """
+    All traversals of a segment with their time, HR and pace.
+    """
+
+    return traversal_efforts(find_traversals(index, waypoints, radius), data_folder)
+
+
+def _waypoint(text):
+    lat, lon = text.split(",")
+
+    return float(lat), float(lon)
+
+
+def main():
+    """Main CLI function."""
+    parser = argparse.ArgumentParser(
+        description="Find every traversal of a segment in the GPS store",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+            Examples:
+            python gps_store.py --segment 39.7471,-105.2201 39.7552,-105.2117
+            python gps_store.py --segment 39.74,-105.22 39.75,-105.21 39.74,-105.22 --radius 30
+            """,
+    )
+    parser.add_argument(
+        "--segment",
+        nargs="+",
+        type=_waypoint,
+        metavar="LAT,LON",
+        help="Start, intermediate and end waypoints (at least 2)",
+    )
+    parser.add_argument(
+        "--radius", type=float, default=25.0, help="Match radius in m (default: 25)"
+    )
+    parser.add_argument("--gps", default="./gps", help="GPS folder (default: ./gps)")
+    parser.add_argument("--data", default="./data", help="Run CSV folder")
+    parser.add_argument("--output", default=None, help="Optional CSV for the efforts")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.gps):
+        print(f"Error: Folder '{args.gps}' not found")
+        return 1
+
+    index = GpsIndex(args.gps)
+    added = index.update()
+    print(f"Indexed {added} new runs ({len(index.runs)} total)")
+
+    if not args.segment:
+        return 0
+    if len(args.segment) < 2:
+        print("Error: --segment needs at least a start and an end")
+        return 1
+
+    efforts = match_segment(index, args.segment, args.data, args.radius)
+    print(efforts.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+    if args.output:
+        efforts.to_csv(args.output, index=False)
+        print(f"Saved to: {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,428 @@
+#!/usr/bin/env python
+"""
+Long-running service that watches a raw folder and ingests new .fit files.
+
+Files are picked up by polling, processed with process_fit_file in a bounded
+pool of long-lived worker processes, and recorded in a ledger so restarts do
+not reprocess them. The run type of each file comes from, in order:
+
+1. a sidecar next to the file ('<name>.type' holding the type, or
+   '<name>.json' with a "type" key)
+2. the first matching --rule PATTERN=TYPE (regex searched in the filename)
+3. the --type default
+"""
+
+import os
+import re
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from process_fit import process_fit_file
+
+LEDGER_NAME = ".ingested"
+
+
+def parse_rules(rules):
+    """
+    Converts ['PATTERN=TYPE', ...] into a list of (compiled regex, type).
+    """
+
+    parsed = []
+    for rule in rules:
+        pattern, sep, run_type = rule.rpartition("=")
+        if not sep or not pattern:
+            raise ValueError(f"Invalid rule '{rule}', expected PATTERN=TYPE")
+        parsed.append((re.compile(pattern, re.IGNORECASE), run_type))
+
+    return parsed
+
+
+def resolve_run_type(fit_path, rules, default="base"):
+    """
+    Run type for a .fit file from its sidecar, the filename rules or default.
+    """
+
+    stem = os.path.splitext(fit_path)[0]
+
+    if os.path.exists(f"{stem}.type"):
+        with open(f"{stem}.type") as f:
+            run_type = f.read().strip()
+        if run_type:
+            return run_type
+
+    if os.path.exists(f"{stem}.json"):
+        with open(f"{stem}.json") as f:
+            sidecar = json.load(f)
+        if sidecar.get("type"):
+            return sidecar["type"]
+
+    filename = os.path.basename(fit_path)
+    for pattern, run_type in rules:
+        if pattern.search(filename):
+            return run_type
+
+    return default
+
+
+class IngestDaemon:
+    """
+    Polls watch_dir and feeds settled .fit files to a worker pool.
+
+    Parameters
+    ----------
+    watch_dir: str
+        Folder the watch sync drops .fit files into.
+    output_dir: str
+        Folder for processed CSVs (as process_fit --output).
+    rules: list
+        Run type rules from parse_rules.
+    default_type: str
+        Run type when no sidecar or rule matches.
+    filter_run: bool
+        Apply the geographic filter (as process_fit --filter).
+    workers: int
+        Number of worker processes.
+    max_pending: int
+        Maximum files queued or in flight. Further files wait on disk until
+        the pool catches up.
+    settle: float
+        Seconds a file's size and mtime must stay unchanged before it is
+        considered fully written.
+    store_dir: str, optional
+        RunStore to append each processed run to.
+    value_index: bool
+        Keep the store's value index (see value_index.py) up to date.
+    summaries: bool
+        Keep the store's multi-resolution summaries (see run_summaries.py) up
+        to date.
+    histograms: bool
+        Keep the store's HR and elevation histograms (see run_histograms.py)
+        up to date.
+    gps_dir: str, optional
+        Keep each run's GPS track in this folder and its segment index up to
+        date (as process_fit --gps, see gps_store.py).
+    """
+
+    def __init__(
+        self,
+        watch_dir,
+        output_dir="./data",
+        rules=None,
+        default_type="base",
+        filter_run=False,
+        workers=2,
+        max_pending=8,
+        settle=2.0,
+        store_dir=None,
+        value_index=False,
+        summaries=False,
+        histograms=False,
+        gps_dir=None,
+    ):
+        self.watch_dir = watch_dir
+        self.output_dir = output_dir
+        self.rules = rules or []
+        self.default_type = default_type
+        self.filter_run = filter_run
+        self.workers = workers
+        self.max_pending = max_pending
+        self.settle = settle
+        self.store_dir = store_dir
+        self.value_index = value_index
+        self.summaries = summaries
+        self.histograms = histograms
+        self.gps_dir = gps_dir
+
+        self._ledger_path = os.path.join(watch_dir, LEDGER_NAME)
+        self._done = self._read_ledger()
+        self._seen = {}  # filename -> ((size, mtime), first time seen unchanged)
+        self._pending = {}  # future -> filename
+        self._failed = {}  # filename -> (size, mtime) at failure
+        self._store = None
+
+    def _read_ledger(self):
+        if not os.path.exists(self._ledger_path):
+            return set()
+        with open(self._ledger_path) as f:
+            return {line.strip() for line in f if line.strip()}
+
+    def _record(self, filename):
+        self._done.add(filename)
+        with open(self._ledger_path, "a") as f:
+            f.write(f"{filename}\n")
+
+    def scan(self, now):
+        """
+        Returns filenames whose size and mtime have been stable for settle seconds.
+        """
+
+        in_flight = set(self._pending.values())
+        ready = []
+        current = set()
+
+        with os.scandir(self.watch_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if not entry.is_file() or not name.lower().endswith(".fit"):
+                    continue
+                if name in self._done or name in in_flight:
+                    continue
+
+                stat = entry.stat()
+                signature = (stat.st_size, stat.st_mtime)
+                current.add(name)
+
+                if self._failed.get(name) == signature:
+                    continue  # failed before and unchanged since
+
+                previous = self._seen.get(name)
+                if previous is None or previous[0] != signature:
+                    self._seen[name] = (signature, now)
+                elif now - previous[1] >= self.settle and stat.st_size > 0:
+                    ready.append(name)
+
+        for name in set(self._seen) - current:
+            del self._seen[name]
+
+        return sorted(ready)
+
+    def _submit(self, pool, filename):
+        fit_path = os.path.join(self.watch_dir, filename)
+        run_type = resolve_run_type(fit_path, self.rules, self.default_type)
+        future = pool.submit(
+            process_fit_file,
+            fit_path,
+            run_type,
+            self.filter_run,
+            self.output_dir,
+            gps_dir=self.gps_dir,
+        )
+        self._pending[future] = filename
+        self._seen.pop(filename, None)
+
+    def _collect(self):
+        """
+        Handles finished futures and updates downstream caches.
+        """
+
+        for future in [f for f in self._pending if f.done()]:
+            filename = self._pending.pop(future)
+            try:
+                csv_path = future.result()
+                if csv_path is not None:
+                    self.update_caches(csv_path)
+            except Exception as e:
+                csv_path = None
+                print(f"Error processing {filename}: {e}")
+
+            if csv_path is None:
+                try:
+                    stat = os.stat(os.path.join(self.watch_dir, filename))
+                    self._failed[filename] = (stat.st_size, stat.st_mtime)
+                except FileNotFoundError:
+                    pass
+                continue
+
+            self._record(filename)
+
+    def _waiting(self):
+        """
+        True while a seen file may still become ready. Empty files never do
+        until they are written to.
+        """
+
+        return any(signature[0] > 0 for signature, _ in self._seen.values())
+
+    def update_caches(self, csv_path):
+        """
+        Propagates a newly written run CSV to downstream caches.
+        """
+
+        if self.store_dir:
+            import pandas as pd
+            from run_store import RunStore
+
+            if self._store is None:
+                self._store = RunStore(self.store_dir)
+            self._store.append_run(csv_path, pd.read_csv(csv_path))
+
+            if self.value_index:
+                from value_index import ValueIndex
+
+                ValueIndex(self._store).update()
+
+            if self.summaries:
+                from run_summaries import RunSummaries
+
+                RunSummaries(self._store).update()
+
+            if self.histograms:
+                from run_histograms import RunHistograms
+
+                RunHistograms(self._store).update()
+
+        if self.gps_dir:
+            from gps_store import GpsIndex
+
+            GpsIndex(self.gps_dir).update()
+
+    def run(self, poll_interval=1.0, once=False):
+        """
+        Main loop. With once=True, ingests what is currently in the folder and
+        returns when it has been processed.
+        """
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            while True:
+                self._collect()
+
+                now = time.monotonic()
+                for filename in self.scan(now):
+                    if len(self._pending) >= self.max_pending:
+                        break  # backpressure: leave the rest for a later poll
+                    self._submit(pool, filename)
+
+                if once and not self._pending and not self._waiting():
+                    return
+
+                time.sleep(poll_interval)
+
+
+def main():
+    """Main CLI function."""
+    parser = argparse.ArgumentParser(
+        description="Watch a folder and ingest new Garmin .fit files",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+            Examples:
+            python ingest_daemon.py ./raw_data
+            python ingest_daemon.py ./raw_data --rule 'tempo=tempo' --rule 'trail=trail'
+            python ingest_daemon.py ./raw_data --store ./store --workers 4
+            """,
+    )
+
+    parser.add_argument("watch_dir", help="Folder to watch for .fit files")
+    parser.add_argument(
+        "--output",
+        default="./data",
+        help="Output directory for processed files (default: ./data)",
+    )
+    parser.add_argument(
+        "--type",
+        default="base",
+        help="Run type when no sidecar or rule matches (default: base)",
+    )
+    parser.add_argument(
+        "--rule",
+        action="append",
+        default=[],
+        metavar="PATTERN=TYPE",
+        help="Filename regex to run type mapping, first match wins (repeatable)",
+    )
+    parser.add_argument(
+        "--filter",
+        action="store_true",
+        help="Filter runs to include data within specified region",
+    )
+    parser.add_argument(
+        "--store", default=None, help="RunStore directory to append new runs to"
+    )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help="Update the store's value index after each run (requires --store)",
+    )
+    parser.add_argument(
+        "--summaries",
+        action="store_true",
+        help="Update the store's multi-resolution summaries after each run "
+        "(requires --store)",
+    )
+    parser.add_argument(
+        "--histograms",
+        action="store_true",
+        help="Update the store's HR and elevation histograms after each run "
+        "(requires --store)",
+    )
+    parser.add_argument(
+        "--gps",
+        default=None,
+        metavar="DIR",
+        help="Keep GPS tracks in DIR and update their segment index after each run",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=2, help="Worker processes (default: 2)"
+    )
+    parser.add_argument(
+        "--max-pending",
+        type=int,
+        default=8,
+        help="Maximum files queued or in flight (default: 8)",
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=2.0,
+        help="Seconds a file must be unchanged before processing (default: 2)",
+    )
+    parser.add_argument(
+        "--poll", type=float, default=1.0, help="Polling interval in seconds"
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Process the files currently in the folder and exit",
+    )
+
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.watch_dir):
+        print(f"Error: Folder '{args.watch_dir}' not found")
+        return 1
+
+    if args.index and not args.store:
+        print("Error: --index requires --store")
+        return 1
+
+    if args.summaries and not args.store:
+        print("Error: --summaries requires --store")
+        return 1
+
+    if args.histograms and not args.store:
+        print("Error: --histograms requires --store")
+        return 1
+
+    try:
+        rules = parse_rules(args.rule)
+    except (ValueError, re.error) as e:
+        print(f"Error: {e}")
+        return 1
+
+    daemon = IngestDaemon(
+        args.watch_dir,
+        output_dir=args.output,
+        rules=rules,
+        default_type=args.type,
+        filter_run=args.filter,
+        workers=args.workers,
+        max_pending=args.max_pending,
+        settle=args.settle,
+        store_dir=args.store,
+        value_index=args.index,
+        summaries=args.summaries,
+        histograms=args.histograms,
+        gps_dir=args.gps,
+    )
+
+    try:
+        daemon.run(poll_interval=args.poll, once=args.once)
+    except KeyboardInterrupt:
+        print("Stopping ingest")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
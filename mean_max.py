@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+"""
+Mean-maximal (best effort) curves of pace and HR.
+
+For every duration in DURATIONS a run's curve holds the best average pace,
+the highest average HR and, for each pace in PACE_TARGETS, the lowest
+average HR over any window of that duration run at that pace or faster.
+Windows start at every sample; averages come from prefix sums of distance
+and HR x time, and the window ends of all durations are found with one
+vectorized searchsorted, so a run costs O(durations x samples) instead of
+O(samples^2).
+
+Run curves are cached with a fingerprint of the run, so the season curve is
+the element-wise best over the cached curves and a new run only costs its
+own curve.
+
+    cache = MeanMaxCache("mean_max.csv")
+    cache.update(load_runs(start_date="20250602"))
+    season = season_curve(cache.curves)
+"""
+
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+from data_handling import load_runs
+
+DURATIONS = [10, 30, 60, 120, 300, 600, 1200, 1800, 3600, 5400, 7200]  # s
+PACE_TARGETS = [7.0, 8.0, 9.0, 10.0]  # min/mi
+
+FINGERPRINT_COLUMNS = ["run", "samples", "last_timestamp"]
+
+
+def _curve_columns(pace_targets):
+    return ["duration", "pace", "hr"] + [f"hr_at_{pace:g}" for pace in pace_targets]
+
+
+def mean_max_curve(df, durations=DURATIONS, pace_targets=PACE_TARGETS, coverage=0.9):
+    """
+    Mean-maximal curve of one run.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Run as returned by load_runs (timestamp, distance in mi, hr).
+    durations: list
+        Window lengths in seconds.
+    pace_targets: list
+        Paces (min/mi) for the lowest-HR-at-pace columns.
+    coverage: float
+        Windows are the samples from a start sample up to the last sample at
+        most duration seconds later. Windows spanning less than coverage x
+        duration (e.g. at the end of the run) are ignored.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per duration with 'duration', 'pace' (best average, min/mi),
+        'hr' (highest average) and 'hr_at_<pace>' (lowest average HR at that
+        pace or faster). NaN where the run is too short.
+    """
+
+    timestamps = pd.to_datetime(df["timestamp"])
+    elapsed = (timestamps - timestamps.iloc[0]).dt.total_seconds().to_numpy()
+    distance = pd.to_numeric(df["distance"], errors="coerce").ffill().fillna(0.0)
+    distance = distance.to_numpy(dtype=float)
+    hr = pd.to_numeric(df["hr"], errors="coerce").to_numpy(dtype=float)
+
+    # Each sample is credited with the time since the previous sample
+    dt = np.diff(elapsed, prepend=elapsed[:1])
+    valid_hr = ~np.isnan(hr)
+    hr_time = np.concatenate([[0.0], np.cumsum(np.where(valid_hr, hr * dt, 0.0))])
+    hr_duration = np.concatenate([[0.0], np.cumsum(np.where(valid_hr, dt, 0.0))])
+
+    durations = np.asarray(durations, dtype=float)
+    starts = np.arange(len(elapsed))
+    ends = np.searchsorted(elapsed, elapsed[None, :] + durations[:, None], "right") - 1
+
+    span = elapsed[ends] - elapsed[starts]
+    valid = span >= coverage * durations[:, None]
+    covered = distance[ends] - distance[starts]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pace = np.where(valid & (covered > 0), span / 60 / covered, np.inf)
+        # Samples start + 1 .. end make up the window's time
+        window_hr_duration = hr_duration[ends + 1] - hr_duration[starts + 1]
+        mean_hr = (hr_time[ends + 1] - hr_time[starts + 1]) / window_hr_duration
+    mean_hr = np.where(valid & (window_hr_duration > 0), mean_hr, np.nan)
+
+    curve = {
+        "duration": durations.astype(int),
+        "pace": _best(pace, np.min, np.isfinite(pace)),
+        "hr": _best(mean_hr, np.max, ~np.isnan(mean_hr)),
+    }
+    for target in pace_targets:
+        at_pace = ~np.isnan(mean_hr) & (pace <= target)
+        curve[f"hr_at_{target:g}"] = _best(mean_hr, np.min, at_pace)
+
+    return pd.DataFrame(curve, columns=_curve_columns(pace_targets))
+
+
+def _best(values, reduce, mask):
+    """
+    Row-wise reduce of values over mask, NaN for rows without any.
+    """
+
+    fill = np.inf if reduce is np.min else -np.inf
+    best = reduce(np.where(mask, values, fill), axis=1)
+
+    return np.where(mask.any(axis=1), best, np.nan)
+
+
+def season_curve(curves):
+    """
+    Element-wise best of run curves.
+
+    Parameters
+    ----------
+    curves: pd.DataFrame
+        Run curves with a 'run' column (e.g. MeanMaxCache.curves).
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per duration with the best value of every curve column and,
+        for each, the run it came from ('<column>_run').
+    """
+
+    season = {"duration": np.sort(curves["duration"].unique())}
+    for column in curves.columns:
+        if column in ["run", "duration"]:
+            continue
+        values = curves.dropna(subset=[column])
+        if column == "hr":
+            best = values.loc[values.groupby("duration")[column].idxmax()]
+        else:
+            best = values.loc[values.groupby("duration")[column].idxmin()]
+        best = best.set_index("duration").reindex(season["duration"])
+        season[column] = best[column].to_numpy()
+        season[f"{column}_run"] = best["run"].to_numpy()
+
+    return pd.DataFrame(season)
+
+
+class MeanMaxCache:
+    """
+    Per-run mean-maximal curves cached in a CSV.
+
+    Parameters
+    ----------
+    path: str
+        Cache file.
+    durations, pace_targets:
+        Curve definition (see mean_max_curve). A cache built with another
+        definition is rebuilt.
+    """
+
+    def __init__(
+        self, path="mean_max.csv", durations=DURATIONS, pace_targets=PACE_TARGETS
+    ):
+        self.path = path
+        self.durations = list(durations)
+        self.pace_targets = list(pace_targets)
+        columns = FINGERPRINT_COLUMNS + _curve_columns(self.pace_targets)
+
+        self.curves = pd.DataFrame(columns=columns)
+        if os.path.exists(path):
+            cached = pd.read_csv(path, dtype={"run": str})
+            if list(cached.columns) == columns and set(cached["duration"]) == set(
+                self.durations
+            ):
+                self.curves = cached
+
+    def _fingerprint(self, df):
+        return len(df), str(pd.to_datetime(df["timestamp"]).iloc[-1])
+
+    def update(self, runs):
+        """
+        Computes the curves of new or changed runs and saves the cache.
+
+        Parameters
+        ----------
+        runs: dict
+            Runs as returned by load_runs. Cached runs that are not in runs
+            are kept.
+
+        Returns
+        -------
+        int
+            Number of runs computed.
+        """
+
+        cached = self.curves.drop_duplicates("run").set_index("run")
+        new_curves = []
+        for run, df in runs.items():
+            if df.empty:
+                continue
+            samples, last_timestamp = self._fingerprint(df)
+            if run in cached.index and (
+                cached.loc[run, "samples"] == samples
+                and cached.loc[run, "last_timestamp"] == last_timestamp
+            ):
+                continue
+
+            curve = mean_max_curve(df, self.durations, self.pace_targets)
+            curve.insert(0, "run", run)
+            curve.insert(1, "samples", samples)
+            curve.insert(2, "last_timestamp", last_timestamp)
+            new_curves.append(curve)
+
+        if new_curves:
+            updated = set(curve["run"].iloc[0] for curve in new_curves)
+            kept = self.curves[~self.curves["run"].isin(updated)]
+            self.curves = pd.concat([kept] + new_curves, ignore_index=True)
+            self.curves.sort_values(
+                ["run", "duration"], inplace=True, ignore_index=True
+            )
+            self.curves.to_csv(self.path, index=False)
+
+        return len(new_curves)
+
+    def season(self, runs=None):
+        """
+        Season curve over all cached runs, or the given run names.
+        """
+
+        curves = self.curves
+        if runs is not None:
+            curves = curves[curves["run"].isin(runs)]
+
+        return season_curve(curves.drop(columns=["samples", "last_timestamp"]))
+
+
+def main():
+    """Main CLI function."""
+    parser = argparse.ArgumentParser(
+        description="Season mean-maximal pace and HR curves"
+    )
+    parser.add_argument("--data", default="./data", help="Folder of run CSVs")
+    parser.add_argument("--start", default=None, help="Start date (yyyymmdd)")
+    parser.add_argument("--end", default=None, help="End date (yyyymmdd)")
+    parser.add_argument("--type", default=None, help="Run type")
+    parser.add_argument(
+        "--cache",
+        default="mean_max.csv",
+        help="Run curve cache (default: mean_max.csv)",
+    )
+    parser.add_argument(
+        "--output", default=None, help="Optional CSV for the season curve"
+    )
+    args = parser.parse_args()
+
+    runs = load_runs(
+        start_date=args.start, end_date=args.end, type=args.type, folder=args.data
+    )
+    cache = MeanMaxCache(args.cache)
+    computed = cache.update(runs)
+    print(f"Computed {computed} run curves, {len(runs) - computed} from cache")
+
+    season = cache.season(runs=list(runs))
+    print(season.round(2).to_string(index=False))
+
+    if args.output:
+        season.to_csv(args.output, index=False)
+        print(f"Saved to: {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+"""
+Nearest-neighbor analogues of planned miles.
+
+Historical miles (mile_data.csv) are indexed by standardized altitude, net
+elevation, HR and surface in a KD-tree. The k most similar miles of every
+mile of a race are found with one batched query, and their actual paces give
+a non-parametric prediction to compare with the linear and MLP models.
+
+Miles added after the tree is built go to a small buffer that is searched by
+brute force and merged with the tree results. The tree (and the feature
+scaling) is rebuilt once the buffer grows past a fraction of the tree, so
+adding a run does not cost a full rebuild.
+
+    index = MileIndex()
+    index.add(pd.read_csv("./model_data/mile_data.csv"))
+    prediction = index.predict(pd.read_csv("./model_data/race.csv"), k=10)
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+
+from model_search import feature_matrix
+
+FEATURES = ["altitude", "net_elevation", "hr", "trail"]
+
+
+class MileIndex:
+    """
+    KD-tree over standardized per-mile features, with an append buffer.
+
+    Parameters
+    ----------
+    features: list
+        Feature columns ('trail' encodes the surface, see
+        model_search.feature_matrix).
+    rebuild_fraction: float
+        The tree is rebuilt when the buffer holds more than this fraction of
+        the indexed miles.
+    """
+
+    def __init__(self, features=FEATURES, rebuild_fraction=0.25):
+        self.features = list(features)
+        self.rebuild_fraction = rebuild_fraction
+
+        self.X = np.empty((0, len(self.features)))
+        self.pace = np.empty(0)
+        self.runs = np.empty(0, dtype=object)
+        self.mean = np.zeros(len(self.features))
+        self.scale = np.ones(len(self.features))
+        self._tree = None
+        self._indexed = 0  # rows X[:_indexed] are in the tree
+
+    def __len__(self):
+        return len(self.X)
+
+    def add(self, df):
+        """
+        Adds miles (mile_data.csv rows with a 'pace' column).
+
+        Returns
+        -------
+        int
+            Number of miles added.
+        """
+
+        runs = df["run"].astype(str).values if "run" in df else np.full(len(df), "")
+        self.X = np.vstack([self.X, feature_matrix(df, self.features)])
+        self.pace = np.r_[self.pace, df["pace"].values.astype(float)]
+        self.runs = np.r_[self.runs, runs.astype(object)]
+
+        buffered = len(self.X) - self._indexed
+        if buffered > self.rebuild_fraction * self._indexed:
+            self.rebuild()
+
+        return len(df)
+
+    def rebuild(self):
+        """
+        Refits the feature scaling and rebuilds the tree over all miles.
+        """
+
+        from scipy.spatial import cKDTree
+
+        self.mean = self.X.mean(axis=0)
+        self.scale = self.X.std(axis=0)
+        self.scale[self.scale == 0] = 1.0
+        self._tree = cKDTree(self._scaled(self.X))
+        self._indexed = len(self.X)
+
+    def _scaled(self, X):
+        return (X - self.mean) / self.scale
+
+    def query(self, df, k=10):
+        """
+        The k nearest indexed miles of every row of df.
+
+        Parameters
+        ----------
+        df: pd.DataFrame
+            Query miles with the feature columns (e.g. race.csv).
+        k: int
+            Neighbors per query, at most the number of indexed miles.
+
+        Returns
+        -------
+        tuple
+            (distances, indices), each of shape (len(df), k) and sorted by
+            distance. Indices are rows of the index (self.pace, self.runs).
+        """
+
+        if len(self.X) == 0:
+            raise ValueError("Index is empty")
+        k = min(k, len(self.X))
+        queries = self._scaled(feature_matrix(df, self.features))
+
+        distances = np.empty((len(queries), 0))
+        indices = np.empty((len(queries), 0), dtype=int)
+        if self._indexed:
+            tree_k = min(k, self._indexed)
+            distances, indices = self._tree.query(queries, k=tree_k)
+            distances = distances.reshape(len(queries), tree_k)
+            indices = indices.reshape(len(queries), tree_k)
+
+        buffer = self._scaled(self.X[self._indexed :])
+        if len(buffer):
+            buffer_distances = np.sqrt(
+                ((queries[:, None, :] - buffer[None, :, :]) ** 2).sum(axis=2)
+            )
+            buffer_indices = np.broadcast_to(
+                np.arange(self._indexed, len(self.X)), buffer_distances.shape
+            )
+            distances = np.hstack([distances, buffer_distances])
+            indices = np.hstack([indices, buffer_indices])
+
+        order = np.argsort(distances, axis=1, kind="stable")[:, :k]
+
+        return (
+            np.take_along_axis(distances, order, axis=1),
+            np.take_along_axis(indices, order, axis=1),
+        )
+
+    def predict(self, df, k=10):
+        """
+        Pace prediction of every row of df from its k nearest miles.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per query with 'pace' (mean neighbor pace), 'pace_std',
+            'pace_min', 'pace_max', 'distance' (mean standardized distance
+            to the neighbors) and, when the miles have a 'run' column, 'runs'
+            (the neighbors' runs).
+        """
+
+        distances, indices = self.query(df, k)
+        paces = self.pace[indices]
+
+        prediction = pd.DataFrame(
+            {
+                "pace": paces.mean(axis=1),
+                "pace_std": paces.std(axis=1),
+                "pace_min": paces.min(axis=1),
+                "pace_max": paces.max(axis=1),
+                "distance": distances.mean(axis=1),
+            },
+            index=df.index,
+        )
+        if (self.runs != "").any():
+            prediction["runs"] = [
+                ",".join(sorted(set(runs))) for runs in self.runs[indices]
+            ]
+
+        return prediction
+
+
+def main():
+    """Main CLI function."""
+    parser = argparse.ArgumentParser(
+        description="Nearest-neighbor pace prediction of race miles"
+    )
+    parser.add_argument(
+        "--data", default="./model_data/mile_data.csv", help="Historical miles CSV"
+    )
+    parser.add_argument(
+        "--race", default="./model_data/race.csv", help="Planned race miles CSV"
+    )
+    parser.add_argument("-k", type=int, default=10, help="Neighbors (default: 10)")
+    parser.add_argument("--features", nargs="+", default=FEATURES, help="Features")
+    parser.add_argument(
+        "--output", default=None, help="Optional CSV for the predictions"
+    )
+    args = parser.parse_args()
+
+    index = MileIndex(args.features)
+    index.add(pd.read_csv(args.data))
+    race_df = pd.read_csv(args.race)
+    prediction = index.predict(race_df, args.k)
+    if "mile" in race_df:
+        prediction.insert(0, "mile", race_df["mile"])
+
+    print(f"##### {args.k} nearest miles #####")
+    print(prediction.round(2).to_string(index=False))
+    print(f"Total time prediction: {prediction['pace'].sum():.2f} min")
+
+    if args.output:
+        prediction.to_csv(args.output, index=False)
+        print(f"Saved to: {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+"""
+Seed ensemble of the race-prediction MLP trained across a process pool.
+
+The scaled training matrix, targets and race matrix are placed once in shared
+memory; every worker attaches to the same buffers instead of receiving its
+own copy, trains MLPs with different seeds and returns only its predictions.
+The ensemble mean and spread per race mile replace the single-seed estimate
+of race_prediction.py.
+
+    python mlp_ensemble.py --models 32
+"""
+
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+FEATURES = ["net_elevation", "altitude", "hr"]
+MLP_PARAMS = {
+    "hidden_layer_sizes": (32, 16),
+    "activation": "relu",
+    "solver": "adam",
+    "max_iter": 1000,
+}
+
+_shared = {}
+
+
+def _share(arrays):
+    """
+    Copies arrays into one shared memory block.
+
+    Returns
+    -------
+    tuple
+        (SharedMemory, layout) where layout maps name -> (offset, shape).
+    """
+
+    total = sum(a.nbytes for a in arrays.values())
+    shm = shared_memory.SharedMemory(create=True, size=max(total, 1))
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array, dtype=np.float64)
+        view = np.ndarray(array.shape, dtype=np.float64, buffer=shm.buf, offset=offset)
+        view[...] = array
+        layout[name] = (offset, array.shape)
+        offset += array.nbytes
+
+    return shm, layout
+
+
+def _attach(shm_name, layout):
+    """
+    Pool initializer: maps the shared arrays into the worker once.
+    """
+
+    from threadpoolctl import threadpool_limits
+
+    # One BLAS thread per worker, parallelism comes from the pool
+    threadpool_limits(1)
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _shared["shm"] = shm
+    for name, (offset, shape) in layout.items():
+        _shared[name] = np.ndarray(
+            shape, dtype=np.float64, buffer=shm.buf, offset=offset
+        )
+
+
+def _fit_predict(seed, mlp_params):
+    """
+    Trains one MLP on the shared training matrix and predicts the race.
+    """
+
+    from sklearn.neural_network import MLPRegressor
+
+    mlp = MLPRegressor(random_state=seed, **mlp_params)
+    mlp.fit(_shared["X"], _shared["y"])
+
+    return mlp.predict(_shared["X_pred"])
+
+
+def train_ensemble(X, y, X_pred, n_models=16, workers=None, seed=0, **mlp_params):
+    """
+    Trains n_models differently seeded MLPs in parallel.
+
+    Parameters
+    ----------
+    X: np.ndarray
+        Scaled training features.
+    y: np.ndarray
+        Training targets.
+    X_pred: np.ndarray
+        Scaled features to predict.
+    n_models: int
+        Number of ensemble members.
+    workers: int, optional
+        Worker processes, defaults to the number of cores.
+    seed: int
+        Seed of the first member; member i uses seed + i.
+    mlp_params:
+        MLPRegressor parameters overriding MLP_PARAMS.
+
+    Returns
+    -------
+    np.ndarray
+        Predictions of shape (n_models, len(X_pred)).
+    """
+
+    params = {**MLP_PARAMS, **mlp_params}
+    shm, layout = _share({"X": X, "y": y, "X_pred": X_pred})
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count(),
+            initializer=_attach,
+            initargs=(shm.name, layout),
+        ) as pool:
+            seeds = range(seed, seed + n_models)
+            predictions = list(pool.map(_fit_predict, seeds, [params] * n_models))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return np.vstack(predictions)
+
+
+def summarize_ensemble(predictions, miles):
+    """
+    Ensemble mean and spread per mile.
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns 'mile', 'mean', 'std', 'min' and 'max' of the predicted pace.
+    """
+
+    return pd.DataFrame(
+        {
+            "mile": miles,
+            "mean": predictions.mean(axis=0),
+            "std": predictions.std(axis=0, ddof=1) if len(predictions) > 1 else 0.0,
+            "min": predictions.min(axis=0),
+            "max": predictions.max(axis=0),
+        }
+    )
+
+
+def main():
+    """Main CLI function."""
+    parser = argparse.ArgumentParser(
+        description="Predict race paces with a seed ensemble of MLPs"
+    )
+    parser.add_argument(
+        "--data", default="./model_data/mile_data.csv", help="Training miles CSV"
+    )
+    parser.add_argument("--race", default="./model_data/race.csv", help="Race CSV")
+    parser.add_argument(
+        "--models", type=int, default=16, help="Ensemble size (default: 16)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Worker processes (default: all)"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=42, help="Seed of the first model (default: 42)"
+    )
+    parser.add_argument("--output", default=None, help="Optional CSV for the summary")
+    args = parser.parse_args()
+
+    from sklearn.preprocessing import StandardScaler
+
+    df = pd.read_csv(args.data)
+    race_df = pd.read_csv(args.race)
+
+    scaler = StandardScaler()
+    X = scaler.fit_transform(df[FEATURES].values)
+    X_race = scaler.transform(race_df[FEATURES].values)
+
+    predictions = train_ensemble(
+        X, df["pace"].values, X_race, args.models, args.workers, args.seed
+    )
+    summary = summarize_ensemble(predictions, race_df["mile"].values)
+    totals = predictions.sum(axis=1)
+
+    print("##### Neural Network Ensemble #####")
+    print(summary.round(3).to_string(index=False))
+    print(
+        f"Total time prediction: {totals.mean():.1f} min "
+        f"(std {totals.std(ddof=1) if len(totals) > 1 else 0.0:.1f}, "
+        f"range {totals.min():.1f}-{totals.max():.1f}, {args.models} models)"
+    )
+
+    if args.output:
+        summary.to_csv(args.output, index=False)
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
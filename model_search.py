@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+"""
+Hyperparameter and feature search for the race-prediction models.
+
+Linear (ridge) and MLP candidates over architectures, regularization and
+feature subsets are scored on held-out runs. Folds are grouped by run, since
+consecutive miles of a run are correlated, and the scaled fold matrices are
+computed once for all candidate features; a candidate just selects its
+columns. MLPs are trained with early stopping and pruned by successive
+halving: all of them get a small iteration budget, and only the best 1/eta
+move on to the next, larger budget. Candidates are evaluated in a process
+pool.
+
+    python model_search.py --sample 60
+"""
+
+import os
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+CANDIDATE_FEATURES = ["net_elevation", "altitude", "hr", "trail", "mile", "total_miles"]
+RIDGE_ALPHAS = [0.01, 0.1, 1.0, 10.0]
+MLP_ARCHITECTURES = [(8,), (16,), (32, 16), (64, 32)]
+MLP_ALPHAS = [1e-4, 1e-2, 1.0]
+BUDGETS = [100, 300, 1000]  # max_iter per successive-halving rung
+
+_folds = []
+
+
+def run_groups(df):
+    """
+    Run id of every mile, for grouped cross-validation.
+
+    Uses the 'run' column written by nn_data_prep.py when present. Otherwise a
+    new run starts whenever the mile number does not increase.
+    """
+
+    if "run" in df:
+        return pd.factorize(df["run"])[0]
+
+    return np.cumsum(np.r_[True, np.diff(df["mile"].values) <= 0]) - 1
+
+
+def feature_matrix(df, features=CANDIDATE_FEATURES):
+    """
+    Model inputs from a mile_data or race table ('trail' encodes the surface).
+    """
+
+    df = df.assign(trail=(df["surface"] == "trail").astype(float))
+
+    return df[features].values.astype(float)
+
+
+def build_folds(df, n_splits=5):
+    """
+    Scaled train/test matrices of every grouped fold, for all candidate features.
+
+    Returns
+    -------
+    list
+        (X_train, y_train, X_test, y_test) per fold.
+    """
+
+    from sklearn.model_selection import GroupKFold
+    from sklearn.preprocessing import StandardScaler
+
+    X = feature_matrix(df)
+    y = df["pace"].values.astype(float)
+    groups = run_groups(df)
+    n_splits = min(n_splits, len(np.unique(groups)))
+
+    folds = []
+    for train_idx, test_idx in GroupKFold(n_splits=n_splits).split(X, y, groups):
+        scaler = StandardScaler().fit(X[train_idx])
+        folds.append(
+            (
+                scaler.transform(X[train_idx]),
+                y[train_idx],
+                scaler.transform(X[test_idx]),
+                y[test_idx],
+            )
+        )
+
+    return folds
+
+
+def candidate_grid(max_features=len(CANDIDATE_FEATURES)):
+    """
+    All ridge and MLP candidates over every feature subset.
+    """
+
+    subsets = [
+        subset
+        for size in range(1, max_features + 1)
+        for subset in itertools.combinations(CANDIDATE_FEATURES, size)
+    ]
+
+    candidates = []
+    for features in subsets:
+        for alpha in RIDGE_ALPHAS:
+            candidates.append(
+                {"model": "ridge", "features": features, "params": {"alpha": alpha}}
+            )
+        for hidden, alpha in itertools.product(MLP_ARCHITECTURES, MLP_ALPHAS):
+            candidates.append(
+                {
+                    "model": "mlp",
+                    "features": features,
+                    "params": {"hidden_layer_sizes": hidden, "alpha": alpha},
+                }
+            )
+
+    return candidates
+
+
+def _init_worker(folds):
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(1)
+    _folds[:] = folds
+
+
+def evaluate(candidate, budget=None, folds=None):
+    """
+    Held-out error of one candidate over all folds.
+
+    Parameters
+    ----------
+    candidate: dict
+        Entry of candidate_grid.
+    budget: int, optional
+        max_iter for MLPs.
+    folds: list, optional
+        Folds from build_folds. Defaults to the worker's cached folds.
+
+    Returns
+    -------
+    dict
+        'rmse' and 'mae' of all held-out predictions.
+    """
+
+    import warnings
+    from sklearn.exceptions import ConvergenceWarning
+    from sklearn.linear_model import Ridge
+    from sklearn.neural_network import MLPRegressor
+
+    columns = [CANDIDATE_FEATURES.index(f) for f in candidate["features"]]
+    errors = []
+    for X_train, y_train, X_test, y_test in folds or _folds:
+        if candidate["model"] == "ridge":
+            model = Ridge(**candidate["params"])
+        else:
+            model = MLPRegressor(
+                max_iter=budget,
+                early_stopping=True,
+                n_iter_no_change=20,
+                random_state=42,
+                **candidate["params"],
+            )
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", ConvergenceWarning)
+            model.fit(X_train[:, columns], y_train)
+        errors.append(model.predict(X_test[:, columns]) - y_test)
+
+    errors = np.concatenate(errors)
+
+    return {
+        "rmse": float(np.sqrt(np.mean(errors**2))),
+        "mae": float(np.mean(np.abs(errors))),
+    }
+
+
+def successive_halving(candidates, folds, budgets=BUDGETS, eta=3, workers=None):
+    """
+    Scores candidates, pruning MLPs by successive halving.
+
+    Returns
+    -------
+    pd.DataFrame
+        Leaderboard with one row per candidate, best first. Candidates that
+        reached the final budget are ranked ahead of pruned ones.
+    """
+
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        initializer=_init_worker,
+        initargs=(folds,),
+    ) as pool:
+        ridge = [c for c in candidates if c["model"] == "ridge"]
+        for candidate, score in zip(ridge, pool.map(evaluate, ridge)):
+            results.append(
+                {**_describe(candidate), **score, "max_iter": None, "pruned": False}
+            )
+
+        survivors = [c for c in candidates if c["model"] == "mlp"]
+        for rung, budget in enumerate(budgets):
+            scores = list(pool.map(evaluate, survivors, [budget] * len(survivors)))
+            order = np.argsort([s["rmse"] for s in scores])
+            final = rung == len(budgets) - 1
+            keep = len(order) if final else max(1, int(np.ceil(len(order) / eta)))
+
+            for rank, i in enumerate(order):
+                if rank >= keep or final:
+                    results.append(
+                        {
+                            **_describe(survivors[i]),
+                            **scores[i],
+                            "max_iter": budget,
+                            "pruned": not final,
+                        }
+                    )
+            survivors = [survivors[i] for i in order[:keep]]
+
+    leaderboard = pd.DataFrame(results)
+    leaderboard["pruned"] = leaderboard["pruned"].astype(bool)
+    leaderboard["max_iter"] = leaderboard["max_iter"].astype("Int64")
+
+    return leaderboard.sort_values(["pruned", "rmse"], ignore_index=True)
+
+
+def _describe(candidate):
+    return {
+        "model": candidate["model"],
+        "features": ",".join(candidate["features"]),
+        "params": str(candidate["params"]),
+    }
+
+
+def main():
+    """Main CLI function."""
+    parser = argparse.ArgumentParser(
+        description="Search race-prediction models on run-grouped folds"
+    )
+    parser.add_argument(
+        "--data", default="./model_data/mile_data.csv", help="Training miles CSV"
+    )
+    parser.add_argument(
+        "--folds", type=int, default=5, help="Number of run-grouped folds"
+    )
+    parser.add_argument(
+        "--max-features",
+        type=int,
+        default=len(CANDIDATE_FEATURES),
+        help="Largest feature subset to try",
+    )
+    parser.add_argument(
+        "--sample",
+        type=int,
+        default=None,
+        help="Randomly sample this many candidates from the grid (default: all)",
+    )
+    parser.add_argument(
+        "--eta", type=int, default=3, help="Successive halving rate (default: 3)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Worker processes (default: all)"
+    )
+    parser.add_argument(
+        "--output", default="model_leaderboard.csv", help="Leaderboard CSV"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Sampling seed")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data)
+    folds = build_folds(df, args.folds)
+
+    candidates = candidate_grid(args.max_features)
+    if args.sample and args.sample < len(candidates):
+        rng = np.random.default_rng(args.seed)
+        picked = rng.choice(len(candidates), size=args.sample, replace=False)
+        candidates = [candidates[i] for i in sorted(picked)]
+    print(f"Evaluating {len(candidates)} candidates on {len(folds)} folds")
+
+    leaderboard = successive_halving(
+        candidates, folds, eta=args.eta, workers=args.workers
+    )
+    leaderboard.to_csv(args.output, index=False)
+    print(leaderboard.head(15).round(4).to_string())
+    print(f"Saved to: {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -25,7 +25,10 @@ for run_type in run_types:
 
 rows = []
 for run_date, df in all_runs.items():
-    df["mile_group"] = np.floor(df["distance"]).astype(int)
+    if "mile_group" not in df:
+        df["mile_group"] = np.floor(df["distance"]).astype(int)
+    if "elevation_diff" not in df:
+        df["elevation_diff"] = df["elevation"].diff()
     total_miles = df["mile_group"].max() + 1
     surface = df["surface"][0]
     grouper = df.groupby("mile_group")
@@ -36,7 +39,7 @@ for run_date, df in all_runs.items():
         avg_pace = mile_df["pace"].mean()
         avg_hr = mile_df["hr"].mean()
         avg_elevation = mile_df["elevation"].mean()
-        elevation_diff = mile_df["elevation"].diff()
+        elevation_diff = mile_df["elevation_diff"].iloc[1:]  # within this mile
         elevation_gain = elevation_diff[elevation_diff > 0].sum()
         elevation_loss = -elevation_diff[elevation_diff < 0].sum()
         net_elevation = elevation_gain - elevation_loss
@@ -53,6 +56,7 @@ for run_date, df in all_runs.items():
                 "mile": mile,
                 "total_miles": total_miles,
                 "surface": surface,
+                "run": run_date,
             }
         )
 
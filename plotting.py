@@ -0,0 +1,198 @@
+"""
+Plotting helpers for dense second-by-second data.
+
+Large point clouds are aggregated once with aggregate_cloud and then drawn on
+any number of axes with draw_cloud, so render time is bounded by the number of
+bins (or kept points) rather than the number of samples. Set MPLBACKEND=Agg to
+render headless; show_or_save then writes PNGs instead of opening windows.
+matplotlib is only imported when drawing, so aggregating clouds stays cheap.
+"""
+
+import numpy as np
+
+PLOT_MODES = ["scatter", "downsample", "hist2d", "hexbin"]
+NON_INTERACTIVE_BACKENDS = ["agg", "cairo", "pdf", "pgf", "ps", "svg", "template"]
+
+
+def downsample_indices(n, max_points):
+    """
+    Evenly strided indices keeping at most max_points of n samples.
+
+    Deterministic, so repeated renders of the same data are identical.
+    """
+
+    if n <= max_points:
+        return np.arange(n)
+
+    return np.unique(np.linspace(0, n - 1, max_points).astype(int))
+
+
+def aggregate_cloud(x, y, mode="hist2d", bins=60, extent=None, max_points=5000):
+    """
+    Aggregates an (x, y) point cloud for fast repeated drawing.
+
+    Parameters
+    ----------
+    x, y: array-like
+        Point coordinates. NaN points are dropped.
+    mode: str
+        One of PLOT_MODES. 'scatter' keeps every point, 'downsample' keeps at
+        most max_points, 'hist2d' and 'hexbin' reduce to a 2-D density.
+    bins: int
+        Number of bins per axis for 'hist2d' (hexagon grid size for 'hexbin').
+    extent: tuple, optional
+        (xmin, xmax, ymin, ymax). Defaults to the data range. Use the axes
+        limits so clouds drawn on shared axes line up.
+    max_points: int
+        Point budget for 'downsample'.
+
+    Returns
+    -------
+    dict
+        Aggregated cloud to pass to draw_cloud.
+    """
+
+    if mode not in PLOT_MODES:
+        raise ValueError(f"Unknown plot mode '{mode}', expected one of {PLOT_MODES}")
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x = x[valid]
+    y = y[valid]
+
+    if extent is None:
+        if len(x):
+            extent = (x.min(), x.max(), y.min(), y.max())
+        else:
+            extent = (0.0, 1.0, 0.0, 1.0)
+
+    cloud = {"mode": mode, "extent": extent, "bins": bins}
+
+    if mode == "scatter":
+        cloud["x"], cloud["y"] = x, y
+    elif mode == "downsample":
+        keep = downsample_indices(len(x), max_points)
+        cloud["x"], cloud["y"] = x[keep], y[keep]
+    else:
+        # hexbin is drawn from a finer rectangular histogram so the raw
+        # samples are only touched once
+        n_bins = bins if mode == "hist2d" else bins * 4
+        counts, xedges, yedges = np.histogram2d(
+            x, y, bins=n_bins, range=[extent[:2], extent[2:]]
+        )
+        cloud["counts"], cloud["xedges"], cloud["yedges"] = counts, xedges, yedges
+
+    return cloud
+
+
+def _single_color_cmap(color):
+    """
+    Colormap fading from transparent to the given color.
+    """
+
+    from matplotlib.colors import LinearSegmentedColormap, to_rgba
+
+    rgba = to_rgba(color)
+    transparent = (rgba[0], rgba[1], rgba[2], 0.0)
+
+    return LinearSegmentedColormap.from_list(f"fade_{color}", [transparent, rgba])
+
+
+def draw_cloud(ax, cloud, color="gray", marker="o", alpha=0.7, label=None, s=4):
+    """
+    Draws an aggregated cloud on ax.
+
+    Returns
+    -------
+    matplotlib artist
+        Handle suitable for a legend. Density modes return a proxy marker.
+    """
+
+    from matplotlib.lines import Line2D
+
+    mode = cloud["mode"]
+
+    if mode in ["scatter", "downsample"]:
+        return ax.scatter(
+            cloud["x"],
+            cloud["y"],
+            color=color,
+            marker=marker,
+            alpha=alpha,
+            label=label,
+            s=s,
+            rasterized=True,
+        )
+
+    counts = cloud["counts"]
+    cmap = _single_color_cmap(color)
+
+    if mode == "hist2d":
+        masked = np.ma.masked_equal(counts.T, 0)
+        ax.pcolormesh(cloud["xedges"], cloud["yedges"], masked, cmap=cmap, alpha=alpha)
+    else:
+        xcenters = (cloud["xedges"][:-1] + cloud["xedges"][1:]) / 2
+        ycenters = (cloud["yedges"][:-1] + cloud["yedges"][1:]) / 2
+        xx, yy = np.meshgrid(xcenters, ycenters, indexing="ij")
+        occupied = counts > 0
+        ax.hexbin(
+            xx[occupied],
+            yy[occupied],
+            C=counts[occupied],
+            reduce_C_function=np.sum,
+            gridsize=cloud["bins"],
+            extent=cloud["extent"],
+            cmap=cmap,
+            alpha=alpha,
+            mincnt=1,
+        )
+
+    return Line2D(
+        [], [], color=color, marker=marker, linestyle="", alpha=alpha, label=label
+    )
+
+
+def plot_cloud(
+    ax,
+    x,
+    y,
+    mode="hist2d",
+    color="gray",
+    marker="o",
+    alpha=0.7,
+    label=None,
+    **aggregate_kwargs,
+):
+    """
+    Aggregates and draws a cloud in one call, for clouds drawn only once.
+    """
+
+    cloud = aggregate_cloud(x, y, mode=mode, **aggregate_kwargs)
+
+    return draw_cloud(ax, cloud, color=color, marker=marker, alpha=alpha, label=label)
+
+
+def is_headless():
+    """
+    True when matplotlib is using a non-interactive backend (e.g. MPLBACKEND=Agg).
+    """
+
+    import matplotlib.pyplot as plt
+
+    return plt.get_backend().lower() in NON_INTERACTIVE_BACKENDS
+
+
+def show_or_save(fig, filename, dpi=300):
+    """
+    Shows the figure interactively, or saves it to filename when headless.
+    """
+
+    import matplotlib.pyplot as plt
+
+    if is_headless():
+        fig.savefig(filename, dpi=dpi)
+        print(f"Saved to: {filename}")
+        plt.close(fig)
+    else:
+        plt.show()
@@ -1,18 +1,24 @@
 #!/usr/bin/env python
 """
 CLI tool for processing Garmin .fit running files into cleaned CSV data.
+
+geopandas, shapely and python-dotenv are only imported when filtering to a
+region, so unfiltered conversions (e.g. cron-driven ingest of single files)
+start up with just pandas and numpy.
 """
 
 import os
 import argparse
+import functools
 import pandas as pd
-import geopandas as gpd
 import numpy as np
-import fitdecode
-from shapely.geometry import Polygon
-from dotenv import load_dotenv
 from pathlib import Path
 
+from data_handling import add_derived_channels
+from fit_decoder import read_records
+
+BBOX_VARS = ["minx", "miny", "maxx", "maxy"]
+
 
 def semicircle_to_degrees(semicircle_val):
     if semicircle_val is None:
@@ -22,14 +28,47 @@ def semicircle_to_degrees(semicircle_val):
 
 
 def meters_per_sec_to_min_per_mile(pace_m_per_s):
-    if pace_m_per_s == 0.0:
-        return 0.0
+    speed = np.asarray(pace_m_per_s, dtype=float)
+    with np.errstate(divide="ignore"):
+        pace = np.where(speed == 0.0, 0.0, np.round(1 / (speed * 60 / 1609), 2))
+
+    return pace if pace.ndim else float(pace)
+
+
+@functools.lru_cache(maxsize=None)
+def load_bbox():
+    """
+    Bounding box of the running area from the environment or a .env file.
+
+    Loaded once per process.
+
+    Returns
+    -------
+    tuple
+        (minx, miny, maxx, maxy) as floats.
+    """
+
+    from dotenv import load_dotenv
 
-    return round(1 / (pace_m_per_s * 60 / 1609), 2)
+    load_dotenv()
+    missing_vars = [var for var in BBOX_VARS if not os.getenv(var)]
+    if missing_vars:
+        raise ValueError(
+            f"Missing required environment variables: {', '.join(missing_vars)}"
+        )
+
+    return tuple(float(os.getenv(var)) for var in BBOX_VARS)
 
 
 def process_fit_file(
-    fit_file_path, run_type="base", filter_run=False, output_dir="~./data"
+    fit_file_path,
+    run_type="base",
+    filter_run=False,
+    output_dir="~./data",
+    derived=False,
+    decoder="fitdecode",
+    bbox=None,
+    gps_dir=None,
 ):
     """
     Process a .fit file and save as cleaned CSV
@@ -39,75 +78,69 @@ def process_fit_file(
         run_type (str): Type of run (ex: 'base', 'tempo', etc). Adds type of run to filename.
         filter_run (bool): Whether to filter run to a specific geographical region
         output_dir (str): Directory to save the output file
+        derived (bool): Whether to also store derived channels and cleaning flags
+            (see data_handling.add_derived_channels)
+        decoder (str): 'fitdecode', or 'native' for the faster NumPy decoder in
+            fit_decoder.py (falls back to fitdecode for unsupported files)
+        bbox (tuple): (minx, miny, maxx, maxy) for filter_run, defaults to
+            load_bbox()
+        gps_dir (str): Optional folder to keep the (filtered) positions in, as
+            a compact track aligned with the CSV rows (see gps_store.py)
+
+    Returns:
+        str: Path of the saved CSV, or None if nothing was saved
     """
-    run_df = pd.DataFrame(
-        columns=["timestamp", "lat", "lon", "pace", "hr", "distance", "elevation"]
-    )
-
     # Load .fit files
     print(f"Processing {fit_file_path}...")
-    with fitdecode.FitReader(fit_file_path) as fitfile:
-        index = 0
-        for frame in fitfile:
-            if frame.frame_type == fitdecode.FIT_FRAME_DATA and frame.name == "record":
-                data = {field.name: field.value for field in frame.fields}
-
-                if not all(
-                    key in data
-                    for key in [
-                        "timestamp",
-                        "position_lat",
-                        "position_long",
-                        "enhanced_speed",
-                        "heart_rate",
-                        "distance",
-                        "enhanced_altitude",
-                    ]
-                ):
-                    continue
-
-                row = {
-                    "timestamp": data["timestamp"],
-                    "lat": semicircle_to_degrees(data["position_lat"]),
-                    "lon": semicircle_to_degrees(data["position_long"]),
-                    "pace": meters_per_sec_to_min_per_mile(data["enhanced_speed"]),
-                    "hr": data["heart_rate"],
-                    "distance": round(data["distance"] / 1609, 5),
-                    "elevation": round(data["enhanced_altitude"] * 3.28),
-                }
-                run_df.loc[index] = row
-                index += 1
+    records = read_records(fit_file_path, decoder)
+
+    run_df = pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime(records["timestamp"]).tz_localize("UTC"),
+            "lat": semicircle_to_degrees(records["position_lat"]),
+            "lon": semicircle_to_degrees(records["position_long"]),
+            "pace": meters_per_sec_to_min_per_mile(records["enhanced_speed"]),
+            "hr": pd.array(records["heart_rate"], dtype="Int64"),
+            "distance": np.round(records["distance"] / 1609, 5),
+            "elevation": pd.array(
+                np.round(records["enhanced_altitude"] * 3.28), dtype="Int64"
+            ),
+        }
+    )
 
     if run_df.empty:
         print("Warning: No valid data found in .fit file")
-        return
-
-    run_gdf = gpd.GeoDataFrame(
-        run_df, geometry=gpd.points_from_xy(run_df.lon, run_df.lat)
-    )
+        return None
 
     if filter_run:
-        # Load environment variables for bounding box
-        load_dotenv()
-        minx = os.getenv("minx")
-        miny = os.getenv("miny")
-        maxx = os.getenv("maxx")
-        maxy = os.getenv("maxy")
-
-        bbox = Polygon(
+        import geopandas as gpd
+        from shapely.geometry import Polygon
+
+        minx, miny, maxx, maxy = bbox or load_bbox()
+        area = Polygon(
             [(minx, miny), (minx, maxy), (maxx, maxy), (maxx, miny), (minx, miny)]
         )
 
         # Filter data to valid running area
-        run_gdf = run_gdf[run_gdf.geometry.within(bbox)]
+        points = gpd.points_from_xy(run_df.lon, run_df.lat)
+        run_df = run_df[gpd.GeoSeries(points, index=run_df.index).within(area)]
 
-        if run_gdf.empty:
+        if run_df.empty:
             print("Warning: No data points found within the specified running area")
 
-    df = pd.DataFrame(run_gdf.drop(columns=["lat", "lon", "geometry"]))
-    df = df.reset_index(level=0, drop=True)
+    df = run_df.drop(columns=["lat", "lon"]).reset_index(drop=True)
     date_str = df.loc[0, "timestamp"].strftime("%Y%m%d")
 
+    if gps_dir:
+        from gps_store import save_track
+
+        Path(gps_dir).mkdir(parents=True, exist_ok=True)
+        track_path = os.path.join(gps_dir, f"{date_str}_{run_type}.npz")
+        save_track(track_path, run_df["lat"].values, run_df["lon"].values)
+
+    if derived:
+        df = add_derived_channels(df)
+
     filename = f"{date_str}_{run_type}.csv"
 
     output_path = Path(output_dir)
@@ -119,6 +152,9 @@ def process_fit_file(
         print(f"Saved to: {full_path}")
     except:  # noqa: E722
         print("Warning: File not saved.")
+        return None
+
+    return full_path
 
 
 def main():
@@ -148,6 +184,29 @@ def main():
         help="Filter run to include data within specified region",
     )
 
+    parser.add_argument(
+        "--derived",
+        action="store_true",
+        help="Also store derived channels (elapsed/diff times, mile groups, "
+        "elevation diffs) and cleaning flags",
+    )
+
+    parser.add_argument(
+        "--decoder",
+        choices=["fitdecode", "native"],
+        default="fitdecode",
+        help="FIT decoder; 'native' is faster and falls back to fitdecode "
+        "for files it does not support (default: fitdecode)",
+    )
+
+    parser.add_argument(
+        "--gps",
+        default=None,
+        metavar="DIR",
+        help="Keep the positions in a private, compact track store in DIR "
+        "(see gps_store.py); they are never written to the CSV",
+    )
+
     parser.add_argument(
         "--output",
         default="./data",
@@ -164,19 +223,26 @@ def main():
     if not args.fit_file.lower().endswith(".fit"):
         print("Warning: File doesn't have .fit extension")
 
-    load_dotenv()
-    required_env_vars = ["minx", "miny", "maxx", "maxy"]
-    missing_vars = [var for var in required_env_vars if not os.getenv(var)]
-
-    if missing_vars:
-        print(
-            f"Error: Missing required environment variables: {', '.join(missing_vars)}"
-        )
-        print("Please set these in your .env file")
-        return 1
+    bbox = None
+    if args.filter:
+        try:
+            bbox = load_bbox()
+        except ValueError as e:
+            print(f"Error: {e}")
+            print("Please set these in your .env file")
+            return 1
 
     try:
-        process_fit_file(args.fit_file, args.type, args.filter, args.output)
+        process_fit_file(
+            args.fit_file,
+            args.type,
+            args.filter,
+            args.output,
+            args.derived,
+            args.decoder,
+            bbox,
+            args.gps,
+        )
         return 0
     except Exception as e:
         print(f"Error processing file: {e}")
@@ -0,0 +1,292 @@
+#!/usr/bin/env python
+"""
+Leave-one-run-out cross-validation of the race-prediction models.
+
+Consecutive miles of a run are correlated, so every fold holds out all miles
+of one run. The linear model (as in race_prediction.py) is fitted once on
+all miles: each fold only subtracts the held-out run's X^T X and X^T y and
+solves the small normal equations, instead of refitting. The MLP folds are
+trained in parallel in a process pool, each on its own scaled training set.
+The nearest-neighbor model (mile_neighbors.py) builds one index per fold
+from the training runs.
+
+Errors are predicted minus actual pace (min/mi). Per run, 'total_error' is
+the error in minutes over the whole run, the quantity a race-time prediction
+gets wrong.
+
+    python race_cv.py --models linear mlp
+"""
+
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from model_search import run_groups
+
+FEATURES = ["net_elevation", "altitude", "hr"]
+MLP_PARAMS = {
+    "hidden_layer_sizes": (32, 16),
+    "activation": "relu",
+    "solver": "adam",
+    "max_iter": 1000,
+    "random_state": 42,
+}
+
+
+def loro_linear(X, y, groups, alpha=0.0):
+    """
+    Leave-one-group-out predictions of a linear model by downdating.
+
+    Parameters
+    ----------
+    X: np.ndarray
+        Features, shape (n, p). An intercept is added.
+    y: np.ndarray
+        Targets.
+    groups: np.ndarray
+        Group (run) of every row.
+    alpha: float
+        L2 penalty on the coefficients (not the intercept); 0 for ordinary
+        least squares.
+
+    Returns
+    -------
+    np.ndarray
+        Out-of-fold prediction of every row.
+    """
+
+    Xa = np.column_stack([np.ones(len(X)), X])
+    gram = Xa.T @ Xa
+    moment = Xa.T @ y
+    penalty = alpha * np.diag(np.r_[0.0, np.ones(X.shape[1])])
+
+    predictions = np.empty(len(y))
+    for group in np.unique(groups):
+        held_out = groups == group
+        Xg = Xa[held_out]
+        coef = np.linalg.solve(gram - Xg.T @ Xg + penalty, moment - Xg.T @ y[held_out])
+        predictions[held_out] = Xg @ coef
+
+    return predictions
+
+
+def _init_worker():
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(1)
+
+
+def _mlp_fold(X_train, y_train, X_test, mlp_params):
+    """
+    Fits the scaler and MLP on one fold's training runs and predicts the
+    held-out run.
+    """
+
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.neural_network import MLPRegressor
+
+    scaler = StandardScaler().fit(X_train)
+    mlp = MLPRegressor(**mlp_params)
+    mlp.fit(scaler.transform(X_train), y_train)
+
+    return mlp.predict(scaler.transform(X_test))
+
+
+def loro_mlp(X, y, groups, workers=None, **mlp_params):
+    """
+    Leave-one-group-out predictions of the MLP, folds trained in parallel.
+
+    Parameters
+    ----------
+    mlp_params:
+        MLPRegressor parameters overriding MLP_PARAMS.
+
+    Returns
+    -------
+    np.ndarray
+        Out-of-fold prediction of every row.
+    """
+
+    params = {**MLP_PARAMS, **mlp_params}
+    masks = [groups == group for group in np.unique(groups)]
+
+    predictions = np.empty(len(y))
+    with ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(), initializer=_init_worker
+    ) as pool:
+        futures = [
+            pool.submit(_mlp_fold, X[~held_out], y[~held_out], X[held_out], params)
+            for held_out in masks
+        ]
+        for held_out, future in zip(masks, futures):
+            predictions[held_out] = future.result()
+
+    return predictions
+
+
+def loro_knn(df, groups, k=10):
+    """
+    Leave-one-group-out nearest-neighbor predictions (mile_neighbors.py).
+
+    Every fold builds its own index (and feature scaling) from the training
+    runs only, so the held-out run does not leak into the standardization.
+
+    Returns
+    -------
+    np.ndarray
+        Out-of-fold prediction of every row.
+    """
+
+    from mile_neighbors import MileIndex
+
+    predictions = np.empty(len(df))
+    for group in np.unique(groups):
+        held_out = groups == group
+        index = MileIndex()
+        index.add(df[~held_out])
+        predictions[held_out] = index.predict(df[held_out], k)["pace"].values
+
+    return predictions
+
+
+def fold_errors(df, predictions, groups):
+    """
+    Per-run errors of out-of-fold predictions.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per run with 'run', 'miles', 'rmse', 'mae', 'bias' and
+        'total_error' (minutes).
+    """
+
+    errors = pd.DataFrame(
+        {
+            "run": df["run"].values if "run" in df else groups,
+            "group": groups,
+            "error": predictions - df["pace"].values,
+        }
+    )
+    grouped = errors.groupby("group", sort=False)
+
+    return pd.DataFrame(
+        {
+            "run": grouped["run"].first(),
+            "miles": grouped.size(),
+            "rmse": np.sqrt(grouped["error"].apply(lambda e: np.mean(e**2))),
+            "mae": grouped["error"].apply(lambda e: np.mean(np.abs(e))),
+            "bias": grouped["error"].mean(),
+            "total_error": grouped["error"].sum(),
+        }
+    ).reset_index(drop=True)
+
+
+def aggregate_errors(folds):
+    """
+    Aggregate error over all folds of a model.
+
+    Returns
+    -------
+    dict
+        Pooled per-mile 'rmse' and 'mae', plus 'run_rmse', the RMS of the
+        per-run total errors (minutes), and the number of 'runs'.
+    """
+
+    squared = folds["rmse"] ** 2 * folds["miles"]
+    absolute = folds["mae"] * folds["miles"]
+    miles = folds["miles"].sum()
+
+    return {
+        "runs": len(folds),
+        "rmse": float(np.sqrt(squared.sum() / miles)),
+        "mae": float(absolute.sum() / miles),
+        "run_rmse": float(np.sqrt(np.mean(folds["total_error"] ** 2))),
+    }
+
+
+def cross_validate(df, models=("linear", "mlp"), features=FEATURES, workers=None):
+    """
+    Leave-one-run-out errors of the race-prediction models.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Training miles (mile_data.csv).
+    models: list
+        'linear', 'mlp' and/or 'knn'.
+    features: list
+        Model inputs.
+    workers: int, optional
+        Worker processes for the MLP folds, defaults to the number of cores.
+
+    Returns
+    -------
+    tuple
+        (per-fold DataFrame with a 'model' column, aggregate DataFrame with
+        one row per model).
+    """
+
+    X = df[features].values.astype(float)
+    y = df["pace"].values.astype(float)
+    groups = run_groups(df)
+
+    folds, totals = [], []
+    for model in models:
+        if model == "linear":
+            predictions = loro_linear(X, y, groups)
+        elif model == "mlp":
+            predictions = loro_mlp(X, y, groups, workers)
+        elif model == "knn":
+            predictions = loro_knn(df, groups)
+        else:
+            raise ValueError(f"Unknown model '{model}'")
+
+        model_folds = fold_errors(df, predictions, groups)
+        folds.append(model_folds.assign(model=model))
+        totals.append({"model": model, **aggregate_errors(model_folds)})
+
+    return pd.concat(folds, ignore_index=True), pd.DataFrame(totals)
+
+
+def main():
+    """Main CLI function."""
+    parser = argparse.ArgumentParser(
+        description="Leave-one-run-out cross-validation of race-prediction models"
+    )
+    parser.add_argument(
+        "--data", default="./model_data/mile_data.csv", help="Training miles CSV"
+    )
+    parser.add_argument(
+        "--models",
+        nargs="+",
+        choices=["linear", "mlp", "knn"],
+        default=["linear", "mlp"],
+        help="Models to validate (default: linear mlp)",
+    )
+    parser.add_argument("--features", nargs="+", default=FEATURES, help="Model inputs")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Worker processes (default: all)"
+    )
+    parser.add_argument("--output", default=None, help="Optional CSV for the folds")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data)
+    folds, totals = cross_validate(df, args.models, args.features, args.workers)
+
+    for model, model_folds in folds.groupby("model", sort=False):
+        print(f"##### {model} #####")
+        print(model_folds.drop(columns="model").round(3).to_string(index=False))
+    print("##### Aggregate #####")
+    print(totals.round(3).to_string(index=False))
+
+    if args.output:
+        folds.to_csv(args.output, index=False)
+        print(f"Saved to: {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
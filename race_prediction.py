@@ -7,6 +7,7 @@ import matplotlib.pyplot as plt
 from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import StandardScaler
 from sklearn.neural_network import MLPRegressor
+from plotting import show_or_save
 
 
 df = pd.read_csv("./model_data/mile_data.csv")
@@ -92,8 +93,7 @@ ax2.legend()
 ax2.set_title("Pace vs Net Elevation (Colored by Heart Rate)")
 
 plt.tight_layout()
-# plt.savefig("race_relationships.png", dpi=300)
-plt.show()
+show_or_save(fig, "race_relationships.png")
 
 
 ### Predict using basic linear regression with net_elevation and altitude ###
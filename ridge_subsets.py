@@ -0,0 +1,378 @@
+#!/usr/bin/env python
+"""
+Feature-subset search for the weekly ridge model of ridge_regression.py.
+
+Every subset of the candidate features (or a greedy forward path through
+them) is scored by its leave-one-out error. Ridge is a linear smoother, so
+the LOO residual of week i is r_i / (1 - h_ii) from a single fit on all
+weeks: no refits are needed.
+
+Subsets are enumerated depth first, adding one feature at a time, and each
+step only extends the Cholesky factor L of the penalized Gram matrix by one
+row. With Z = L^-1 X^T and w = L^-1 X^T y, the fitted values are Z^T w and
+the leverages are the column sums of Z^2, so adding a feature adds one row
+to Z, one entry to w and one term to the fitted values and leverages, in
+O(k n). The sweep is split across a process pool by which of the first
+SPLIT_FEATURES features a subset contains, so every task is the same size.
+
+    python ridge_subsets.py --data weekly_stats.csv --alphas 0.1 1 10
+"""
+
+import os
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+FEATURES = [
+    "total_distance",
+    "z2_time",
+    "z3_time",
+    "z4_time",
+    "z5_time",
+    "total_time",
+    "total_elevation_gain",
+    "max_altitude",
+    "time_above_6000",
+    "time_above_10000",
+    "lr_duration",
+    "max_hr",
+    "total_load",
+    "acute_load",
+    "chronic_load",
+]
+ALPHAS = [0.1, 1.0, 10.0]
+SPLIT_FEATURES = 4  # tasks per alpha: 2 ** SPLIT_FEATURES
+
+
+def standardize(X):
+    """
+    Columns scaled to zero mean and unit variance, as StandardScaler.
+    """
+
+    scale = X.std(axis=0)
+    scale[scale == 0] = 1.0
+
+    return (X - X.mean(axis=0)) / scale
+
+
+class _Path:
+    """
+    Ridge fit of a growing feature set, extended one feature at a time.
+
+    Column 0 of the design matrix is the intercept, which is always in the
+    model and is not penalized.
+    """
+
+    def __init__(self, X, y, alpha):
+        n = len(y)
+        self.X = np.column_stack([np.ones(n), X])
+        self.y = y
+        self.alpha = alpha
+        penalty = alpha * np.r_[0.0, np.ones(X.shape[1])]
+        self.gram_diag = (self.X**2).sum(axis=0) + penalty
+        self.xty = self.X.T @ y
+
+        self.columns = [0]
+        self.Z = np.full((1, n), 1 / np.sqrt(n))
+        self.w = np.array([y.sum() / np.sqrt(n)])
+        self.fitted = self.Z[0] * self.w[0]
+        self.leverage = self.Z[0] ** 2
+
+    @property
+    def features(self):
+        """
+        Indices of the features in the model (without the intercept).
+        """
+
+        return [column - 1 for column in self.columns[1:]]
+
+    def cross(self):
+        """
+        L^-1 X_S^T x_j for every column j, the new row of L when adding j.
+        """
+
+        return self.Z @ self.X
+
+    def extend(self, j, cross=None):
+        """
+        New path with feature j added, or None if it is collinear with the
+        features already in the model.
+        """
+
+        column = j + 1
+        # Off-diagonal Gram entries are unpenalized, so L^-1 G[S, j] = Z x_j
+        l = self.Z @ self.X[:, column] if cross is None else cross[:, column]
+        d2 = self.gram_diag[column] - l @ l
+        if d2 <= 1e-10 * self.gram_diag[column]:
+            return None
+        d = np.sqrt(d2)
+        z = (self.X[:, column] - l @ self.Z) / d
+        w = (self.xty[column] - l @ self.w) / d
+
+        path = _Path.__new__(_Path)
+        path.X, path.y, path.alpha = self.X, self.y, self.alpha
+        path.gram_diag, path.xty = self.gram_diag, self.xty
+        path.columns = self.columns + [column]
+        path.Z = np.vstack([self.Z, z])
+        path.w = np.append(self.w, w)
+        path.fitted = self.fitted + z * w
+        path.leverage = self.leverage + z**2
+
+        return path
+
+    def loo(self):
+        """
+        LOO residuals of the current fit.
+        """
+
+        return (self.y - self.fitted) / (1 - self.leverage)
+
+
+def _score(path, y_var):
+    residuals = path.loo()
+    mse = float(np.mean(residuals**2))
+
+    return {
+        "features": path.features,
+        "n_features": len(path.features),
+        "alpha": path.alpha,
+        "loo_mse": mse,
+        "loo_r2": 1 - mse / y_var,
+    }
+
+
+def _sweep(X, y, alpha, prefix, start, max_features):
+    """
+    Scores every subset that contains exactly the features in prefix among
+    the first start features, depth first.
+    """
+
+    y_var = float(np.var(y))
+    path = _Path(X, y, alpha)
+    for j in prefix:
+        path = path.extend(j)
+        if path is None:
+            return []  # collinear: so is every superset
+
+    rows = [_score(path, y_var)] if prefix else []
+    stack = [(path, start)]
+    while stack:
+        path, first = stack.pop()
+        if len(path.features) >= max_features:
+            continue
+        cross = path.cross()
+        for j in range(first, X.shape[1]):
+            child = path.extend(j, cross)
+            if child is None:
+                continue
+            rows.append(_score(child, y_var))
+            stack.append((child, j + 1))
+
+    return rows
+
+
+def exhaustive_search(
+    df, features=FEATURES, alphas=ALPHAS, max_features=None, workers=None
+):
+    """
+    LOO error of every feature subset for every alpha.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Weekly table with the feature columns and 'pace' (weekly_stats.csv).
+        Weeks missing any of them are left out.
+    features: list
+        Candidate features, e.g. from candidate_features. Features are
+        standardized over all weeks, as in ridge_regression.py.
+    alphas: list
+        Ridge penalties.
+    max_features: int, optional
+        Largest subset size, defaults to all features.
+    workers: int, optional
+        Worker processes, defaults to the number of cores. 1 runs in this
+        process.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per (subset, alpha), ranked by 'loo_mse', with 'rank',
+        'features' (comma separated), 'n_features', 'alpha', 'loo_mse',
+        'loo_rmse' and 'loo_r2'. Subsets with collinear features are left
+        out.
+    """
+
+    X, y = _data(df, features)
+    if max_features is None:
+        max_features = len(features)
+    # Every include/exclude pattern of the first features is one task, so
+    # all tasks hold the same number of subsets
+    start = min(SPLIT_FEATURES, len(features))
+    prefixes = [
+        [j for j in range(start) if mask >> j & 1]
+        for mask in range(2**start)
+        if bin(mask).count("1") <= max_features
+    ]
+    tasks = [
+        (X, y, alpha, prefix, start, max_features)
+        for alpha in alphas
+        for prefix in prefixes
+    ]
+
+    if workers == 1:
+        parts = [_sweep(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            parts = list(pool.map(_sweep, *zip(*tasks)))
+
+    return _table(itertools.chain.from_iterable(parts), features)
+
+
+def greedy_path(df, features=FEATURES, alpha=1.0):
+    """
+    Forward selection: starting from no features, repeatedly adds the
+    feature that lowers the LOO error most.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per step, in order, with the columns of exhaustive_search
+        and 'step' in place of 'rank'.
+    """
+
+    X, y = _data(df, features)
+    y_var = float(np.var(y))
+    path = _Path(X, y, alpha)
+    rows = []
+    while len(path.features) < len(features):
+        candidates = [
+            path.extend(j) for j in range(len(features)) if j not in path.features
+        ]
+        scored = [(_score(c, y_var), c) for c in candidates if c is not None]
+        if not scored:
+            break
+        row, path = min(scored, key=lambda pair: pair[0]["loo_mse"])
+        rows.append(row)
+
+    return _table(rows, features, ranked=False)
+
+
+def candidate_features(df, features=FEATURES):
+    """
+    The features present in df that are not constant over the weeks.
+    """
+
+    return [f for f in features if f in df and df[f].nunique(dropna=False) > 1]
+
+
+def complete_weeks(df, features):
+    """
+    The weeks with every feature and 'pace' present. A week without base
+    runs has no pace in weekly_stats.csv.
+    """
+
+    return df.dropna(subset=list(features) + ["pace"])
+
+
+def _data(df, features):
+    df = complete_weeks(df, features)
+    if len(df) < 3:
+        raise ValueError(f"Only {len(df)} weeks have every feature and pace")
+    X = standardize(df[features].to_numpy(dtype=float))
+    y = df["pace"].to_numpy(dtype=float)
+
+    return X, y
+
+
+def _table(rows, features, ranked=True):
+    table = pd.DataFrame(
+        rows, columns=["features", "n_features", "alpha", "loo_mse", "loo_r2"]
+    )
+    table["features"] = [
+        ",".join(features[j] for j in sorted(columns)) for columns in table["features"]
+    ]
+    table["loo_rmse"] = np.sqrt(table["loo_mse"])
+    order = "rank" if ranked else "step"
+    if ranked:
+        table = table.sort_values(
+            ["loo_mse", "n_features"], kind="stable", ignore_index=True
+        )
+    table.insert(0, order, np.arange(1, len(table) + 1))
+
+    return table[
+        [order, "features", "n_features", "alpha", "loo_mse", "loo_rmse", "loo_r2"]
+    ]
+
+
+def main():
+    """Main CLI function."""
+    parser = argparse.ArgumentParser(
+        description="LOO feature-subset search for the weekly ridge model"
+    )
+    parser.add_argument("--data", default="weekly_stats.csv", help="Weekly stats CSV")
+    parser.add_argument(
+        "--features", nargs="+", default=None, help="Candidate features (default: all)"
+    )
+    parser.add_argument(
+        "--alphas",
+        nargs="+",
+        type=float,
+        default=ALPHAS,
+        help="Ridge penalties (default: 0.1 1 10)",
+    )
+    parser.add_argument(
+        "--greedy",
+        action="store_true",
+        help="Forward greedy path instead of every subset (first alpha only)",
+    )
+    parser.add_argument(
+        "--max-features", type=int, default=None, help="Largest subset size"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Worker processes (default: all)"
+    )
+    parser.add_argument("--top", type=int, default=20, help="Rows to print")
+    parser.add_argument("--output", default=None, help="Optional CSV for the table")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.data):
+        print(f"Error: File '{args.data}' not found")
+        return 1
+
+    df = pd.read_csv(args.data)
+    features = candidate_features(df, args.features or FEATURES)
+    skipped = [f for f in args.features or FEATURES if f not in features]
+    if skipped:
+        print(f"Skipping missing or constant features: {', '.join(skipped)}")
+    if not features:
+        print("Error: no usable features")
+        return 1
+    weeks = len(complete_weeks(df, features))
+    if weeks < len(df):
+        print(f"Skipping {len(df) - weeks} weeks with missing features or pace")
+
+    try:
+        if args.greedy:
+            table = greedy_path(df, features, args.alphas[0])
+        else:
+            table = exhaustive_search(
+                df, features, args.alphas, args.max_features, args.workers
+            )
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+
+    print(f"Scored {len(table)} subsets of {len(features)} features on {weeks} weeks")
+    print(table.head(args.top).to_string(index=False, float_format="{:.4g}".format))
+
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f"Saved to: {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
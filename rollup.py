@@ -0,0 +1,98 @@
+"""
+Declared rollups of per-run tables into daily and weekly tables.
+
+A rollup is a dict of output column -> (input column, aggregation), applied
+with a single grouped aggregation instead of looping over groups. Weeks are
+keyed by (ISO year, ISO week) so seasons spanning new year do not merge
+week 1 of one year with week 1 of the next, and tables rolled up separately
+(weekly stats, weekly load, weekly pace) are joined on those keys rather
+than by position.
+
+    weekly = weekly_rollup(run_stats, WEEKLY_STATS)
+    weekly = join_weeks(weekly, weekly_rollup(load_df, WEEKLY_LOAD, "Date"))
+"""
+
+import pandas as pd
+
+WEEK_KEYS = ["year", "week"]
+
+# weekly_stats.csv: totals, peaks and the longest run of each week
+WEEKLY_STATS = {
+    "total_distance": ("total_distance", "sum"),
+    "z2_time": ("z2_time", "sum"),
+    "z3_time": ("z3_time", "sum"),
+    "z4_time": ("z4_time", "sum"),
+    "z5_time": ("z5_time", "sum"),
+    "total_time": ("total_time", "sum"),
+    "total_elevation_gain": ("total_elevation_gain", "sum"),
+    "max_altitude": ("max_altitude", "max"),
+    "time_above_6000": ("time_above_6000", "sum"),
+    "time_above_10000": ("time_above_10000", "sum"),
+    "lr_duration": ("total_time", "max"),
+    "max_hr": ("max_hr", "max"),
+    "total_load": ("total_load", "sum"),
+}
+
+# Mean daily acute/chronic load of each week (load.csv columns)
+WEEKLY_LOAD = {
+    "acute_load": ("Acute Load", "mean"),
+    "chronic_load": ("Chronic Load", "mean"),
+}
+
+
+def add_week_keys(df, date_column="date"):
+    """
+    Adds ISO 'year' and 'week' columns computed from date_column.
+    """
+
+    iso = pd.to_datetime(df[date_column]).dt.isocalendar()
+
+    return df.assign(year=iso["year"].astype(int), week=iso["week"].astype(int))
+
+
+def rollup(df, keys, aggregations):
+    """
+    Applies declared aggregations per group in one grouped aggregation.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Input rows (e.g. one per run).
+    keys: list
+        Grouping columns.
+    aggregations: dict
+        Output column -> (input column, aggregation name or function).
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per group, sorted by keys, with the key columns first.
+    """
+
+    return df.groupby(keys, as_index=False, sort=True).agg(**aggregations)
+
+
+def daily_rollup(df, aggregations, date_column="date"):
+    """
+    Rolls rows up per calendar day.
+    """
+
+    days = pd.to_datetime(df[date_column]).dt.normalize()
+
+    return rollup(df.assign(**{date_column: days}), [date_column], aggregations)
+
+
+def weekly_rollup(df, aggregations, date_column="date"):
+    """
+    Rolls rows up per (ISO year, week).
+    """
+
+    return rollup(add_week_keys(df, date_column), WEEK_KEYS, aggregations)
+
+
+def join_weeks(left, right, how="left"):
+    """
+    Joins two weekly tables on (year, week).
+    """
+
+    return pd.merge(left, right, on=WEEK_KEYS, how=how)
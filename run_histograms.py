@@ -0,0 +1,316 @@
+#!/usr/bin/env python
+"""
+Duration-weighted HR and elevation histograms of every run.
+
+TRIMP, time in HR zones and time above an altitude only depend on how long a
+run spent at each HR or elevation, so each run is reduced once to the seconds
+spent at every whole bpm (HR_BINS bins) and in every 100 ft elevation band.
+The metrics are then dot products over these histograms: recomputing the
+load of every run for a new max/rest HR or new zone bounds costs
+O(runs x 256) and never reads the samples.
+
+A sample's duration is its 'time_diff', or else its gap to the previous
+timestamp from data_handling.time_diffs, so a gap touching a missing
+timestamp counts as zero. HR is rounded to whole bpm and elevation bands are
+[k * 100, (k + 1) * 100) ft, so zone times, TRIMP and time above any
+multiple of 100 ft match the sample-based metrics.
+
+    histograms = RunHistograms(RunStore("store"))
+    histograms.update()
+    stats = histograms.run_stats(load_athlete_config("alice"))
+"""
+
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+from athletes import DEFAULT_CONFIG
+from data_handling import time_diffs
+from run_store import RunStore
+
+HR_BINS = 256  # seconds at 0 .. 255 bpm
+BAND_WIDTH = 100  # ft
+MIN_ELEVATION = -1000  # ft, lower edge of the first band
+ELEVATION_BANDS = 210  # up to 20000 ft; lower/higher samples go to the end bands
+ALTITUDES = [6000, 10000]  # ft, thresholds of compute_run_stats
+
+HISTOGRAMS_NAME = "histograms.npz"
+
+
+def sample_durations(df):
+    """
+    Seconds credited to every sample (time since the previous one, 0 first).
+    """
+
+    if "time_diff" in df:
+        durations = pd.to_numeric(pd.Series(df["time_diff"]), errors="coerce")
+        return durations.fillna(0).to_numpy(dtype=float)
+
+    return time_diffs(df["timestamp"])
+
+
+def hr_histogram(df):
+    """
+    Seconds spent at each whole bpm of a run.
+
+    Parameters
+    ----------
+    df: pd.DataFrame or dict
+        Run with 'hr' and 'timestamp' (or 'time_diff' in seconds), as from
+        load_runs or RunStore.run.
+
+    Returns
+    -------
+    np.ndarray
+        Shape (HR_BINS,). Samples without HR are not counted.
+    """
+
+    hr = np.asarray(pd.to_numeric(pd.Series(df["hr"]), errors="coerce"), dtype=float)
+    valid = ~np.isnan(hr)
+    bins = np.clip(np.rint(hr[valid]), 0, HR_BINS - 1).astype(int)
+
+    return np.bincount(
+        bins, weights=sample_durations(df)[valid], minlength=HR_BINS
+    ).astype(float)
+
+
+def elevation_histogram(df):
+    """
+    Seconds spent in each BAND_WIDTH elevation band of a run.
+
+    Returns
+    -------
+    np.ndarray
+        Shape (ELEVATION_BANDS,); band k is [MIN_ELEVATION + k * BAND_WIDTH,
+        MIN_ELEVATION + (k + 1) * BAND_WIDTH) ft.
+    """
+
+    elevation = pd.to_numeric(pd.Series(df["elevation"]), errors="coerce")
+    elevation = np.asarray(elevation, dtype=float)
+    valid = ~np.isnan(elevation)
+    edges = MIN_ELEVATION + BAND_WIDTH * np.arange(1, ELEVATION_BANDS)
+    bands = np.searchsorted(edges, elevation[valid], side="right")
+
+    return np.bincount(
+        bands, weights=sample_durations(df)[valid], minlength=ELEVATION_BANDS
+    ).astype(float)
+
+
+def hr_load(
+    hr_histograms, max_hr=DEFAULT_CONFIG["max_hr"], rest_hr=DEFAULT_CONFIG["rest_hr"]
+):
+    """
+    TRIMP from HR histograms, as compute_load.
+
+    Parameters
+    ----------
+    hr_histograms: np.ndarray
+        Shape (HR_BINS,) or (runs, HR_BINS).
+
+    Returns
+    -------
+    float or np.ndarray
+        TRIMP of every run.
+    """
+
+    hr_reserve = (np.arange(HR_BINS) - rest_hr) / (max_hr - rest_hr)
+    weights = hr_reserve * 0.64 * np.exp(hr_reserve * 1.67)
+
+    return np.asarray(hr_histograms) / 60 @ weights
+
+
+def zone_times(hr_histograms, hr_zones=None):
+    """
+    Minutes in each HR zone, as compute_time_in_zone (bounds inclusive).
+
+    Returns
+    -------
+    dict
+        '<zone>_time' -> float or np.ndarray (one per run), rounded to 3
+        decimals.
+    """
+
+    hr_zones = hr_zones or DEFAULT_CONFIG["hr_zones"]
+    cumulative = np.cumsum(np.asarray(hr_histograms), axis=-1)
+    cumulative = np.concatenate(
+        [np.zeros(cumulative.shape[:-1] + (1,)), cumulative], axis=-1
+    )
+
+    times = {}
+    for zone, (low, high) in hr_zones.items():
+        low = int(np.clip(np.ceil(low), 0, HR_BINS))
+        high = int(np.clip(np.floor(high) + 1, 0, HR_BINS))
+        seconds = cumulative[..., max(high, low)] - cumulative[..., low]
+        times[f"{zone}_time"] = np.round(seconds / 60, 3)
+
+    return times
+
+
+def altitude_times(elevation_histograms, altitudes=ALTITUDES):
+    """
+    Minutes at or above each altitude, as compute_time_above_alt.
+
+    Altitudes are rounded up to the next band edge, so they are exact for
+    multiples of BAND_WIDTH.
+
+    Returns
+    -------
+    dict
+        'time_above_<altitude>' -> float or np.ndarray, rounded to 3 decimals.
+    """
+
+    elevation_histograms = np.asarray(elevation_histograms)
+    times = {}
+    for altitude in altitudes:
+        band = int(
+            np.clip(
+                np.ceil((altitude - MIN_ELEVATION) / BAND_WIDTH), 0, ELEVATION_BANDS
+            )
+        )
+        seconds = elevation_histograms[..., band:].sum(axis=-1)
+        times[f"time_above_{altitude}"] = np.round(seconds / 60, 3)
+
+    return times
+
+
+class RunHistograms:
+    """
+    HR and elevation histograms of the runs of a RunStore.
+
+    Parameters
+    ----------
+    store: RunStore
+        Store to summarize. The histograms live in HISTOGRAMS_NAME next to
+        the store's channel files.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._path = os.path.join(store.path, HISTOGRAMS_NAME)
+
+        self.runs = np.empty(0, dtype=str)
+        self.hr = np.empty((0, HR_BINS))
+        self.elevation = np.empty((0, ELEVATION_BANDS))
+        if os.path.exists(self._path):
+            saved = np.load(self._path)
+            self.runs = saved["runs"]
+            self.hr = saved["hr"]
+            self.elevation = saved["elevation"]
+
+    def __len__(self):
+        return len(self.runs)
+
+    def update(self):
+        """
+        Histograms the runs appended to the store since the last update.
+
+        Returns
+        -------
+        int
+            Number of runs added.
+        """
+
+        new_runs = self.store.index[~self.store.index["run"].isin(self.runs)]
+        if new_runs.empty:
+            return 0
+
+        hr, elevation = [], []
+        for _, row in new_runs.iterrows():
+            samples = self.store.run(row)
+            hr.append(hr_histogram(samples))
+            elevation.append(elevation_histogram(samples))
+
+        self.runs = np.r_[self.runs, new_runs["run"].to_numpy(dtype=str)]
+        self.hr = np.vstack([self.hr] + hr)
+        self.elevation = np.vstack([self.elevation] + elevation)
+        # Written to a temporary file and renamed, so a crash mid-write
+        # leaves the previous histograms intact
+        tmp_path = self._path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, runs=self.runs, hr=self.hr, elevation=self.elevation)
+        os.replace(tmp_path, self._path)
+
+        return len(new_runs)
+
+    def select(self, start_date=None, end_date=None, type=None):
+        """
+        Store index rows and histogram rows of the matching runs.
+
+        Returns
+        -------
+        tuple
+            (index rows as pd.DataFrame, positions into self.hr and
+            self.elevation).
+        """
+
+        selected = self.store.select(
+            start_date=start_date, end_date=end_date, type=type
+        )
+        selected = selected[selected["run"].isin(self.runs)]
+        positions = pd.Index(self.runs).get_indexer(selected["run"])
+
+        return selected, positions
+
+    def run_stats(
+        self, config=DEFAULT_CONFIG, start_date=None, end_date=None, type=None
+    ):
+        """
+        HR zone times, altitude times and TRIMP of every run, as in
+        compute_run_stats, from the histograms alone.
+
+        Parameters
+        ----------
+        config: dict
+            Athlete configuration (max_hr, rest_hr, hr_zones).
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per run with 'run', 'date', 'type', '<zone>_time',
+            'time_above_<altitude>' and 'total_load'.
+        """
+
+        selected, positions = self.select(start_date, end_date, type)
+        hr = self.hr[positions]
+
+        stats = selected[["run", "date", "type"]].reset_index(drop=True)
+        for column, values in zone_times(hr, config["hr_zones"]).items():
+            stats[column] = values
+        for column, values in altitude_times(self.elevation[positions]).items():
+            stats[column] = values
+        stats["total_load"] = hr_load(hr, config["max_hr"], config["rest_hr"])
+
+        return stats
+
+
+def main():
+    """Build or update the HR and elevation histograms of a store."""
+    parser = argparse.ArgumentParser(
+        description="Build or update the HR and elevation histograms of a run store"
+    )
+    parser.add_argument(
+        "--store", default="./store", help="Store directory (default: ./store)"
+    )
+    parser.add_argument(
+        "--athlete",
+        default=None,
+        help="Print the run stats with this athlete's configuration",
+    )
+    args = parser.parse_args()
+
+    histograms = RunHistograms(RunStore(args.store))
+    added = histograms.update()
+    print(f"Histogrammed {added} runs, {len(histograms)} in total")
+
+    if args.athlete:
+        from athletes import load_athlete_config
+
+        stats = histograms.run_stats(load_athlete_config(args.athlete))
+        print(stats.round(2).to_string(index=False))
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,203 @@
+"""
+Per-run and weekly training metrics shared by the analysis scripts.
+
+HR-based metrics take the athlete's max/rest HR and zone bounds so the same
+code serves every athlete (see athletes.py). Defaults match the original
+single-athlete constants.
+"""
+
+import math
+import pandas as pd
+from athletes import DEFAULT_CONFIG
+from data_handling import add_elapsed_time, clean_base_runs
+from run_histograms import (
+    ALTITUDES,
+    altitude_times,
+    elevation_histogram,
+    hr_histogram,
+    hr_load,
+    zone_times,
+)
+from rollup import (
+    WEEK_KEYS,
+    WEEKLY_LOAD,
+    WEEKLY_STATS,
+    add_week_keys,
+    daily_rollup,
+    weekly_rollup,
+)
+
+
+def compute_time_in_zone(df, zone, hr_zones=None):
+    hr_zones = hr_zones or DEFAULT_CONFIG["hr_zones"]
+
+    return zone_times(hr_histogram(df), {zone: hr_zones[zone]})[f"{zone}_time"]
+
+
+def compute_time_above_alt(df, alt):
+    df = df.copy()
+    df = df[df["elevation"] >= alt]
+
+    total_time_min = round(df["time_diff"].sum() / 60, 3)
+
+    return total_time_min
+
+
+def compute_load(
+    df, max_hr=DEFAULT_CONFIG["max_hr"], rest_hr=DEFAULT_CONFIG["rest_hr"]
+):
+    """
+    TRIMP of a run with a 'time_diff' column in seconds.
+
+    Computed from the run's duration-weighted HR histogram (see
+    run_histograms.py).
+    """
+
+    return hr_load(hr_histogram(df), max_hr, rest_hr)
+
+
+def compute_run_stats(runs, config=DEFAULT_CONFIG):
+    """
+    Summary stats of each run, one row per run.
+
+    Parameters
+    ----------
+    runs: dict
+        Dictionary of runs as returned by load_runs.
+    config: dict
+        Athlete configuration (see athletes.load_athlete_config).
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per run, with 'date' and ISO 'year' and 'week' columns.
+    """
+
+    daily_columns = [
+        "date",
+        "total_distance",
+        "z2_time",
+        "z3_time",
+        "z4_time",
+        "z5_time",
+        "total_time",
+        "total_elevation_gain",
+        "max_altitude",
+        *[f"time_above_{altitude}" for altitude in ALTITUDES],
+        "max_hr",
+        "total_load",
+    ]
+    rows = []
+    for run_date, df in runs.items():
+        stats = {}
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        if "time_diff" not in df:
+            df["time_diff"] = df["timestamp"].diff().dt.total_seconds()
+        if "elevation_diff" not in df:
+            df["elevation_diff"] = df["elevation"].diff()
+        stats["date"] = df["timestamp"][0].date()
+        stats["total_distance"] = df["distance"].iloc[-1]
+        # Zone times, altitude times and load all come from two histograms
+        hr_counts = hr_histogram(df)
+        zones = {zone: config["hr_zones"][zone] for zone in ["z2", "z3", "z4", "z5"]}
+        stats.update(zone_times(hr_counts, zones))
+        stats["total_time"] = round(
+            (df["timestamp"].iloc[-1] - df["timestamp"].iloc[0]).total_seconds() / 60,
+            3,
+        )
+        elev_diff = df["elevation_diff"]
+        stats["total_elevation_gain"] = elev_diff[elev_diff > 0].sum()
+        stats["max_altitude"] = df["elevation"].max()
+        stats.update(altitude_times(elevation_histogram(df), ALTITUDES))
+        stats["max_hr"] = df["hr"].max()
+        stats["total_load"] = hr_load(hr_counts, config["max_hr"], config["rest_hr"])
+        rows.append(stats)
+
+    run_stats = pd.DataFrame(rows, columns=daily_columns)
+    run_stats["date"] = pd.to_datetime(run_stats["date"])
+    run_stats = add_week_keys(run_stats)
+    run_stats.sort_values(WEEK_KEYS, kind="stable", inplace=True, ignore_index=True)
+
+    return run_stats
+
+
+def compute_weekly_stats(run_stats):
+    """
+    Rolls per-run stats up into weekly totals (see rollup.WEEKLY_STATS).
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per (ISO year, week) with runs.
+    """
+
+    return weekly_rollup(run_stats, WEEKLY_STATS)
+
+
+def compute_daily_load(run_stats, fitness_tau=42, fatigue_tau=7):
+    """
+    Daily chronic (fitness) and acute (fatigue) load from per-run TRIMP.
+
+    Rest days get zero TRIMP. Values follow load.csv as written by
+    banister_modeling: each row holds the load carried into the next day and
+    the last row is NaN.
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns 'Date', 'Chronic Load' and 'Acute Load'.
+    """
+
+    daily = daily_rollup(run_stats, {"total_load": ("total_load", "sum")})
+    daily = daily.set_index("date")["total_load"]
+    date_range = pd.date_range(start=daily.index.min(), end=daily.index.max(), freq="D")
+    daily_trimp = daily.reindex(date_range, fill_value=0).values
+
+    loads = {}
+    for name, tau in [("Chronic Load", fitness_tau), ("Acute Load", fatigue_tau)]:
+        decay = math.exp(-1 / tau)
+        values = []
+        accumulated = 0
+        for trimp in daily_trimp:
+            accumulated = (accumulated + trimp) * decay
+            values.append(accumulated)
+        values[-1] = math.nan
+        loads[name] = values
+
+    return pd.DataFrame({"Date": date_range, **loads})
+
+
+def compute_weekly_load(load_df):
+    """
+    Weekly mean acute and chronic load.
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns 'year', 'week', 'acute_load' and 'chronic_load', to join with
+        the weekly stats on (year, week).
+    """
+
+    return weekly_rollup(load_df, WEEKLY_LOAD, date_column="Date")
+
+
+def compute_weekly_base_pace(base_runs):
+    """
+    Weekly mean pace of cleaned base runs.
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns 'year', 'week' and 'pace'.
+    """
+
+    dfs_list = []
+    for day, df in base_runs.items():
+        df = add_elapsed_time(df)
+        df = clean_base_runs(df)
+        dfs_list.append(df[["timestamp", "pace"]])
+
+    base_df = pd.concat(dfs_list)
+    base_df["pace"] = base_df["pace"].astype(float)
+
+    return weekly_rollup(base_df, {"pace": ("pace", "mean")}, date_column="timestamp")
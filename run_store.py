@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+"""
+Consolidated, memory-mapped store of all run samples.
+
+Each channel is one contiguous binary file holding the samples of every run
+back to back, and index.csv records where each run starts and how long it is.
+Queries return zero-copy views into the memory-mapped channels, and new runs
+are appended to the end of each file without rewriting the store.
+
+    store = RunStore("store")
+    store.build_from_folder("data")
+    runs = store.load_runs(start_date="20250602", type="base")
+    all_hr = store.channel("hr")
+"""
+
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+CHANNELS = {
+    "timestamp": "datetime64[ns]",
+    "pace": "float64",
+    "hr": "float64",
+    "distance": "float64",
+    "elevation": "float64",
+}
+INDEX_COLUMNS = ["run", "date", "type", "offset", "length"]
+
+
+def parse_run_name(filename):
+    """
+    Splits a process_fit filename ('yyyymmdd_type.csv') into (run, date, type).
+    """
+
+    run = os.path.splitext(os.path.basename(filename))[0]
+    parts = run.split("_", 1)
+    run_type = parts[1] if len(parts) > 1 else ""
+
+    return run, parts[0], run_type
+
+
+class RunStore:
+    """
+    Memory-mapped archive of run samples with a run-offset index.
+
+    Parameters
+    ----------
+    path: str
+        Directory holding one '<channel>.bin' file per channel and index.csv.
+    """
+
+    def __init__(self, path="store"):
+        self.path = path
+        self._index_path = os.path.join(path, "index.csv")
+        self._maps = {}
+
+        # A missing store reads as empty; it is only created by append_run
+        if os.path.exists(self._index_path):
+            self.index = pd.read_csv(
+                self._index_path, dtype={"run": str, "date": str, "type": str}
+            ).fillna({"type": ""})
+        else:
+            self.index = pd.DataFrame(columns=INDEX_COLUMNS)
+        self._runs = set(self.index["run"])
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, run):
+        return run in self._runs
+
+    @property
+    def n_samples(self):
+        if self.index.empty:
+            return 0
+        last = self.index.iloc[-1]
+
+        return int(last["offset"] + last["length"])
+
+    def _channel_path(self, name):
+        return os.path.join(self.path, f"{name}.bin")
+
+    def append_run(self, filename, df):
+        """
+        Appends one run to the end of every channel and to the index.
+
+        Parameters
+        ----------
+        filename: str
+            process_fit output filename, used as the run name.
+        df: pd.DataFrame
+            Run samples with (at least) the columns in CHANNELS.
+
+        Returns
+        -------
+        bool
+            False if the run was already in the store.
+        """
+
+        run, date_str, run_type = parse_run_name(filename)
+        if run in self:
+            return False
+
+        columns = {}
+        for name, dtype in CHANNELS.items():
+            if name == "timestamp":
+                values = pd.to_datetime(df[name], utc=True).dt.tz_localize(None)
+                columns[name] = values.to_numpy(dtype=dtype)
+            else:
+                values = pd.to_numeric(df[name], errors="coerce")
+                columns[name] = values.to_numpy(dtype=dtype)
+
+        os.makedirs(self.path, exist_ok=True)
+        if not os.path.exists(self._index_path):
+            pd.DataFrame(columns=INDEX_COLUMNS).to_csv(self._index_path, index=False)
+
+        # Bytes past the indexed samples are left over from an interrupted
+        # append; drop them so every channel lines up with the index again
+        offset = self.n_samples
+        self._maps = {}
+        for name, values in columns.items():
+            path = self._channel_path(name)
+            with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                f.truncate(offset * values.itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(values.tobytes())
+
+        # The index is written last: a run only exists once its row does
+        row = pd.DataFrame(
+            [[run, date_str, run_type, offset, len(df)]], columns=INDEX_COLUMNS
+        )
+        row.to_csv(self._index_path, mode="a", header=False, index=False)
+        self.index = pd.concat([self.index, row], ignore_index=True)
+        self._runs.add(run)
+        self._maps = {}
+
+        return True
+
+    def build_from_folder(self, folder="data"):
+        """
+        Appends every process_fit CSV in folder that is not yet in the store.
+
+        Returns
+        -------
+        int
+            Number of runs added.
+        """
+
+        added = 0
+        for filename in sorted(os.listdir(folder)):
+            if not filename.endswith(".csv"):
+                continue
+            if parse_run_name(filename)[0] in self:
+                continue
+            df = pd.read_csv(os.path.join(folder, filename))
+            added += self.append_run(filename, df)
+
+        return added
+
+    def channel(self, name, index=None):
+        """
+        Samples of one channel.
+
+        Parameters
+        ----------
+        name: str
+            Channel name, one of CHANNELS.
+        index: pd.DataFrame, optional
+            Subset of self.index (e.g. from select). Defaults to all runs.
+
+        Returns
+        -------
+        np.ndarray
+            A zero-copy view when the selected runs are contiguous in the
+            store (e.g. a date range of runs ingested in order), otherwise a
+            concatenated copy.
+        """
+
+        if name not in self._maps:
+            if self.n_samples == 0:
+                return np.empty(0, dtype=CHANNELS[name])
+            self._maps[name] = np.memmap(
+                self._channel_path(name),
+                dtype=CHANNELS[name],
+                mode="r",
+                shape=(self.n_samples,),
+            )
+        data = self._maps[name]
+
+        if index is None:
+            return data
+        if index.empty:
+            return data[:0]
+
+        starts = index["offset"].to_numpy(dtype=int)
+        ends = starts + index["length"].to_numpy(dtype=int)
+        if np.all(starts[1:] == ends[:-1]):
+            return data[starts[0] : ends[-1]]
+
+        return np.concatenate([data[s:e] for s, e in zip(starts, ends)])
+
+    def select(self, start_date=None, end_date=None, type=None):
+        """
+        Index rows matching load_runs-style filters.
+
+        Parameters
+        ----------
+        start_date: str, optional
+            Start date in 'yyyymmdd' format.
+        end_date: str, optional
+            End date in 'yyyymmdd' format.
+        type: str, optional
+            Type of run (e.g., 'base', 'sprint').
+
+        Returns
+        -------
+        pd.DataFrame
+            Matching rows of self.index.
+        """
+
+        mask = pd.Series(True, index=self.index.index)
+        if type:
+            mask &= self.index["type"] == type
+        if start_date:
+            mask &= self.index["date"] >= start_date
+        if end_date:
+            mask &= self.index["date"] <= end_date
+
+        return self.index[mask]
+
+    def run(self, row):
+        """
+        Zero-copy channel views of a single index row.
+
+        Returns
+        -------
+        dict
+            Channel name -> np.ndarray view.
+        """
+
+        start = int(row["offset"])
+        end = start + int(row["length"])
+
+        return {name: self.channel(name)[start:end] for name in CHANNELS}
+
+    def load_runs(self, start_date=None, end_date=None, type=None):
+        """
+        Store equivalent of data_handling.load_runs.
+
+        Returns
+        -------
+        dict
+            Keys are dates ('yyyymmdd') as in load_runs, values are dicts of
+            zero-copy channel views. Use to_frame for a DataFrame copy.
+        """
+
+        selected = self.select(start_date=start_date, end_date=end_date, type=type)
+
+        return {row["date"]: self.run(row) for _, row in selected.iterrows()}
+
+
+def to_frame(run):
+    """
+    Copies store channel views into a DataFrame shaped like load_runs output.
+    """
+
+    df = pd.DataFrame({name: np.array(values) for name, values in run.items()})
+    df["timestamp"] = df["timestamp"].dt.tz_localize("UTC")
+
+    return df
+
+
+def main():
+    """Build or update a store from a folder of process_fit CSVs."""
+    parser = argparse.ArgumentParser(
+        description="Append processed run CSVs to a memory-mapped run store"
+    )
+    parser.add_argument(
+        "--data", default="./data", help="Folder of run CSVs (default: ./data)"
+    )
+    parser.add_argument(
+        "--store", default="./store", help="Store directory (default: ./store)"
+    )
+    args = parser.parse_args()
+
+    store = RunStore(args.store)
+    added = store.build_from_folder(args.data)
+    print(f"Added {added} runs ({len(store)} runs, {store.n_samples} samples)")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,445 @@
+#!/usr/bin/env python
+"""
+Multi-resolution pre-aggregated summaries of the runs in a RunStore.
+
+Every run is reduced once to buckets at several levels (LEVELS, coarsest
+first): the whole run, each mile, 60 s and 10 s of elapsed time. A bucket
+holds, for each of pace, HR and elevation, the sum, count, min, max and the
+duration-weighted sum, plus the pace/HR sums and counts of the samples
+clean_base_runs keeps. Queries combine buckets with sums/mins/maxes, so
+pooled means, extremes and time-weighted means over runs, weeks or seasons
+are exact, and they read the coarsest level whose bucket edges line up with
+the query: a whole-run query reads one row per run, a query skipping the
+first 5 minutes reads the 60 s level, and only windows no level lines up
+with fall back to the raw samples.
+
+Durations are the gaps between consecutive timestamps, zero where either
+side is missing (data_handling.time_diffs). Time buckets are (k * width,
+(k + 1) * width] seconds of elapsed time, with the first sample in bucket 0,
+so 'elapsed_time > 5 min' is exactly the buckets from 300 s on; a sample
+without a timestamp is only in the run and mile levels.
+
+    summaries = RunSummaries(RunStore("store"))
+    summaries.update()
+    runs = summaries.aggregate(start=300, type="base")
+    trace = summaries.aggregate(channels=["hr"], width=300, start_date="20250602")
+"""
+
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+from data_handling import time_diffs
+from run_store import RunStore
+
+SUMMARY_CHANNELS = ["pace", "hr", "elevation"]
+
+# level name -> bucket width in seconds, 'mile' or None (whole run)
+LEVELS = {"run": None, "mile": "mile", "60s": 60, "10s": 10}
+
+STATS = ["sum", "count", "min", "max", "tw_sum", "duration"]
+CLEAN_COLUMNS = ["clean_pace_sum", "clean_pace_count", "clean_hr_sum", "clean_hr_count"]
+
+
+def summarize_run(samples, keys, channels=SUMMARY_CHANNELS):
+    """
+    Reduces the samples of one run to buckets.
+
+    Parameters
+    ----------
+    samples: dict
+        Channel name -> np.ndarray of the run (as from RunStore.run).
+    keys: np.ndarray
+        Bucket of every sample. Samples with a NaN key are dropped.
+    channels: list
+        Channels to summarize.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per bucket with columns 'bucket', 'samples', 'duration',
+        '<channel>_<stat>' for STATS and CLEAN_COLUMNS.
+    """
+
+    durations = time_diffs(samples["timestamp"])
+    pace = np.asarray(samples["pace"], dtype=float)
+    clean = ~((pace == 0.0) | (pace > 11.0))
+
+    columns = {"bucket": keys, "samples": 1, "duration": durations}
+    for channel in channels:
+        values = np.asarray(samples[channel], dtype=float)
+        valid = ~np.isnan(values)
+        columns[f"{channel}_sum"] = values
+        columns[f"{channel}_count"] = valid
+        columns[f"{channel}_min"] = values
+        columns[f"{channel}_max"] = values
+        columns[f"{channel}_tw_sum"] = values * durations
+        columns[f"{channel}_duration"] = np.where(valid, durations, 0.0)
+    for channel in ["pace", "hr"]:
+        values = np.where(clean, np.asarray(samples[channel], dtype=float), np.nan)
+        columns[f"clean_{channel}_sum"] = values
+        columns[f"clean_{channel}_count"] = ~np.isnan(values)
+
+    buckets = combine(pd.DataFrame(columns), "bucket", channels)
+    buckets["bucket"] = buckets["bucket"].astype(int)
+
+    return buckets
+
+
+def combine(buckets, by, channels=SUMMARY_CHANNELS):
+    """
+    Merges bucket rows sharing the by column(s) into coarser buckets.
+
+    Parameters
+    ----------
+    buckets: pd.DataFrame
+        Rows from summarize_run or a summary level.
+    by: str or list
+        Grouping column(s).
+    channels: list
+        Summarized channels present in buckets.
+
+    Returns
+    -------
+    pd.DataFrame
+        Combined rows; sums, counts and durations add up, mins and maxes
+        take the extremes.
+    """
+
+    aggregations = {"samples": "sum", "duration": "sum"}
+    for channel in channels:
+        for stat in STATS:
+            aggregations[f"{channel}_{stat}"] = (
+                stat if stat in ["min", "max"] else "sum"
+            )
+    for column in CLEAN_COLUMNS:
+        aggregations[column] = "sum"
+    aggregations = {c: a for c, a in aggregations.items() if c in buckets}
+
+    return buckets.groupby(by, as_index=False, sort=True).agg(aggregations)
+
+
+def add_means(summary, channels=SUMMARY_CHANNELS):
+    """
+    Adds '<channel>_mean' (per sample) and '<channel>_tw_mean' (time-weighted)
+    columns to combined buckets.
+    """
+
+    for channel in channels:
+        summary[f"{channel}_mean"] = summary[f"{channel}_sum"] / summary[
+            f"{channel}_count"
+        ].where(summary[f"{channel}_count"] > 0)
+        summary[f"{channel}_tw_mean"] = summary[f"{channel}_tw_sum"] / summary[
+            f"{channel}_duration"
+        ].where(summary[f"{channel}_duration"] > 0)
+
+    return summary
+
+
+def level_keys(level, samples):
+    """
+    Bucket of every sample of a run at a level.
+    """
+
+    width = LEVELS[level]
+    if width is None:
+        return np.zeros(len(samples["timestamp"]), dtype=int)
+    if width == "mile":
+        return np.floor(np.asarray(samples["distance"], dtype=float))
+
+    return _time_buckets(_elapsed(samples["timestamp"]), width)
+
+
+def _time_buckets(elapsed, width):
+    # Stays float: samples without a timestamp get a NaN bucket
+    return np.maximum(np.ceil(elapsed / width) - 1, 0)
+
+
+def _elapsed(timestamps):
+    """
+    Seconds since the first sample, NaN for a missing timestamp (as
+    data_handling.add_elapsed_time).
+    """
+
+    timestamps = pd.Series(pd.to_datetime(pd.Series(timestamps)))
+    if timestamps.empty:
+        return np.empty(0)
+
+    return (timestamps - timestamps.iloc[0]).dt.total_seconds().to_numpy(dtype=float)
+
+
+def _aligned(width, start=None, end=None, bucket_width=None):
+    """
+    True if every bucket of a time level lies wholly inside or outside the
+    (start, end] window and within one bucket_width bucket.
+    """
+
+    if width is None:
+        return start is None and end is None and bucket_width is None
+    if width == "mile":
+        return False
+    if start is not None and (start <= 0 or start % width):
+        return False
+    if end is not None and end % width:
+        return False
+    if bucket_width is not None and bucket_width % width:
+        return False
+
+    return True
+
+
+class RunSummaries:
+    """
+    Pre-aggregated buckets of the runs of a RunStore at several levels.
+
+    Parameters
+    ----------
+    store: RunStore
+        Store to summarize. Summary files live next to the store's channel
+        files.
+    channels: list
+        Channels to summarize.
+    """
+
+    def __init__(self, store, channels=SUMMARY_CHANNELS):
+        self.store = store
+        self.channels = channels
+        self._levels = {}
+
+    def _path(self, level):
+        return os.path.join(self.store.path, f"summary_{level}.csv")
+
+    def summarized_runs(self):
+        """
+        Runs already summarized (the 'run' level is written last).
+        """
+
+        path = self._path("run")
+        if not os.path.exists(path):
+            return set()
+
+        return set(pd.read_csv(path, usecols=["run"], dtype={"run": str})["run"])
+
+    def update(self):
+        """
+        Summarizes the runs appended to the store since the last update.
+
+        Returns
+        -------
+        int
+            Number of runs summarized.
+        """
+
+        done = self.summarized_runs()
+        new_runs = self.store.index[~self.store.index["run"].isin(done)]
+
+        for _, row in new_runs.iterrows():
+            samples = self.store.run(row)
+            for level in sorted(LEVELS, key=lambda name: name == "run"):
+                buckets = summarize_run(
+                    samples, level_keys(level, samples), self.channels
+                )
+                buckets.insert(0, "run", row["run"])
+                path = self._path(level)
+                buckets.to_csv(
+                    path, mode="a", header=not os.path.exists(path), index=False
+                )
+        self._levels = {}
+
+        return len(new_runs)
+
+    def level(self, name):
+        """
+        All buckets of one level, with the store index's 'date' and 'type'.
+        """
+
+        if name not in self._levels:
+            path = self._path(name)
+            if not os.path.exists(path):
+                return pd.DataFrame(columns=["run", "date", "type", "bucket"])
+            # An interrupted update leaves partial runs that are redone later
+            buckets = pd.read_csv(path, dtype={"run": str}).drop_duplicates(
+                ["run", "bucket"], keep="last"
+            )
+            self._levels[name] = buckets.merge(
+                self.store.index[["run", "date", "type"]], on="run"
+            )
+
+        return self._levels[name]
+
+    def choose_level(self, start=None, end=None, width=None):
+        """
+        Coarsest level that answers a query exactly.
+
+        Parameters
+        ----------
+        start, end: float, optional
+            Elapsed-time window in seconds (start < elapsed_time <= end).
+        width: float, optional
+            Bucket width of the result in seconds (None for whole runs).
+
+        Returns
+        -------
+        str or None
+            Level name, or None if only the raw samples answer the query.
+        """
+
+        for name, level_width in LEVELS.items():
+            if _aligned(level_width, start, end, width):
+                return name
+
+        return None
+
+    def aggregate(
+        self,
+        channels=None,
+        start_date=None,
+        end_date=None,
+        type=None,
+        start=None,
+        end=None,
+        width=None,
+    ):
+        """
+        Exact per-run (or per time bucket) aggregates from the coarsest level.
+
+        Parameters
+        ----------
+        channels: list, optional
+            Channels to return, defaults to all summarized channels.
+        start_date, end_date: str, optional
+            Date bounds in 'yyyymmdd' format.
+        type: str, optional
+            Run type.
+        start, end: float, optional
+            Only samples with start < elapsed_time <= end (seconds). E.g.
+            start=300 drops clean_base_runs' 5 min warm-up.
+        width: float, optional
+            Split runs into buckets of width seconds (e.g. for plots).
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per run (and bucket) with 'run', 'date', 'type',
+            ['bucket',] 'samples', 'duration', the accumulators and
+            '<channel>_mean' / '<channel>_tw_mean'.
+        """
+
+        channels = channels or self.channels
+        name = self.choose_level(start, end, width)
+
+        if name is None:
+            buckets = self._from_samples(start_date, end_date, type, start, end, width)
+        else:
+            buckets = self.level(name)
+            buckets = buckets[
+                buckets["run"].isin(self._select(start_date, end_date, type))
+            ]
+            level_width = LEVELS[name]
+            if level_width is not None:
+                bucket_start = buckets["bucket"] * level_width
+                keep = pd.Series(True, index=buckets.index)
+                if start is not None:
+                    keep &= bucket_start >= start
+                if end is not None:
+                    keep &= bucket_start + level_width <= end
+                buckets = buckets[keep]
+                if width is not None:
+                    buckets = buckets.assign(bucket=bucket_start[keep] // width).astype(
+                        {"bucket": int}
+                    )
+
+        by = ["run", "date", "type"] + (["bucket"] if width is not None else [])
+        columns = by + [
+            c for c in buckets.columns if c not in by and _wanted(c, channels)
+        ]
+
+        return add_means(combine(buckets[columns], by, channels), channels)
+
+    def splits(self, channels=None, start_date=None, end_date=None, type=None):
+        """
+        Per-mile aggregates ('bucket' is the completed mile, as mile_group).
+        """
+
+        channels = channels or self.channels
+        buckets = self.level("mile")
+        buckets = buckets[buckets["run"].isin(self._select(start_date, end_date, type))]
+        by = ["run", "date", "type", "bucket"]
+        columns = by + [
+            c for c in buckets.columns if c not in by and _wanted(c, channels)
+        ]
+
+        return add_means(buckets[columns].reset_index(drop=True), channels)
+
+    def _select(self, start_date, end_date, type):
+        return set(
+            self.store.select(start_date=start_date, end_date=end_date, type=type)[
+                "run"
+            ]
+        )
+
+    def _from_samples(self, start_date, end_date, type, start, end, width):
+        """
+        Buckets computed from the raw store samples, for unaligned queries.
+        """
+
+        frames = []
+        selected = self.store.select(
+            start_date=start_date, end_date=end_date, type=type
+        )
+        for _, row in selected.iterrows():
+            samples = self.store.run(row)
+            elapsed = _elapsed(samples["timestamp"])
+            keys = np.zeros(len(elapsed))
+            if width is not None:
+                keys = _time_buckets(elapsed, width)
+            keep = np.ones(len(elapsed), dtype=bool)
+            if start is not None:
+                keep &= elapsed > start
+            if end is not None:
+                keep &= elapsed <= end
+            keys[~keep] = np.nan
+
+            buckets = summarize_run(samples, keys, self.channels)
+            frames.append(
+                buckets.assign(run=row["run"], date=row["date"], type=row["type"])
+            )
+
+        if not frames:
+            return pd.DataFrame(columns=["run", "date", "type", "bucket"])
+
+        return pd.concat(frames, ignore_index=True)
+
+
+def _wanted(column, channels):
+    if column in ["bucket", "samples", "duration"]:
+        return True
+    if column in CLEAN_COLUMNS:
+        return True
+
+    return any(column.startswith(f"{channel}_") for channel in channels)
+
+
+def main():
+    """Build or update the summaries of a store."""
+    parser = argparse.ArgumentParser(
+        description="Build or update the multi-resolution summaries of a run store"
+    )
+    parser.add_argument(
+        "--store", default="./store", help="Store directory (default: ./store)"
+    )
+    args = parser.parse_args()
+
+    summaries = RunSummaries(RunStore(args.store))
+    added = summaries.update()
+    print(f"Summarized {added} runs")
+    for name in LEVELS:
+        print(f"  {name}: {len(summaries.level(name))} rows")
+    print(f"  samples: {summaries.store.n_samples} rows")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,472 @@
+#!/usr/bin/env python
+"""
+Streaming, mergeable accumulators for analyses over date windows.
+
+Runs are read one at a time (data_handling.iter_runs), cleaned as in
+base_analysis.py and fed to the accumulator of every window they fall in,
+so any number of windows is answered in one pass while only one run is in
+memory. Each accumulator keeps exact sums and counts, a 2-D HR/pace histogram
+(drawn with plotting.draw_cloud) and fixed-bin quantile sketches. All of them
+merge by adding, so files can be split across worker processes and the
+partial results combined.
+
+    windows = {"baseline": ("20250501", "20250515"), "heat": ("20250602", None)}
+    accumulators = accumulate_windows(windows, type="base", workers=4)
+    print(summary_table(accumulators))
+"""
+
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from data_handling import list_runs, read_run, add_elapsed_time, clean_base_runs
+
+CHANNELS = ["pace", "hr"]
+# Sketch range and bin width per channel; quantiles are exact to one bin
+SKETCH_BINS = {"pace": (0.0, 20.0, 0.01), "hr": (0.0, 250.0, 0.5)}
+QUANTILES = [0.1, 0.5, 0.9]
+
+
+class Moments:
+    """
+    Count, mean, sum of squared deviations (M2), min and max of one channel
+    (NaN ignored).
+
+    Batches and partial results are combined with Chan et al.'s pairwise
+    update, so the variance does not suffer the cancellation of a running
+    sum of squares.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = np.nan
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+
+        mean = values.mean()
+        self._combine(len(values), mean, ((values - mean) ** 2).sum())
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+        return self
+
+    def merge(self, other):
+        if other.count:
+            self._combine(other.count, other.mean, other.m2)
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+
+        return self
+
+    def _combine(self, count, mean, m2):
+        if not self.count:
+            self.count, self.mean, self.m2 = count, mean, m2
+            return
+
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta**2 * self.count * count / total
+        self.count = total
+
+    @property
+    def std(self):
+        if not self.count:
+            return np.nan
+
+        return np.sqrt(self.m2 / self.count)
+
+
+class Histogram2D:
+    """
+    Fixed-grid 2-D histogram of (x, y) points, e.g. HR vs pace.
+
+    Parameters
+    ----------
+    extent: tuple
+        (xmin, xmax, ymin, ymax). Points outside are not counted.
+    bins: int
+        Bins per axis, as in plotting.aggregate_cloud.
+    mode: str
+        'hist2d' or 'hexbin'. hexbin clouds keep a 4x finer grid, as
+        plotting.aggregate_cloud does.
+    """
+
+    def __init__(self, extent, bins=60, mode="hist2d"):
+        if mode not in ["hist2d", "hexbin"]:
+            raise ValueError(
+                f"Streaming clouds support 'hist2d' and 'hexbin', not '{mode}'"
+            )
+
+        self.extent = tuple(extent)
+        self.bins = bins
+        self.mode = mode
+        n_bins = bins if mode == "hist2d" else bins * 4
+        self.xedges = np.linspace(extent[0], extent[1], n_bins + 1)
+        self.yedges = np.linspace(extent[2], extent[3], n_bins + 1)
+        self.counts = np.zeros((n_bins, n_bins))
+
+    def update(self, x, y):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        valid = ~(np.isnan(x) | np.isnan(y))
+        counts, _, _ = np.histogram2d(
+            x[valid], y[valid], bins=[self.xedges, self.yedges]
+        )
+        self.counts += counts
+
+        return self
+
+    def merge(self, other):
+        self.counts += other.counts
+
+        return self
+
+    def cloud(self):
+        """
+        The histogram as a cloud for plotting.draw_cloud.
+        """
+
+        return {
+            "mode": self.mode,
+            "extent": self.extent,
+            "bins": self.bins,
+            "counts": self.counts,
+            "xedges": self.xedges,
+            "yedges": self.yedges,
+        }
+
+
+class QuantileSketch:
+    """
+    Quantiles from a fixed-bin histogram, exact to one bin width.
+
+    Values below lo or above hi are counted in edge bins and reported as the
+    smallest / largest value seen.
+    """
+
+    def __init__(self, lo, hi, width):
+        self.edges = np.arange(lo, hi + width / 2, width)
+        self.counts = np.zeros(len(self.edges) + 1)  # under/overflow at the ends
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+
+        positions = np.searchsorted(self.edges, values, side="right")
+        self.counts += np.bincount(positions, minlength=len(self.counts))
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+        return self
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+        return self
+
+    def quantile(self, q):
+        """
+        Value below which a fraction q of the values lie, interpolated
+        linearly within its bin.
+        """
+
+        total = self.counts.sum()
+        if total == 0:
+            return np.nan
+
+        # Bin i covers [lower[i], upper[i]); the edge bins end at min / max
+        lower = np.r_[self.min, self.edges]
+        upper = np.r_[self.edges, self.max]
+        lower = np.clip(lower, self.min, self.max)
+        upper = np.clip(upper, self.min, self.max)
+
+        cumulative = np.cumsum(self.counts)
+        target = q * total
+        i = min(np.searchsorted(cumulative, target), len(self.counts) - 1)
+        before = cumulative[i] - self.counts[i]
+        fraction = (target - before) / self.counts[i] if self.counts[i] else 0.0
+
+        return float(lower[i] + fraction * (upper[i] - lower[i]))
+
+
+class WindowAccumulator:
+    """
+    Everything base_analysis.py needs from one window of cleaned runs.
+
+    Parameters
+    ----------
+    extent, bins, mode:
+        HR (x) vs pace (y) histogram, see Histogram2D.
+    """
+
+    def __init__(self, extent=(115, 175, 8, 11.5), bins=60, mode="hist2d"):
+        self.runs = 0
+        self.moments = {channel: Moments() for channel in CHANNELS}
+        self.sketches = {
+            channel: QuantileSketch(*SKETCH_BINS[channel]) for channel in CHANNELS
+        }
+        self.histogram = Histogram2D(extent, bins, mode)
+
+    def update(self, df):
+        """
+        Adds one cleaned run.
+        """
+
+        self.runs += 1
+        for channel in CHANNELS:
+            values = pd.to_numeric(df[channel], errors="coerce").to_numpy(float)
+            self.moments[channel].update(values)
+            self.sketches[channel].update(values)
+        self.histogram.update(
+            pd.to_numeric(df["hr"], errors="coerce").to_numpy(float),
+            pd.to_numeric(df["pace"], errors="coerce").to_numpy(float),
+        )
+
+        return self
+
+    def merge(self, other):
+        self.runs += other.runs
+        for channel in CHANNELS:
+            self.moments[channel].merge(other.moments[channel])
+            self.sketches[channel].merge(other.sketches[channel])
+        self.histogram.merge(other.histogram)
+
+        return self
+
+    @property
+    def ae(self):
+        """
+        Aerobic efficiency, mean pace / mean HR (see aerobic_efficiency.py).
+        """
+
+        return self.moments["pace"].mean / self.moments["hr"].mean
+
+    def cloud(self):
+        return self.histogram.cloud()
+
+    def summary(self, quantiles=QUANTILES):
+        """
+        Flat dict of run count, per-channel count, mean, std, min, max and
+        quantiles, and AE.
+        """
+
+        summary = {"runs": self.runs}
+        for channel in CHANNELS:
+            moments = self.moments[channel]
+            summary[f"{channel}_count"] = moments.count
+            summary[f"{channel}_mean"] = moments.mean
+            summary[f"{channel}_std"] = moments.std
+            summary[f"{channel}_min"] = moments.min if moments.count else np.nan
+            summary[f"{channel}_max"] = moments.max if moments.count else np.nan
+            for q in quantiles:
+                summary[f"{channel}_p{q * 100:g}"] = self.sketches[channel].quantile(q)
+        summary["ae"] = self.ae
+
+        return summary
+
+
+def _parse_windows(windows):
+    """
+    Windows as {name: (start datetime or None, end datetime or None)}.
+    """
+
+    def parse(date_str):
+        return datetime.strptime(date_str, "%Y%m%d") if date_str else None
+
+    return {name: (parse(start), parse(end)) for name, (start, end) in windows.items()}
+
+
+def _in_window(date, start, end):
+    return (start is None or date >= start) and (end is None or date <= end)
+
+
+def accumulate_runs(runs, windows, clean=True, **accumulator_kwargs):
+    """
+    Feeds runs to the accumulator of every window containing their date.
+
+    Parameters
+    ----------
+    runs: iterable
+        (date_str, DataFrame) pairs, e.g. data_handling.iter_runs(...).
+    windows: dict
+        Window name -> (start_date, end_date) in 'yyyymmdd' format, either
+        may be None. Windows may overlap.
+    clean: bool
+        Apply add_elapsed_time and clean_base_runs to every run first.
+    accumulator_kwargs:
+        Passed to WindowAccumulator.
+
+    Returns
+    -------
+    dict
+        Window name -> WindowAccumulator.
+    """
+
+    parsed = _parse_windows(windows)
+    accumulators = {name: WindowAccumulator(**accumulator_kwargs) for name in windows}
+
+    for date_str, df in runs:
+        date = datetime.strptime(date_str, "%Y%m%d")
+        names = [name for name, span in parsed.items() if _in_window(date, *span)]
+        if not names:
+            continue
+        if clean:
+            df = clean_base_runs(add_elapsed_time(df))
+        for name in names:
+            accumulators[name].update(df)
+
+    return accumulators
+
+
+def merge_accumulators(parts):
+    """
+    Merges per-worker results of accumulate_runs window by window.
+    """
+
+    merged = {}
+    for part in parts:
+        for name, accumulator in part.items():
+            if name in merged:
+                merged[name].merge(accumulator)
+            else:
+                merged[name] = accumulator
+
+    return merged
+
+
+def _accumulate_files(files, windows, clean, accumulator_kwargs):
+    runs = ((date_str, read_run(filepath)) for date_str, filepath in files)
+
+    return accumulate_runs(runs, windows, clean, **accumulator_kwargs)
+
+
+def accumulate_windows(
+    windows, type=None, folder="data", workers=1, clean=True, **accumulator_kwargs
+):
+    """
+    One pass over the runs in folder answering every window.
+
+    Parameters
+    ----------
+    windows: dict
+        Window name -> (start_date, end_date), see accumulate_runs.
+    type: str, optional
+        Run type, as in load_runs.
+    workers: int
+        Worker processes. Files are split between them and the partial
+        accumulators merged; 1 reads all runs in this process.
+
+    Returns
+    -------
+    dict
+        Window name -> WindowAccumulator.
+    """
+
+    parsed = _parse_windows(windows)
+    starts = [start for start, _ in parsed.values()]
+    ends = [end for _, end in parsed.values()]
+    start = None if None in starts else min(starts).strftime("%Y%m%d")
+    end = None if None in ends else max(ends).strftime("%Y%m%d")
+    files = sorted(list_runs(start_date=start, end_date=end, type=type, folder=folder))
+
+    if workers == 1 or len(files) < 2:
+        return _accumulate_files(files, windows, clean, accumulator_kwargs)
+
+    chunks = np.array_split(np.arange(len(files)), min(workers, len(files)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                _accumulate_files,
+                [files[i] for i in chunk],
+                windows,
+                clean,
+                accumulator_kwargs,
+            )
+            for chunk in chunks
+        ]
+        parts = [future.result() for future in futures]
+
+    return merge_accumulators(parts)
+
+
+def summary_table(accumulators, quantiles=QUANTILES):
+    """
+    One row per window with WindowAccumulator.summary.
+    """
+
+    rows = [
+        {"window": name, **accumulator.summary(quantiles)}
+        for name, accumulator in accumulators.items()
+    ]
+
+    return pd.DataFrame(rows)
+
+
+def _parse_window_arg(value):
+    name, start, end = value.split(":")
+
+    return name, (start or None, end or None)
+
+
+def main():
+    """Main CLI function."""
+    parser = argparse.ArgumentParser(
+        description="Pace/HR summaries of date windows in one streaming pass",
+        epilog="example: streaming.py --window baseline:20250501:20250515 "
+        "--window heat:20250602: --type base",
+    )
+    parser.add_argument(
+        "--window",
+        action="append",
+        type=_parse_window_arg,
+        required=True,
+        help="NAME:START:END with yyyymmdd dates, either may be empty",
+    )
+    parser.add_argument("--type", default=None, help="Run type")
+    parser.add_argument("--data", default="./data", help="Folder of run CSVs")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes (default: 1, 0 for all cores)",
+    )
+    parser.add_argument("--no-clean", action="store_true", help="Skip clean_base_runs")
+    parser.add_argument("--output", default=None, help="Optional summary CSV")
+    args = parser.parse_args()
+
+    accumulators = accumulate_windows(
+        dict(args.window),
+        type=args.type,
+        folder=args.data,
+        workers=args.workers or os.cpu_count(),
+        clean=not args.no_clean,
+    )
+    table = summary_table(accumulators)
+    print(table.round(3).to_string(index=False))
+
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f"Saved to: {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+"""
+Runs the load, weekly-stats and model stages for every athlete in parallel.
+
+Each athlete is processed start to finish in its own worker process, which
+only ever reads that athlete's folder (data/<athlete>/) and configuration.
+Outputs are written to <output>/<athlete>/.
+"""
+
+import os
+import argparse
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from athletes import DATA_ROOT, athlete_folder, list_athletes, load_athlete_config
+from data_handling import load_runs
+from run_metrics import (
+    compute_run_stats,
+    compute_weekly_stats,
+    compute_daily_load,
+    compute_weekly_load,
+    compute_weekly_base_pace,
+)
+from rollup import join_weeks
+
+RUN_TYPES = ["z2", "vo2", "sprint", "threshold", "trail"]
+MODEL_FEATURES = [
+    "total_distance",
+    "z2_time",
+    "total_time",
+    "total_elevation_gain",
+    "lr_duration",
+    "acute_load",
+    "chronic_load",
+]
+
+
+def fit_weekly_model(weekly_stats, feature_names=MODEL_FEATURES):
+    """
+    Ridge model of weekly Z2 pace with alpha chosen by LOO CV, as in
+    ridge_regression.py.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per feature with its coefficient, plus 'intercept' and 'alpha'.
+    """
+
+    import numpy as np
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.linear_model import Ridge
+    from sklearn.model_selection import LeaveOneOut, GridSearchCV
+
+    df = weekly_stats.dropna(subset=feature_names + ["pace"])
+    X = StandardScaler().fit_transform(df[feature_names].values)
+    y = df["pace"].values
+
+    param_grid = {"alpha": np.logspace(-2, 2, 50)}
+    grid = GridSearchCV(
+        Ridge(), param_grid, cv=LeaveOneOut(), scoring="neg_mean_squared_error"
+    )
+    grid.fit(X, y)
+    model = grid.best_estimator_
+
+    return pd.DataFrame(
+        {
+            "term": feature_names + ["intercept", "alpha"],
+            "value": list(model.coef_) + [model.intercept_, grid.best_params_["alpha"]],
+        }
+    )
+
+
+def run_athlete(
+    athlete, root=DATA_ROOT, output_root="output", start_date=None, end_date=None
+):
+    """
+    Load, weekly-stats and model stages for one athlete.
+
+    Returns
+    -------
+    tuple
+        (athlete, output folder, number of runs)
+    """
+
+    config = load_athlete_config(athlete, root)
+    folder = athlete_folder(athlete, root)
+    out = os.path.join(output_root, athlete)
+    os.makedirs(out, exist_ok=True)
+
+    all_runs = {}
+    for run_type in RUN_TYPES:
+        runs = load_runs(
+            start_date=start_date, end_date=end_date, type=run_type, folder=folder
+        )
+        all_runs.update(runs)
+    if not all_runs:
+        return athlete, out, 0
+
+    # Load stage
+    run_stats = compute_run_stats(all_runs, config)
+    load_df = compute_daily_load(run_stats)
+    run_stats.to_csv(os.path.join(out, "run_stats.csv"), index=False)
+    load_df.to_csv(os.path.join(out, "load.csv"), index=False)
+
+    # Weekly stats stage
+    weekly_stats = compute_weekly_stats(run_stats)
+    weekly_stats = join_weeks(weekly_stats, compute_weekly_load(load_df))
+
+    base_runs = load_runs(
+        start_date=start_date, end_date=end_date, type="base", folder=folder
+    )
+    if base_runs:
+        pace_df = compute_weekly_base_pace(base_runs)
+        weekly_stats = join_weeks(weekly_stats, pace_df)
+    else:
+        weekly_stats["pace"] = float("nan")
+    weekly_stats.to_csv(os.path.join(out, "weekly_stats.csv"), index=False)
+
+    # Model stage, needs a few weeks with a base pace
+    if weekly_stats["pace"].notna().sum() >= 3:
+        model_df = fit_weekly_model(weekly_stats)
+        model_df.to_csv(os.path.join(out, "ridge_model.csv"), index=False)
+
+    return athlete, out, len(all_runs)
+
+
+def main():
+    """Main CLI function."""
+    parser = argparse.ArgumentParser(
+        description="Run the training pipeline for every athlete in parallel"
+    )
+    parser.add_argument(
+        "--data", default=DATA_ROOT, help="Root folder of athlete folders"
+    )
+    parser.add_argument(
+        "--output", default="output", help="Output root (default: ./output)"
+    )
+    parser.add_argument(
+        "--athlete",
+        action="append",
+        help="Only run these athletes (repeatable, default: all)",
+    )
+    parser.add_argument("--start", default=None, help="Start date (yyyymmdd)")
+    parser.add_argument("--end", default=None, help="End date (yyyymmdd)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Worker processes (default: all cores)",
+    )
+    args = parser.parse_args()
+
+    athletes = args.athlete or list_athletes(args.data)
+    if not athletes:
+        print(f"Error: No athlete folders found in '{args.data}'")
+        return 1
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(
+                run_athlete, athlete, args.data, args.output, args.start, args.end
+            ): athlete
+            for athlete in athletes
+        }
+        for future in as_completed(futures):
+            try:
+                athlete, out, n_runs = future.result()
+                print(f"{athlete}: {n_runs} runs -> {out}")
+            except Exception as e:
+                failed += 1
+                print(f"Error processing athlete '{futures[future]}': {e}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,82 @@
+"""
+Small synthetic runs shared by the tests, in the process_fit CSV layout, and
+the committed FIT file converted by process_fit.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+FIT_FILE = os.path.join(os.path.dirname(__file__), "data", "short_run.fit")
+RUNS = ["20250602_base", "20250604_z2", "20250606_base", "20250609_base"]
+
+
+def synthetic_run(date_str, seed, n=1800):
+    """
+    One run of n samples, 1-2 s apart, with a few missing HR values.
+    """
+
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(date_str, tz="UTC") + pd.Timedelta(hours=7)
+    timestamps = start + pd.to_timedelta(np.cumsum(rng.integers(1, 3, n)), unit="s")
+    pace = np.round(rng.normal(9.0, 0.6, n), 2)
+    pace[:5] = 0.0
+    hr = rng.integers(120, 185, n).astype(float)
+    hr[rng.choice(n, 20, replace=False)] = np.nan
+
+    return pd.DataFrame(
+        {
+            "timestamp": timestamps,
+            "pace": pace,
+            "hr": pd.array(hr, dtype="Int64"),
+            "distance": np.round(np.arange(1, n + 1) * 0.0028, 5),
+            "elevation": np.round(5950 + np.cumsum(rng.normal(0, 10, n))),
+        }
+    )
+
+
+@pytest.fixture
+def run_folder(tmp_path):
+    folder = tmp_path / "data"
+    folder.mkdir()
+    for seed, run in enumerate(RUNS):
+        df = synthetic_run(run.split("_")[0], seed)
+        df.to_csv(folder / f"{run}.csv", index=False)
+
+    return str(folder)
+
+
+@pytest.fixture
+def store(tmp_path, run_folder):
+    from run_store import RunStore
+
+    store = RunStore(str(tmp_path / "store"))
+    store.build_from_folder(run_folder)
+
+    return store
+
+
+@pytest.fixture
+def fit_folder(tmp_path):
+    """
+    tests/data/short_run.fit as a process_fit CSV; its 11th sample has a
+    missing (NaT) timestamp.
+    """
+
+    from process_fit import process_fit_file
+
+    folder = str(tmp_path / "fit_data")
+    process_fit_file(FIT_FILE, output_dir=folder, decoder="native")
+
+    return folder
+
+
+@pytest.fixture
+def fit_store(tmp_path, fit_folder):
+    from run_store import RunStore
+
+    store = RunStore(str(tmp_path / "fit_store"))
+    store.build_from_folder(fit_folder)
+
+    return store
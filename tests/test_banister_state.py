@@ -0,0 +1,56 @@
+"""
+Incremental Banister state against the loads of load.csv.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from banister_state import current_load, rebuild_state, update_state
+from run_metrics import compute_daily_load
+
+
+@pytest.fixture
+def run_stats():
+    rng = np.random.default_rng(0)
+    dates = pd.to_datetime("2025-06-02") + pd.to_timedelta(
+        np.sort(rng.choice(60, 30, replace=False)), unit="D"
+    )
+
+    return pd.DataFrame({"date": dates, "total_load": rng.uniform(20, 120, 30)})
+
+
+def test_state_reproduces_daily_load(run_stats):
+    load_df = compute_daily_load(run_stats)
+    daily = run_stats.set_index("date")["total_load"]
+
+    # load.csv holds on each day the load carried into the next one
+    for _, row in load_df.iloc[:-1].iterrows():
+        state = rebuild_state(daily[daily.index <= row["Date"]])
+        load = current_load(state, row["Date"] + pd.Timedelta(days=1))
+        assert load["fitness"] == pytest.approx(row["Chronic Load"])
+        assert load["fatigue"] == pytest.approx(row["Acute Load"])
+
+
+def test_incremental_updates_match_rebuild(run_stats):
+    daily = run_stats.set_index("date")["total_load"]
+    state = rebuild_state(daily.iloc[:10])
+    for date, trimp in daily.iloc[10:].items():
+        update_state(state, date, trimp)
+
+    rebuilt = rebuild_state(daily)
+    assert state["fitness"] == pytest.approx(rebuilt["fitness"])
+    assert state["fatigue"] == pytest.approx(rebuilt["fatigue"])
+    assert state["last_date"] == rebuilt["last_date"]
+
+
+def test_run_is_added_once():
+    state = rebuild_state(pd.Series([50.0], index=["20250601"]), ["20250601_z2"])
+    update_state(state, "20250603", 40.0, "20250603_z2")
+
+    for run in ["20250601_z2", "20250603_z2"]:
+        with pytest.raises(ValueError, match="already"):
+            update_state(state, run.split("_")[0], 40.0, run)
+    assert state["fitness"] == pytest.approx(
+        50 * np.exp(-2 / state["params"]["fitness_tau"]) + 40
+    )
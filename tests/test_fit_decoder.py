@@ -0,0 +1,47 @@
+"""
+Native FIT decoder against fitdecode on a small committed file.
+
+tests/data/short_run.fit holds 40 record messages, one of them with an
+invalid (0xFFFFFFFF) timestamp.
+"""
+
+import os
+import numpy as np
+import pytest
+
+from fit_decoder import (
+    RECORD_FIELDS,
+    compare_with_fitdecode,
+    read_records_fitdecode,
+    read_records_native,
+)
+from process_fit import meters_per_sec_to_min_per_mile
+
+pytest.importorskip("fitdecode")
+
+FIT_FILE = os.path.join(os.path.dirname(__file__), "data", "short_run.fit")
+
+
+def test_fields_match_fitdecode():
+    assert compare_with_fitdecode(FIT_FILE) == {
+        "records": 0,
+        **{name: 0 for name in RECORD_FIELDS},
+    }
+
+
+def test_invalid_timestamp_is_kept():
+    native = read_records_native(FIT_FILE)
+    reference = read_records_fitdecode(FIT_FILE)
+
+    assert len(native["timestamp"]) == 40
+    assert np.isnat(native["timestamp"]).sum() == 1
+    np.testing.assert_array_equal(native["timestamp"], reference["timestamp"])
+
+
+def test_pace_matches_scalar_conversion():
+    speed = read_records_native(FIT_FILE)["enhanced_speed"]
+    pace = meters_per_sec_to_min_per_mile(speed)
+
+    assert pace[0] == 0.0
+    for s, p in zip(speed[1:], pace[1:]):
+        assert p == (0.0 if s == 0 else round(1 / (s * 60 / 1609), 2))
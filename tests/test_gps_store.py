@@ -0,0 +1,75 @@
+"""
+Track encoding and the incrementally merged GPS index.
+"""
+
+import numpy as np
+
+from gps_store import (
+    INDEX_ARRAYS,
+    SCALE,
+    GpsIndex,
+    find_traversals,
+    load_track,
+    save_track,
+)
+
+
+def track(seed, n=600):
+    rng = np.random.default_rng(seed)
+    lat = 39.99 + np.cumsum(rng.uniform(0, 3e-5, n))
+    lon = -105.27 + np.cumsum(rng.normal(0, 2e-5, n))
+
+    return lat, lon
+
+
+def test_track_round_trip(tmp_path):
+    lat, lon = track(0)
+    lat[10:15] = lon[10:15] = np.nan
+    path = str(tmp_path / "20250602_base.npz")
+    save_track(path, lat, lon)
+
+    decoded_lat, decoded_lon = load_track(path)
+    np.testing.assert_array_equal(np.isnan(decoded_lat), np.isnan(lat))
+    np.testing.assert_allclose(decoded_lat, lat, atol=0.5 / SCALE)
+    np.testing.assert_allclose(decoded_lon, lon, atol=0.5 / SCALE)
+
+
+def test_merged_update_matches_full_build(tmp_path):
+    incremental, full = tmp_path / "incremental", tmp_path / "full"
+    for folder in [incremental, full]:
+        folder.mkdir()
+    for seed in range(6):
+        save_track(str(full / f"2025060{seed}_base.npz"), *track(seed))
+    for seed in range(3):
+        save_track(str(incremental / f"2025060{seed}_base.npz"), *track(seed))
+
+    assert GpsIndex(str(incremental)).update() == 3
+    for seed in range(3, 6):
+        save_track(str(incremental / f"2025060{seed}_base.npz"), *track(seed))
+    assert GpsIndex(str(incremental)).update() == 3
+    GpsIndex(str(full)).update()
+
+    merged, rebuilt = GpsIndex(str(incremental)), GpsIndex(str(full))
+    assert merged.runs == rebuilt.runs
+    for name in INDEX_ARRAYS:
+        np.testing.assert_array_equal(getattr(merged, name), getattr(rebuilt, name))
+
+    lat, lon = track(4)
+    near = merged.near(lat[100], lon[100], radius=20.0)
+    assert "20250604_base" in set(near["run"])
+
+
+def test_find_traversals_counts_repeats(tmp_path):
+    # Out and back twice along a 500 m line: two passes from A to B
+    leg = np.linspace(0, 0.0045, 300)
+    lat = 39.99 + np.concatenate([leg, leg[::-1], leg, leg[::-1]])
+    lon = np.full(len(lat), -105.27)
+    save_track(str(tmp_path / "20250602_base.npz"), lat, lon)
+    index = GpsIndex(str(tmp_path))
+    index.update()
+
+    a, b = (39.9905, -105.27), (39.9940, -105.27)
+    traversals = find_traversals(index, [a, b])
+    assert len(traversals) == 2
+    assert (traversals["end"] > traversals["start"]).all()
+    assert find_traversals(index, [a, (40.5, -105.27)]).empty
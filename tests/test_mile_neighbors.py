@@ -0,0 +1,42 @@
+"""
+KD-tree plus append buffer against a brute-force neighbor search.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mile_neighbors import MileIndex
+from model_search import feature_matrix
+
+pytest.importorskip("scipy")
+
+
+def miles(n, seed):
+    rng = np.random.default_rng(seed)
+
+    return pd.DataFrame(
+        {
+            "altitude": rng.uniform(5000, 10000, n),
+            "net_elevation": rng.normal(0, 80, n),
+            "hr": rng.uniform(120, 180, n),
+            "surface": rng.choice(["road", "trail"], n),
+            "pace": rng.uniform(7, 12, n),
+        }
+    )
+
+
+def test_buffered_query_matches_brute_force():
+    index = MileIndex()
+    index.add(miles(400, 0))
+    index.add(miles(50, 1))  # stays in the buffer
+    assert index._indexed == 400 and len(index) == 450
+
+    queries = miles(30, 2)
+    distances, indices = index.query(queries, k=7)
+
+    scaled = index._scaled(index.X)
+    targets = index._scaled(feature_matrix(queries, index.features))
+    brute = np.sqrt(((targets[:, None, :] - scaled[None, :, :]) ** 2).sum(axis=2))
+    np.testing.assert_allclose(distances, np.sort(brute, axis=1)[:, :7])
+    np.testing.assert_allclose(np.take_along_axis(brute, indices, axis=1), distances)
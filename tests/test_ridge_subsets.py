@@ -0,0 +1,69 @@
+"""
+Closed-form LOO errors of the subset search against refitting sklearn Ridge.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ridge_subsets import FEATURES, exhaustive_search, greedy_path, standardize
+
+pytest.importorskip("sklearn")
+
+
+@pytest.fixture
+def weeks():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame(rng.normal(size=(30, 6)), columns=FEATURES[:6])
+    df["pace"] = 0.5 * df[FEATURES[0]] - 0.3 * df[FEATURES[2]] + rng.normal(size=30)
+
+    return df
+
+
+def test_loo_matches_sklearn(weeks):
+    from sklearn.linear_model import Ridge
+    from sklearn.model_selection import LeaveOneOut, cross_val_predict
+
+    features = FEATURES[:6]
+    table = exhaustive_search(weeks, features, [0.1, 10.0], workers=1)
+    assert len(table) == 2 * (2 ** len(features) - 1)
+
+    X = standardize(weeks[features].to_numpy(dtype=float))
+    y = weeks["pace"].to_numpy()
+    for _, row in table.iloc[::6].iterrows():
+        columns = [features.index(f) for f in row["features"].split(",")]
+        predictions = cross_val_predict(
+            Ridge(alpha=row["alpha"]), X[:, columns], y, cv=LeaveOneOut()
+        )
+        assert row["loo_mse"] == pytest.approx(np.mean((y - predictions) ** 2))
+
+
+def test_greedy_starts_with_best_single_feature(weeks):
+    features = FEATURES[:6]
+    singles = exhaustive_search(weeks, features, [1.0], max_features=1, workers=1)
+    path = greedy_path(weeks, features, alpha=1.0)
+
+    assert path["features"].iloc[0] == singles["features"].iloc[0]
+    assert path["n_features"].tolist() == list(range(1, len(features) + 1))
+
+
+def test_incomplete_weeks_are_skipped(weeks):
+    features = FEATURES[:6]
+    gaps = weeks.copy()
+    gaps.loc[3, "pace"] = np.nan  # a week without base runs
+    gaps.loc[7, features[1]] = np.nan
+    complete = weeks.drop(index=[3, 7]).reset_index(drop=True)
+
+    table = exhaustive_search(gaps, features, [1.0], workers=1)
+    assert table["loo_mse"].notna().all()
+    pd.testing.assert_frame_equal(
+        table, exhaustive_search(complete, features, [1.0], workers=1)
+    )
+    pd.testing.assert_frame_equal(
+        greedy_path(gaps, features), greedy_path(complete, features)
+    )
+
+
+def test_too_few_complete_weeks(weeks):
+    with pytest.raises(ValueError):
+        exhaustive_search(weeks.iloc[:2], FEATURES[:3], [1.0], workers=1)
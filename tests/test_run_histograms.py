@@ -0,0 +1,77 @@
+"""
+Histogram-based run metrics against direct sums over the samples.
+"""
+
+import math
+import numpy as np
+import pytest
+
+from data_handling import load_runs
+from run_histograms import ALTITUDES, RunHistograms
+from run_metrics import compute_load, compute_run_stats, compute_time_in_zone
+
+HR_ZONES = {"z2": [141, 158], "z3": [159, 168]}
+
+
+def reference_load(df, max_hr=196, rest_hr=48):
+    minutes = (df["time_diff"] / 60).fillna(0)
+    load = 0.0
+    for hr, duration in minutes.groupby(df["hr"]).sum().items():
+        reserve = (hr - rest_hr) / (max_hr - rest_hr)
+        load += duration * reserve * 0.64 * math.exp(reserve * 1.67)
+
+    return load
+
+
+@pytest.fixture
+def runs(run_folder):
+    runs = load_runs(folder=run_folder)
+    for df in runs.values():
+        df["time_diff"] = df["timestamp"].diff().dt.total_seconds()
+
+    return runs
+
+
+def test_load_and_zones_match_samples(runs):
+    for df in runs.values():
+        assert compute_load(df) == pytest.approx(reference_load(df), abs=1e-9)
+        for zone, (low, high) in HR_ZONES.items():
+            in_zone = (df["hr"] >= low) & (df["hr"] <= high)
+            expected = round(df.loc[in_zone, "time_diff"].sum() / 60, 3)
+            assert compute_time_in_zone(df, zone, HR_ZONES) == expected
+
+
+def test_altitude_times_match_samples(runs):
+    stats = compute_run_stats(runs)
+    for (_, row), df in zip(stats.iterrows(), runs.values()):
+        for altitude in ALTITUDES:
+            above = df["elevation"] >= altitude
+            expected = round(df.loc[above, "time_diff"].sum() / 60, 3)
+            assert row[f"time_above_{altitude}"] == expected
+
+
+def test_store_histograms_match_run_stats(runs, store):
+    histograms = RunHistograms(store)
+    assert histograms.update() == len(runs)
+    assert RunHistograms(store).update() == 0
+
+    stats = histograms.run_stats().sort_values("date", ignore_index=True)
+    expected = compute_run_stats(runs).sort_values("date", ignore_index=True)
+    for column in ["z2_time", "z3_time", "z4_time", "total_load"]:
+        np.testing.assert_allclose(stats[column], expected[column], atol=1e-9)
+
+
+@pytest.mark.filterwarnings("error")
+def test_missing_timestamp_gaps_count_as_zero(fit_folder, fit_store):
+    runs = load_runs(folder=fit_folder)
+    for df in runs.values():
+        assert df["timestamp"].isna().sum() == 1
+        df["time_diff"] = df["timestamp"].diff().dt.total_seconds()
+    expected = compute_run_stats(runs)
+
+    histograms = RunHistograms(fit_store)
+    histograms.update()
+    stats = histograms.run_stats()
+    for column in ["z2_time", "z3_time", "total_load"]:
+        np.testing.assert_allclose(stats[column], expected[column], atol=1e-9)
+    assert stats["total_load"].iloc[0] < 5
@@ -0,0 +1,58 @@
+"""
+Appending runs to the store and recovering from an interrupted append.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+from data_handling import load_runs
+from run_store import CHANNELS, RunStore, to_frame
+
+
+def test_missing_store_is_not_created(tmp_path):
+    path = tmp_path / "typo"
+    store = RunStore(str(path))
+
+    assert len(store) == 0 and store.n_samples == 0
+    assert len(store.channel("hr")) == 0
+    assert not path.exists()
+
+
+def test_runs_round_trip(run_folder, store):
+    runs = load_runs(folder=run_folder)
+    assert len(store) == len(runs)
+    assert store.build_from_folder(run_folder) == 0
+    assert "20250604_z2" in store and "20250605_z2" not in store
+
+    reopened = RunStore(store.path)
+    assert "20250604_z2" in reopened
+    for date_str, run in reopened.load_runs().items():
+        df = to_frame(run)
+        expected = runs[date_str]
+        pd.testing.assert_series_equal(
+            df["timestamp"], expected["timestamp"], check_dtype=False
+        )
+        np.testing.assert_array_equal(df["hr"], expected["hr"].astype(float))
+
+
+def test_interrupted_append_is_truncated(run_folder, tmp_path):
+    store = RunStore(str(tmp_path / "store"))
+    files = sorted(os.listdir(run_folder))
+    for filename in files[:2]:
+        store.append_run(filename, pd.read_csv(os.path.join(run_folder, filename)))
+
+    # A crash after writing some channels of the third run, before its index row
+    for name in ["timestamp", "pace"]:
+        with open(store._channel_path(name), "ab") as f:
+            f.write(b"\xff" * 8 * 100)
+
+    store = RunStore(store.path)
+    df = pd.read_csv(os.path.join(run_folder, files[2]))
+    assert store.append_run(files[2], df)
+    for name, dtype in CHANNELS.items():
+        size = os.path.getsize(store._channel_path(name))
+        assert size == store.n_samples * np.dtype(dtype).itemsize
+
+    run = store.run(store.index.iloc[-1])
+    np.testing.assert_array_equal(run["pace"], df["pace"].to_numpy(dtype=float))
@@ -0,0 +1,38 @@
+"""
+AE summaries from the run summaries against the per-sample computation.
+"""
+
+import pandas as pd
+import pytest
+
+from aerobic_efficiency import summarize_base_runs, summarize_from_store
+from data_handling import load_runs
+from run_summaries import RunSummaries
+
+
+def test_ae_summary_matches_samples(run_folder, store):
+    summaries = RunSummaries(store)
+    summaries.update()
+
+    expected = summarize_base_runs(load_runs(type="base", folder=run_folder))
+    summary = summarize_from_store(summaries)
+
+    pd.testing.assert_frame_equal(
+        summary, expected, check_dtype=False, check_exact=False, rtol=1e-12
+    )
+
+
+def test_missing_timestamp_gaps_count_as_zero(fit_folder, fit_store):
+    summaries = RunSummaries(fit_store)
+    summaries.update()
+
+    (df,) = load_runs(folder=fit_folder).values()
+    durations = df["timestamp"].diff().dt.total_seconds().fillna(0)
+    hr = df["hr"].astype(float)
+    expected = (hr * durations).sum() / durations[hr.notna()].sum()
+
+    for width in [None, 10]:
+        runs = summaries.aggregate(channels=["hr"], width=width)
+        runs = runs.groupby("run")[["hr_tw_sum", "hr_duration"]].sum()
+        tw_mean = runs["hr_tw_sum"] / runs["hr_duration"]
+        assert tw_mean.iloc[0] == pytest.approx(expected)
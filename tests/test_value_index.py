@@ -0,0 +1,61 @@
+"""
+Band queries of the value index against masked sums over the samples.
+"""
+
+import os
+import numpy as np
+import pytest
+
+from data_handling import load_runs
+from value_index import INDEX_PARTS, ValueIndex
+
+
+def band_minutes(df, low, high):
+    durations = df["timestamp"].diff().dt.total_seconds().fillna(0)
+    in_band = (df["hr"] >= low) & (df["hr"] <= high)
+
+    return durations[in_band].sum() / 60
+
+
+def test_time_in_band_matches_samples(run_folder, store):
+    index = ValueIndex(store)
+    assert index.update() == len(store)
+
+    band = index.time_in_band("hr", 141, 158)
+    runs = load_runs(folder=run_folder)
+    for run, minutes in band.items():
+        expected = band_minutes(runs[run.split("_")[0]], 141, 158)
+        assert minutes == pytest.approx(expected, abs=1e-3)
+
+
+def test_missing_timestamp_gaps_count_as_zero(fit_folder, fit_store):
+    index = ValueIndex(fit_store)
+    index.update()
+
+    (df,) = load_runs(folder=fit_folder).values()
+    band = index.time_in_band("hr", 0, 300)
+    assert band.iloc[0] == pytest.approx(band_minutes(df, 0, 300), abs=1e-3)
+    assert 0 < band.iloc[0] < 1
+
+
+def test_interrupted_update_is_recovered(store):
+    index = ValueIndex(store)
+    index.update()
+    expected = index.time_in_band("hr", 141, 158)
+    indexed = index.n_indexed("hr")
+
+    # A crash while appending the last run: durations short, values too long
+    path = index._path("hr", "durations")
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 100 * 8)
+    with open(index._path("hr", "values"), "ab") as f:
+        f.write(b"\0" * 13)
+
+    index = ValueIndex(store)
+    assert index.n_indexed("hr") < indexed
+    assert index.update() == 1
+    assert index.n_indexed("hr") == indexed
+    for part, dtype in INDEX_PARTS.items():
+        size = os.path.getsize(index._path("hr", part))
+        assert size == indexed * np.dtype(dtype).itemsize
+    assert index.time_in_band("hr", 141, 158).equals(expected)
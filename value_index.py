@@ -0,0 +1,256 @@
+"""
+Secondary value indexes over a RunStore for cross-run sample queries.
+
+For each indexed channel the samples of every run are stored sorted by value
+(within the run), together with their offset in the run and the running sum
+of sample durations. A band query on a run is then two binary searches, so
+"time at 150-158 bpm" or "time above 10,000 ft" over the archive costs
+O(runs * log(samples per run)) instead of a scan of every sample. Date and
+run-type predicates select runs from the store index before any sample is
+touched.
+
+A sample's duration is the gap since the previous timestamp
+(data_handling.time_diffs); gaps touching a missing timestamp are zero.
+
+    index = ValueIndex(RunStore("store"))
+    index.update()
+    z2 = index.time_in_band("hr", 141, 158, start_date="20250602", type="z2")
+"""
+
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+from data_handling import time_diffs
+from run_store import RunStore
+
+INDEXED_CHANNELS = ["hr", "pace", "elevation"]
+INDEX_PARTS = {"values": "float64", "offsets": "int32", "durations": "float64"}
+
+
+class ValueIndex:
+    """
+    Sorted-value index of the channels of a RunStore.
+
+    Parameters
+    ----------
+    store: RunStore
+        Store to index. Index files live next to the store's channel files.
+    channels: list
+        Channels to index.
+    """
+
+    def __init__(self, store, channels=INDEXED_CHANNELS):
+        self.store = store
+        self.channels = channels
+
+    def _path(self, channel, part):
+        return os.path.join(self.store.path, f"vidx_{channel}_{part}.bin")
+
+    def n_indexed(self, channel):
+        """
+        Number of store samples already covered by a channel's index.
+
+        Only whole runs present in every index part count, so the tail left
+        by an interrupted update is ignored (and overwritten by the next).
+        """
+
+        sizes = []
+        for part, dtype in INDEX_PARTS.items():
+            path = self._path(channel, part)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            sizes.append(size // np.dtype(dtype).itemsize)
+
+        index = self.store.index
+        ends = index["offset"] + index["length"]
+        ends = ends[ends <= min(sizes)]
+
+        return int(ends.max()) if len(ends) else 0
+
+    def update(self):
+        """
+        Indexes the runs appended to the store since the last update.
+
+        Returns
+        -------
+        int
+            Number of runs indexed.
+        """
+
+        added = 0
+        timestamps = self.store.channel("timestamp")
+        for channel in self.channels:
+            done = self.n_indexed(channel)
+            values = self.store.channel(channel)
+            new_runs = self.store.index[self.store.index["offset"] >= done]
+            if new_runs.empty:
+                continue
+
+            # Drop anything past the indexed runs before appending
+            for part, dtype in INDEX_PARTS.items():
+                path = self._path(channel, part)
+                if os.path.exists(path):
+                    with open(path, "r+b") as f:
+                        f.truncate(done * np.dtype(dtype).itemsize)
+
+            for _, row in new_runs.iterrows():
+                start = int(row["offset"])
+                end = start + int(row["length"])
+                parts = index_run(values[start:end], timestamps[start:end])
+                for part, array in parts.items():
+                    with open(self._path(channel, part), "ab") as f:
+                        f.write(array.astype(INDEX_PARTS[part]).tobytes())
+            added = max(added, len(new_runs))
+
+        return added
+
+    def _part(self, channel, part):
+        n = self.n_indexed(channel)
+        if n == 0:
+            return np.empty(0, dtype=INDEX_PARTS[part])
+
+        return np.memmap(
+            self._path(channel, part), dtype=INDEX_PARTS[part], mode="r", shape=(n,)
+        )
+
+    def _runs(self, channel, start_date=None, end_date=None, type=None):
+        """
+        Indexed runs matching the predicates, as (run, start, end) tuples.
+        """
+
+        selected = self.store.select(
+            start_date=start_date, end_date=end_date, type=type
+        )
+        covered = selected["offset"] + selected["length"] <= self.n_indexed(channel)
+        selected = selected[covered]
+        starts = selected["offset"].to_numpy(dtype=int)
+
+        return zip(
+            selected["run"], starts, starts + selected["length"].to_numpy(dtype=int)
+        )
+
+    def time_in_band(
+        self,
+        channel,
+        low=-np.inf,
+        high=np.inf,
+        start_date=None,
+        end_date=None,
+        type=None,
+    ):
+        """
+        Minutes each run spent with low <= channel <= high.
+
+        Parameters
+        ----------
+        channel: str
+            Indexed channel ('hr', 'pace' or 'elevation').
+        low, high: float
+            Inclusive band bounds. Leave one open for "above"/"below" queries.
+        start_date, end_date: str, optional
+            Date bounds in 'yyyymmdd' format.
+        type: str, optional
+            Run type.
+
+        Returns
+        -------
+        pd.Series
+            Minutes in band, indexed by run name.
+        """
+
+        values = self._part(channel, "values")
+        durations = self._part(channel, "durations")
+
+        minutes = {}
+        for run, start, end in self._runs(channel, start_date, end_date, type):
+            run_values = values[start:end]
+            lo = np.searchsorted(run_values, low, side="left")
+            hi = np.searchsorted(run_values, high, side="right")
+            cumulative = durations[start:end]
+            total = (cumulative[hi - 1] if hi > 0 else 0.0) - (
+                cumulative[lo - 1] if lo > 0 else 0.0
+            )
+            minutes[run] = round(total / 60, 3)
+
+        return pd.Series(minutes, dtype=float, name=f"{channel}_minutes")
+
+    def samples_in_band(
+        self,
+        channel,
+        low=-np.inf,
+        high=np.inf,
+        start_date=None,
+        end_date=None,
+        type=None,
+    ):
+        """
+        Positions of all samples with low <= channel <= high.
+
+        Returns
+        -------
+        dict
+            Run name -> sorted array of sample offsets within the run. Offsets
+            index the run's views from RunStore.run / RunStore.load_runs.
+        """
+
+        values = self._part(channel, "values")
+        offsets = self._part(channel, "offsets")
+
+        matches = {}
+        for run, start, end in self._runs(channel, start_date, end_date, type):
+            run_values = values[start:end]
+            lo = np.searchsorted(run_values, low, side="left")
+            hi = np.searchsorted(run_values, high, side="right")
+            if hi > lo:
+                matches[run] = np.sort(offsets[start + lo : start + hi])
+
+        return matches
+
+
+def index_run(values, timestamps):
+    """
+    Index entries of one run.
+
+    Parameters
+    ----------
+    values: np.ndarray
+        Channel samples of the run.
+    timestamps: np.ndarray
+        datetime64 timestamps of the run.
+
+    Returns
+    -------
+    dict
+        'values' sorted (NaN last), 'offsets' of each sorted value in the run
+        and 'durations', the running sum of sample durations in seconds.
+    """
+
+    durations = time_diffs(timestamps)
+    order = np.argsort(values, kind="stable")
+
+    return {
+        "values": np.asarray(values)[order],
+        "offsets": order,
+        "durations": np.cumsum(durations[order]),
+    }
+
+
+def main():
+    """Build or update the value index of a store."""
+    parser = argparse.ArgumentParser(
+        description="Build or update the value index of a run store"
+    )
+    parser.add_argument(
+        "--store", default="./store", help="Store directory (default: ./store)"
+    )
+    args = parser.parse_args()
+
+    added = ValueIndex(RunStore(args.store)).update()
+    print(f"Indexed {added} runs")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())